@@ -1,6 +1,7 @@
 """Hauptanwendung - Flask App Initialisierung."""
 import os
-from flask import Flask
+from flask import Flask, flash, redirect, request, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from utils.helpers import load_config
 
@@ -12,6 +13,14 @@ try:
 except Exception:
     app.secret_key = "change-me-please"
 
+# Größte zulässige Anfrage (alle Uploads), Standard 50 MB; für Belege gilt
+# zusätzlich RECEIPTS.max_upload_mb (services/receipts.py)
+DEFAULT_MAX_UPLOAD_MB = 50
+try:
+    app.config["MAX_CONTENT_LENGTH"] = int(load_config().get("MAX_UPLOAD_MB", DEFAULT_MAX_UPLOAD_MB)) * 1024 * 1024
+except Exception:
+    app.config["MAX_CONTENT_LENGTH"] = DEFAULT_MAX_UPLOAD_MB * 1024 * 1024
+
 if app.secret_key == "change-me-please":
     import warnings
     warnings.warn(
@@ -31,19 +40,32 @@ def inject_config():
     return {"paperless_enabled": paperless_enabled}
 
 
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(exc):
+    limit_mb = app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+    flash(f"Die Datei ist zu groß (höchstens {limit_mb} MB).", "error")
+    return redirect(request.referrer or url_for("upload.upload"))
+
+
 # Blueprints registrieren
 from routes.dashboard import bp as dashboard_bp
 from routes.actions import bp as actions_bp
 from routes.settings import bp as settings_bp
 from routes.upload import bp as upload_bp
+from routes.jobs import bp as jobs_bp
 
 app.register_blueprint(dashboard_bp)
 app.register_blueprint(actions_bp)
 app.register_blueprint(settings_bp)
 app.register_blueprint(upload_bp)
+app.register_blueprint(jobs_bp)
 
 
 if __name__ == "__main__":
     debug = os.environ.get("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
     app.config['DEBUG'] = debug # Debug-Modus aktivieren für bessere Fehlermeldungen
+    # Belege aus image/ im Hintergrund an Paperless senden (im Debug-Modus nur im Reloader-Kindprozess)
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        from services.outbox import start_dispatcher
+        start_dispatcher()
     app.run(debug=debug, host="0.0.0.0", port=5001)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Kategorisierung per Schlüsselwort-Schleife vs. KeywordCategorizer.
+
+Erzeugt synthetische Schlüsselwörter und Beschreibungen, prüft, dass beide
+Verfahren dieselben Kategorien liefern, und misst die Laufzeit. Benötigt
+keine Datenbank.
+
+    python benchmarks/bench_categorizer.py --keywords 500 --rows 50000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.categorizer import KeywordCategorizer  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mer", "tan", "bu", "ri", "sel", "no", "vit", "ga", "ste", "hof", "ber", "lin"]
+FILLER = ["Kartenzahlung", "Lastschrift", "Einkauf", "REF", "Gutschrift", "Online", "Rechnung", "GmbH"]
+
+
+def random_word(rng, syllables=3):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def legacy_kategorie(text, kat_map):
+    """Bisheriges Verfahren aus import_data.py / reload_category.py."""
+    t = text.lower()
+    for key, kat in kat_map.items():
+        if re.search(r"\b" + re.escape(key.lower()) + r"\b", t):
+            return kat
+    return "Sonstiges"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Kategorisierung")
+    parser.add_argument("--keywords", type=int, default=500, help="Anzahl Schlüsselwörter")
+    parser.add_argument("--rows", type=int, default=50_000, help="Anzahl Beschreibungen")
+    parser.add_argument("--hit-rate", type=float, default=0.6, help="Anteil Beschreibungen mit Treffer")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    kat_map = {}
+    while len(kat_map) < args.keywords:
+        key = random_word(rng, rng.choice([2, 3, 4]))
+        if rng.random() < 0.2:
+            key += " " + random_word(rng, 2)
+        kat_map[key] = f"Kategorie {len(kat_map) % 40}"
+    keys = list(kat_map)
+
+    texts = []
+    for _ in range(args.rows):
+        words = [rng.choice(FILLER), random_word(rng, 4), rng.choice(FILLER)]
+        if rng.random() < args.hit_rate:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keys).upper())
+        words.append("".join(rng.choice("0123456789") for _ in range(10)))
+        texts.append(" ".join(words))
+
+    print(f"📊 {args.keywords} Schlüsselwörter, {args.rows} Beschreibungen")
+
+    started = time.perf_counter()
+    expected = [legacy_kategorie(text, kat_map) for text in texts]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    categorizer = KeywordCategorizer(kat_map.items())
+    compile_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [categorizer.categorize(text) for text in texts]
+    matcher_s = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+    print(f"   Schleife:           {legacy_s:8.2f}s")
+    print(f"   KeywordCategorizer: {matcher_s:8.2f}s (+ {compile_s * 1000:.1f}ms Kompilieren)")
+    print(f"   Faktor:             {legacy_s / matcher_s if matcher_s else 0:8.1f}x")
+    if mismatches:
+        print(f"❌ {mismatches} abweichende Kategorien")
+        return 1
+    print("✅ Ergebnisse identisch")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
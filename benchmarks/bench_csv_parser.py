@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Einlesen von Bank-CSV-Dateien mit dem C- und dem Python-Parser.
+
+Erzeugt synthetische Exporte im Stil von Sparkasse (CSV-CAMT), ING und
+Comdirect, liest sie wie bisher (Python-Parser, alle Spalten, Typerkennung)
+und mit BankCSVParser (C-Parser, nur gemappte Spalten als Text), prüft, dass
+extract_frame identische Daten liefert, und misst die Laufzeit. Benötigt
+keine Datenbank.
+
+    python benchmarks/bench_csv_parser.py --rows 100000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_parser import BankCSVParser  # noqa: E402
+
+PAYEES = ["REWE Markt GmbH", "Stadtwerke München", "Amazon EU S.a.r.L.", "Müller Drogerie",
+          "Vermieter Schulz", "Deutsche Bahn", "Arbeitgeber AG", "Bäckerei Köhler"]
+PURPOSES = ["Kartenzahlung", "Miete Dezember", "Abschlag Strom", "Gehalt", "Bestellung 302-1234567",
+            "Lastschrift; Ref. 4711", 'Einkauf "Filiale 12"']
+TYPES = ["Lastschrift", "Gutschrift", "Kartenzahlung", "Dauerauftrag", "Überweisung"]
+
+
+def _quote(value):
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _amount(rng):
+    value = rng.choice([-1, -1, -1, 1]) * rng.randint(1, 250_000) / 100
+    text = f"{abs(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return ("-" if value < 0 else "") + text
+
+
+def _day(rng):
+    return date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+
+
+def sparkasse_lines(rng, rows):
+    """CSV-CAMT V2: alles in Anführungszeichen, zweistellige Jahreszahl."""
+    yield ";".join(_quote(c) for c in [
+        "Auftragskonto", "Buchungstag", "Valutadatum", "Buchungstext", "Verwendungszweck",
+        "Glaeubiger ID", "Mandatsreferenz", "Kundenreferenz (End-to-End)", "Sammlerreferenz",
+        "Lastschrift Ursprungsbetrag", "Auslagenersatz Ruecklastschrift",
+        "Beguenstigter/Zahlungspflichtiger", "Kontonummer/IBAN", "BIC (SWIFT-Code)",
+        "Betrag", "Waehrung", "Info",
+    ])
+    for _ in range(rows):
+        day = _day(rng).strftime("%d.%m.%y")
+        yield ";".join(_quote(c) for c in [
+            "DE12500105170648489890", day, day, rng.choice(TYPES).upper(), rng.choice(PURPOSES),
+            "", "", "NOTPROVIDED", "", "", "", rng.choice(PAYEES), "DE44500105175407324931",
+            "INGDDEFFXXX", _amount(rng), "EUR", "Umsatz gebucht",
+        ])
+
+
+def ing_lines(rng, rows):
+    """ING: Metadaten-Block, doppelte Spalte Währung, ohne Anführungszeichen."""
+    yield "Umsatzanzeige;Datei erstellt am: 31.12.2024 10:00"
+    yield ""
+    yield "IBAN;DE12 5001 0517 0648 4898 90"
+    yield "Kontoname;Girokonto"
+    yield "Bank;ING"
+    yield "Kunde;Erika Mustermann"
+    yield "Zeitraum;01.01.2024 - 31.12.2024"
+    yield "Saldo;1.234,56;EUR"
+    yield ""
+    yield "Sortierung;Datum absteigend"
+    yield ""
+    yield "Buchung;Valuta;Auftraggeber/Empfänger;Buchungstext;Verwendungszweck;Saldo;Währung;Betrag;Währung"
+    for _ in range(rows):
+        day = _day(rng).strftime("%d.%m.%Y")
+        purpose = rng.choice(PURPOSES).replace(";", ",").replace('"', "")
+        yield ";".join([day, day, rng.choice(PAYEES), rng.choice(TYPES), purpose,
+                        "1.234,56", "EUR", _amount(rng), "EUR"])
+
+
+def comdirect_lines(rng, rows):
+    """Comdirect: Kopfzeilen, abschließendes Semikolon, Fußzeile mit Kontostand."""
+    yield ";"
+    yield '"Umsätze Girokonto";"Zeitraum: 365 Tage";'
+    yield '"Neuer Kontostand";"1.234,56 EUR";'
+    yield ""
+    yield '"Buchungstag";"Wertstellung (Valuta)";"Vorgang";"Buchungstext";"Umsatz in EUR";'
+    for _ in range(rows):
+        day = _day(rng).strftime("%d.%m.%Y")
+        text = f"Auftraggeber: {rng.choice(PAYEES)} Buchungstext: {rng.choice(PURPOSES)} Ref. {rng.randrange(10**9)}"
+        yield ";".join(_quote(c) for c in [day, day, rng.choice(TYPES), text, _amount(rng)]) + ";"
+    yield '"Alter Kontostand";"1.000,00 EUR";'
+
+
+FORMATS = [
+    ("Sparkasse", sparkasse_lines, "cp1252"),
+    ("ING", ing_lines, "cp1252"),
+    ("Comdirect", comdirect_lines, "cp1252"),
+]
+
+
+def legacy_read(parser):
+    """Bisheriges Verfahren: Python-Parser, alle Spalten, Typerkennung."""
+    for encoding in (parser.encoding, "latin-1"):
+        try:
+            return pd.read_csv(
+                parser.csv_path,
+                sep=parser.delimiter,
+                skiprows=parser.header_row,
+                encoding=encoding,
+                quotechar='"',
+                on_bad_lines="skip",
+                engine="python",
+            )
+        except UnicodeDecodeError:
+            continue
+
+
+def timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CSV-Parser")
+    parser.add_argument("--rows", type=int, default=100_000, help="Buchungen je Datei")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_csv_")
+    failed = 0
+    try:
+        print(f"📊 {args.rows} Buchungen je Datei")
+        for name, lines, encoding in FORMATS:
+            path = os.path.join(tmp_dir, f"{name.lower()}.csv")
+            with open(path, "w", encoding=encoding, newline="") as f:
+                f.write("\r\n".join(lines(rng, args.rows)) + "\r\n")
+
+            fast = BankCSVParser(path)
+            try:
+                fast.sniff()
+            except ValueError as e:
+                print(f"⚠️  {name}: Format nicht erkannt ({e})")
+                continue
+
+            legacy_df, legacy_s = timed(lambda: legacy_read(fast))
+            (fast_df, _, _), fast_s = timed(fast.parse)
+
+            slow = BankCSVParser(path)
+            slow.engines = ("python",)
+            (slow_df, _, _), slow_s = timed(slow.parse)
+
+            expected = fast.extract_frame(legacy_df)
+            identical = (
+                expected.equals(fast.extract_frame(fast_df))
+                and expected.equals(slow.extract_frame(slow_df))
+            )
+            print(f"\n   {name} ({os.path.getsize(path) / 1e6:.1f} MB, Parser: {fast.engine})")
+            print(f"   bisher (Python, alle Spalten): {legacy_s:8.2f}s")
+            print(f"   Python-Parser (Fallback):      {slow_s:8.2f}s")
+            print(f"   C-Parser:                      {fast_s:8.2f}s")
+            print(f"   Faktor:                        {legacy_s / fast_s if fast_s else 0:8.1f}x")
+            if not identical:
+                print(f"❌ {name}: abweichende Daten")
+                failed += 1
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if failed:
+        return 1
+    print("\n✅ Ergebnisse identisch")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Upload von Belegen an einen lokalen Paperless-Stub.
+
+Startet einen HTTP-Server, der /api/documents/post_document/ mit fester
+Latenz beantwortet und jede n-te Anfrage einmalig mit 503 ablehnt. Gemessen
+werden der bisherige Upload (nacheinander, neue Verbindung je Datei, ohne
+Wiederholung) und PaperlessUploader (gemeinsame Session, gleichzeitige
+Uploads, Wiederholung mit Backoff). Geprüft wird, dass jede Datei genau
+einmal angenommen wurde. Benötigt weder Datenbank noch Paperless.
+
+    python benchmarks/bench_paperless.py --files 40 --latency 0.2
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.paperless import UPLOAD_PATH, PaperlessUploader  # noqa: E402
+
+_FILENAME = re.compile(rb'filename="([^"]+)"')
+
+
+class StubPaperless(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency, fail_every):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.accepted = Counter()
+        self.rejected = set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.accepted.clear()
+            self.rejected.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        match = _FILENAME.search(body)
+        name = match.group(1).decode() if match else ""
+        time.sleep(server.latency)
+
+        with server.lock:
+            server.requests += 1
+            # Jede n-te Datei wird beim ersten Versuch abgelehnt
+            fail = (
+                server.fail_every
+                and name not in server.rejected
+                and server.requests % server.fail_every == 0
+            )
+            if fail:
+                server.rejected.add(name)
+            elif self.path == UPLOAD_PATH and self.headers.get("Authorization") == "Token bench":
+                server.accepted[name] += 1
+
+        status, payload = (503, b"busy") if fail else (200, b'"ok"')
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def legacy_upload(url, paths):
+    """Bisheriges Verfahren: nacheinander, requests.post je Datei."""
+    sent = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            response = requests.post(
+                url.rstrip("/") + UPLOAD_PATH,
+                headers={"Authorization": "Token bench"},
+                files={"document": f},
+                timeout=30,
+            )
+        sent += response.status_code in (200, 201)
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Paperless-Upload")
+    parser.add_argument("--files", type=int, default=40, help="Anzahl Belege")
+    parser.add_argument("--size", type=int, default=200_000, help="Bytes je Beleg")
+    parser.add_argument("--latency", type=float, default=0.2, help="Antwortzeit des Stubs (Sekunden)")
+    parser.add_argument("--fail-every", type=int, default=7, help="jede n-te Anfrage einmalig mit 503 ablehnen")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_paperless_")
+    server = StubPaperless(args.latency, args.fail_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        paths = []
+        for index in range(args.files):
+            path = os.path.join(tmp_dir, f"beleg_{index:04d}.jpg")
+            with open(path, "wb") as f:
+                f.write(os.urandom(args.size))
+            paths.append(path)
+        print(f"📊 {args.files} Belege à {args.size / 1e3:.0f} kB, Latenz {args.latency}s")
+
+        started = time.perf_counter()
+        legacy_sent = legacy_upload(server.url, paths)
+        legacy_s = time.perf_counter() - started
+
+        server.reset()
+        started = time.perf_counter()
+        with PaperlessUploader(server.url, "bench", workers=args.workers, backoff=0.05) as uploader:
+            results = uploader.upload_many(paths)
+        fast_s = time.perf_counter() - started
+
+        sent = sum(r["sent"] for r in results)
+        retried = sum(r["attempts"] > 1 for r in results)
+        print(f"   bisher (nacheinander):     {legacy_s:8.2f}s  {legacy_sent}/{args.files} gesendet")
+        print(f"   PaperlessUploader ({args.workers}x):  {fast_s:8.2f}s  {sent}/{args.files} gesendet, "
+              f"{retried} wiederholt")
+        print(f"   Faktor:                    {legacy_s / fast_s if fast_s else 0:8.1f}x")
+
+        names = {os.path.basename(p) for p in paths}
+        if sent != args.files or set(server.accepted) != names or max(server.accepted.values()) != 1:
+            print("❌ Nicht jede Datei wurde genau einmal angenommen")
+            return 1
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n✅ Alle Belege genau einmal gesendet")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
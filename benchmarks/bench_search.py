@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Beschreibungssuche per LIKE vs. Volltextindex.
+
+Legt eine Kopie der Tabelle buchungen (bench_buchungen) mit synthetischen
+Daten an, baut den Volltextindex auf und misst die Abfragezeiten beider
+Suchmodi. Die Tabelle wird am Ende wieder gelöscht (außer mit --keep).
+
+    python benchmarks/bench_search.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import connect  # noqa: E402
+from services.search import FULLTEXT_INDEX, compile_search, detect_search_mode  # noqa: E402
+
+TABLE = "bench_buchungen"
+
+MERCHANTS = [
+    "REWE Markt", "EDEKA Center", "ALDI SUED", "LIDL Dienstleistung", "dm-drogerie markt",
+    "Amazon EU S.a.r.L.", "PayPal Europe", "Deutsche Bahn", "Shell Station", "Aral Tankstelle",
+    "Stadtwerke", "Telekom Deutschland", "Vodafone GmbH", "Netflix International", "Spotify AB",
+    "IKEA Deutschland", "MediaMarkt", "Apotheke am Markt", "Baeckerei Schmidt", "Allianz Versicherung",
+]
+PURPOSES = [
+    "Kartenzahlung", "Lastschrift", "Dauerauftrag Miete", "Gehalt", "Rechnung", "Abbuchung",
+    "Gutschrift", "Monatsbeitrag", "Einkauf", "Online-Bestellung", "Erstattung", "Tankfüllung",
+]
+QUERIES = ["rewe", "markt", "amazon", "bahn tickets", "telekom rechnung", '"dauerauftrag miete"', "xyz123"]
+
+
+def random_description(rng):
+    ref = "".join(rng.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(12))
+    words = rng.sample(PURPOSES, 2)
+    return f"{rng.choice(MERCHANTS)} {words[0]} {words[1]} REF {ref}"
+
+
+def populate(conn, rows, batch_size, seed):
+    rng = random.Random(seed)
+    cur = conn.cursor()
+    cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cur.execute(f"CREATE TABLE {TABLE} LIKE buchungen")
+    # Index erst nach dem Befüllen aufbauen (deutlich schneller)
+    cur.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (TABLE, FULLTEXT_INDEX),
+    )
+    has_fulltext = cur.fetchone()[0] > 0
+    if has_fulltext:
+        cur.execute(f"ALTER TABLE {TABLE} DROP INDEX {FULLTEXT_INDEX}")
+    cur.execute("SHOW INDEX FROM buchungen WHERE Key_name = 'unique_buchung'")
+    if cur.fetchall():
+        cur.execute(f"ALTER TABLE {TABLE} DROP INDEX unique_buchung")
+
+    start_date = date(2015, 1, 1)
+    sql = f"""
+        INSERT INTO {TABLE} (datum, art, beschreibung, soll, haben, kategorie, konto, gegen_iban)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    started = time.perf_counter()
+    inserted = 0
+    while inserted < rows:
+        batch = []
+        for _ in range(min(batch_size, rows - inserted)):
+            betrag = round(rng.uniform(1, 500), 2)
+            is_expense = rng.random() < 0.85
+            batch.append((
+                start_date + timedelta(days=rng.randrange(3650)),
+                "Lastschrift",
+                random_description(rng),
+                betrag if is_expense else 0,
+                0 if is_expense else betrag,
+                "Sonstiges",
+                rng.choice(["DE01BENCH0001", "DE02BENCH0002"]),
+                "",
+            ))
+        cur.executemany(sql, batch)
+        conn.commit()
+        inserted += len(batch)
+    print(f"   {inserted} Zeilen eingefügt in {time.perf_counter() - started:.1f}s")
+
+    if has_fulltext:
+        started = time.perf_counter()
+        cur.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        cur.execute("SELECT VERSION()")
+        parser = "" if "mariadb" in (cur.fetchone()[0] or "").lower() else " WITH PARSER ngram"
+        cur.execute(f"ALTER TABLE {TABLE} ADD FULLTEXT INDEX {FULLTEXT_INDEX} (beschreibung){parser}")
+        print(f"   Volltextindex aufgebaut in {time.perf_counter() - started:.1f}s")
+    cur.close()
+
+
+def time_query(conn, text, mode, repeat):
+    conditions, params = compile_search(text, mode)
+    sql = f"SELECT COUNT(*) FROM {TABLE} WHERE {' AND '.join(conditions)}"
+    timings = []
+    count = None
+    cur = conn.cursor()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cur.execute(sql, params)
+        count = cur.fetchone()[0]
+        timings.append((time.perf_counter() - started) * 1000)
+    cur.close()
+    return count, statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark LIKE- vs. Volltextsuche")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Anzahl synthetischer Buchungen")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen je Abfrage (Median)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Benchmark-Tabelle nicht löschen")
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        mode = detect_search_mode(conn)
+        if mode == "like":
+            print("❌ Volltextindex fehlt – bitte zuerst 'python migrate.py' ausführen")
+            return 1
+
+        print(f"📊 Befülle {TABLE} mit {args.rows} Zeilen (Suchmodus: {mode})...")
+        populate(conn, args.rows, args.batch_size, args.seed)
+
+        print(f"\n{'Suche':<24}{'Treffer':>10}{'LIKE ms':>12}{mode + ' ms':>12}{'Faktor':>9}")
+        for text in QUERIES:
+            like_count, like_ms = time_query(conn, text, "like", args.repeat)
+            ft_count, ft_ms = time_query(conn, text, mode, args.repeat)
+            marker = "" if like_count == ft_count or mode == "word" else "  (!) abweichend"
+            print(
+                f"{text:<24}{ft_count:>10}{like_ms:>12.1f}{ft_ms:>12.1f}"
+                f"{like_ms / ft_ms if ft_ms else 0:>8.1f}x{marker}"
+            )
+        return 0
+    finally:
+        if not args.keep:
+            cur = conn.cursor()
+            cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
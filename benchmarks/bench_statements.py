@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CAMT.053- und MT940-Auszüge gegenüber demselben Export als CSV.
+
+Erzeugt dieselben Buchungen als CSV, CAMT.053 (XML) und MT940, liest sie
+über stream_file der Import-Pipeline (Parsen, Extraktion, Aufbereitung,
+Kategorisierung), prüft, dass alle drei Formate identische Buchungszeilen
+liefern, und misst Laufzeit und Speicherspitze (tracemalloc). Für CAMT.053
+wird zum Vergleich der Speicherbedarf eines vollständig geladenen
+XML-Baums gemessen. Benötigt keine Datenbank.
+
+    python benchmarks/bench_statements.py --rows 100000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest.pipeline import stream_file  # noqa: E402
+from services.categorizer import KeywordCategorizer  # noqa: E402
+
+IBAN = "DE12500105170648489890"
+PAYEES = [("REWE Markt GmbH", "DE44500105175407324931"), ("Stadtwerke München", "DE02120300000000202051"),
+          ("Müller Drogerie", "DE89370400440532013000"), ("Arbeitgeber AG", "DE75512108001245126199"),
+          ("Bäckerei Köhler", "DE60500105175555555555")]
+PURPOSES = ["Kartenzahlung Filiale 12", "Miete Dezember", "Abschlag Strom Vertrag 4711",
+            "Gehalt", "Bestellung 302-1234567 vom 01.12.", "Einkauf Drogerie"]
+TYPES = ["Lastschrift", "Gutschrift", "Kartenzahlung", "Dauerauftrag", "Überweisung"]
+KEYWORDS = [("rewe", "Lebensmittel"), ("stadtwerke", "Energie"), ("gehalt", "Einkommen")]
+
+
+def bookings(rng, rows):
+    """Buchungen aufsteigend nach Datum: (Datum, Betrag in Cent, Empfänger, IBAN, Zweck, Typ)."""
+    day = date(2020, 1, 1)
+    for _ in range(rows):
+        day += timedelta(days=rng.random() < 0.2)
+        payee, iban = rng.choice(PAYEES)
+        cents = rng.choice([-1, -1, -1, 1]) * rng.randint(1, 250_000)
+        yield day, cents, payee, iban, rng.choice(PURPOSES), rng.choice(TYPES)
+
+
+def _amount(cents):
+    return f"{abs(cents) // 100},{abs(cents) % 100:02d}"
+
+
+def write_csv(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Girokonto;{IBAN}\n\n")
+        f.write("Buchungsdatum;Betrag (€);Zahlungsempfänger*in;Verwendungszweck;IBAN;Umsatztyp\n")
+        for day, cents, payee, iban, purpose, typ in items:
+            sign = "-" if cents < 0 else ""
+            f.write(f"{day:%d.%m.%Y};{sign}{_amount(cents)};{payee};{purpose};{iban};{typ}\n")
+
+
+def write_camt(path, items):
+    """CAMT.053.001.08: ein Auszug, Gegenseite mit Pty."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.08"><BkToCstmrStmt>')
+        f.write("<GrpHdr><MsgId>BENCH</MsgId><CreDtTm>2024-12-31T10:00:00</CreDtTm></GrpHdr>")
+        f.write(f"<Stmt><Id>1</Id><Acct><Id><IBAN>{IBAN}</IBAN></Id></Acct>")
+        for index, (day, cents, payee, iban, purpose, typ) in enumerate(items):
+            debit = cents < 0
+            role = "Cdtr" if debit else "Dbtr"
+            f.write(
+                f'<Ntry><Amt Ccy="EUR">{abs(cents) / 100:.2f}</Amt>'
+                f"<CdtDbtInd>{'DBIT' if debit else 'CRDT'}</CdtDbtInd><Sts><Cd>BOOK</Cd></Sts>"
+                f"<BookgDt><Dt>{day.isoformat()}</Dt></BookgDt><ValDt><Dt>{day.isoformat()}</Dt></ValDt>"
+                f"<AcctSvcrRef>{index}</AcctSvcrRef>"
+                f"<BkTxCd><Prtry><Cd>NMSC+201</Cd><Issr>DK</Issr></Prtry></BkTxCd>"
+                f"<NtryDtls><TxDtls><Refs><EndToEndId>E2E-{index}</EndToEndId></Refs>"
+                f"<RltdPties><{role}><Pty><Nm>{escape(payee)}</Nm></Pty></{role}>"
+                f"<{role}Acct><Id><IBAN>{iban}</IBAN></Id></{role}Acct></RltdPties>"
+                f"<RmtInf><Ustrd>{escape(purpose)}</Ustrd></RmtInf></TxDtls></NtryDtls>"
+                f"<AddtlNtryInf>{escape(typ)}</AddtlNtryInf></Ntry>"
+            )
+        f.write("</Stmt></BkToCstmrStmt></Document>\n")
+
+
+def _subfields(code, text, width=27):
+    return "".join(f"?{code + i}{text[pos:pos + width]}" for i, pos in enumerate(range(0, len(text), width)))
+
+
+def write_mt940(path, items):
+    """MT940 mit strukturiertem :86: (ISO-8859-1), eine Nachricht je 1000 Buchungen."""
+    with open(path, "w", encoding="latin-1", newline="\r\n") as f:
+        for index, (day, cents, payee, iban, purpose, typ) in enumerate(items):
+            if index % 1000 == 0:
+                if index:
+                    f.write("-\n")
+                f.write(f":20:STARTUMS\n:25:50010517/0648489890\n:28C:{index // 1000 + 1}\n")
+                f.write(f":60F:C{day:%y%m%d}EUR0,00\n")
+            mark = "D" if cents < 0 else "C"
+            f.write(f":61:{day:%y%m%d}{day:%m%d}{mark}R{_amount(cents)}NTRFNONREF//{index}\n")
+            info = (
+                f"166?00{typ}?10931"
+                + _subfields(20, f"EREF+E2E-{index}SVWZ+{purpose}")
+                + f"?30INGDDEFFXXX?31{iban}?32{payee}"
+            )
+            # Zeilen zu höchstens 65 Zeichen
+            f.write(":86:" + "\n".join(info[pos:pos + 65] for pos in range(0, len(info), 65)) + "\n")
+        f.write(":62F:C241231EUR0,00\n-\n")
+
+
+def stream(path, categorizer):
+    """Liest eine Datei wie der Import; gibt (Zeilen, Sekunden) zurück."""
+    started = time.perf_counter()
+    _prepared, chunks = stream_file(path, categorizer, chunk_size=5000)
+    rows = [row for chunk in chunks for row in chunk]
+    return rows, time.perf_counter() - started
+
+
+def stream_peak(path, categorizer):
+    """Speicherspitze ohne die gesammelten Zeilen (nur Durchlauf)."""
+    tracemalloc.start()
+    _prepared, chunks = stream_file(path, categorizer, chunk_size=5000)
+    count = sum(len(chunk) for chunk in chunks)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, peak / 1e6
+
+
+def tree_peak(path):
+    tracemalloc.start()
+    tree = ET.parse(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del tree
+    return peak / 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CAMT.053/MT940 gegenüber CSV")
+    parser.add_argument("--rows", type=int, default=100_000, help="Buchungen je Datei")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    items = list(bookings(random.Random(args.seed), args.rows))
+    categorizer = KeywordCategorizer(KEYWORDS)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_statements_")
+    failed = 0
+    try:
+        paths = {
+            "CSV": os.path.join(tmp_dir, "umsaetze.csv"),
+            "CAMT.053": os.path.join(tmp_dir, "auszug.xml"),
+            "MT940": os.path.join(tmp_dir, "auszug.sta"),
+        }
+        write_csv(paths["CSV"], items)
+        write_camt(paths["CAMT.053"], items)
+        write_mt940(paths["MT940"], items)
+
+        print(f"📊 {args.rows} Buchungen je Datei")
+        expected = None
+        for name, path in paths.items():
+            rows, seconds = stream(path, categorizer)
+            _count, peak = stream_peak(path, categorizer)
+            print(f"\n   {name} ({os.path.getsize(path) / 1e6:.1f} MB)")
+            print(f"   Laufzeit:          {seconds:8.2f}s ({len(rows) / seconds if seconds else 0:,.0f} Zeilen/s)")
+            print(f"   Speicherspitze:    {peak:8.1f} MB (ohne gesammelte Zeilen)")
+            if expected is None:
+                expected = rows
+            elif rows != expected:
+                mismatch = next((i for i, (a, b) in enumerate(zip(rows, expected)) if a != b), len(rows))
+                print(f"❌ {name}: abweichende Buchungen ab Zeile {mismatch}")
+                failed += 1
+
+        print(f"\n   CAMT.053 als vollständiger XML-Baum: {tree_peak(paths['CAMT.053']):8.1f} MB")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if failed:
+        return 1
+    print("\n✅ Ergebnisse identisch")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,59 @@
 import json
 import os
+import queue
+import threading
+import time
+
 import mysql.connector
 
 
+# Standardwerte für den Verbindungspool (überschreibbar über "DB_POOL" in config.json)
+DEFAULT_POOL_CONFIG = {
+    "size": 5,          # maximale Anzahl gleichzeitig ausgeliehener Verbindungen
+    "timeout": 10.0,    # Sekunden, die auf eine freie Verbindung gewartet wird
+    "retries": 3,       # Verbindungsversuche bei Verbindungsfehlern
+    "backoff": 0.5,     # Basis-Wartezeit (Sekunden) für exponentielles Backoff
+    "pre_ping": True,   # Verbindung vor dem Ausleihen prüfen
+}
+
+_config_cache = {"mtime": None, "config": None}
+_config_lock = threading.Lock()
+
+
+def _config_path():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "config.json")
+
+
+def _load_config_file():
+    """Liest config.json und hält das Ergebnis bis zur nächsten Dateiänderung vor."""
+    cfg_path = _config_path()
+    mtime = os.path.getmtime(cfg_path)
+    with _config_lock:
+        if _config_cache["config"] is None or _config_cache["mtime"] != mtime:
+            with open(cfg_path, "r") as f:
+                _config_cache["config"] = json.load(f)
+            _config_cache["mtime"] = mtime
+        return _config_cache["config"]
+
+
 def load_db_config():
     """Liest die DB-Konfiguration aus config.json neben diesem Skript."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    cfg_path = os.path.join(base_dir, "config.json")
-    with open(cfg_path, "r") as f:
-        cfg = json.load(f)
-    return cfg["DB_CONFIG"]
+    return _load_config_file()["DB_CONFIG"]
 
 
-def get_connection():
-    """Stellt eine neue DB-Verbindung her."""
+def load_pool_config():
+    """Liest die Pool-Konfiguration ("DB_POOL") aus config.json, ergänzt um Standardwerte."""
+    pool_cfg = dict(DEFAULT_POOL_CONFIG)
+    try:
+        pool_cfg.update(_load_config_file().get("DB_POOL", {}))
+    except FileNotFoundError:
+        pass
+    return pool_cfg
+
+
+def connect():
+    """Stellt eine neue, ungepoolte DB-Verbindung her."""
     db_config = load_db_config()
     return mysql.connector.connect(
         host=db_config["host"],
@@ -22,3 +62,201 @@ def get_connection():
         database=db_config["database"],
     )
 
+
+class PoolTimeoutError(mysql.connector.Error):
+    """Keine freie Verbindung innerhalb des Pool-Timeouts verfügbar."""
+
+
+class PooledConnection:
+    """
+    Dünner Wrapper um eine MySQL-Verbindung aus dem Pool.
+
+    Alle Attribute werden an die echte Verbindung durchgereicht. close() und das
+    Verlassen des with-Blocks geben die Verbindung an den Pool zurück, statt sie
+    zu schließen.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise mysql.connector.InterfaceError("Verbindung wurde bereits an den Pool zurückgegeben")
+        return getattr(raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw)
+
+
+class ConnectionPool:
+    """
+    Thread-sicherer Pool wiederverwendbarer MySQL-Verbindungen.
+
+    - begrenzte Größe (blockiert bis ``timeout`` wenn alle Verbindungen ausgeliehen sind)
+    - Pre-Ping beim Ausleihen, defekte Verbindungen werden ersetzt
+    - Neuverbindung mit exponentiellem Backoff
+    - Zähler für Ausleihen, Wartevorgänge und neue Verbindungen
+    """
+
+    def __init__(self, connect_fn, size=5, timeout=10.0, retries=3, backoff=0.5, pre_ping=True):
+        self._connect_fn = connect_fn
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.retries = max(1, int(retries))
+        self.backoff = float(backoff)
+        self.pre_ping = bool(pre_ping)
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "connect_failures": 0,
+            "reconnects": 0,
+            "discarded": 0,
+            "in_use": 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _new_raw(self):
+        """Baut eine neue Verbindung auf, mit exponentiellem Backoff bei Fehlern."""
+        last_exc = None
+        for attempt in range(self.retries):
+            try:
+                raw = self._connect_fn()
+                self._count("connects")
+                return raw
+            except mysql.connector.Error as exc:
+                last_exc = exc
+                self._count("connect_failures")
+                if attempt + 1 < self.retries:
+                    time.sleep(self.backoff * (2 ** attempt))
+        raise last_exc
+
+    def _discard(self, raw):
+        self._count("discarded")
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def connection(self):
+        """Leiht eine Verbindung aus; Rückgabe über close() oder den with-Block."""
+        if not self._slots.acquire(blocking=False):
+            self._count("waits")
+            started = time.monotonic()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            self._count("wait_time", time.monotonic() - started)
+            if not acquired:
+                self._count("timeouts")
+                raise PoolTimeoutError(
+                    f"Keine freie DB-Verbindung nach {self.timeout:.0f}s (Poolgröße {self.size})"
+                )
+
+        try:
+            raw = None
+            while raw is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    raw = self._new_raw()
+                    break
+                if not self.pre_ping or self._is_alive(candidate):
+                    raw = candidate
+                else:
+                    self._count("reconnects")
+                    self._discard(candidate)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+        return PooledConnection(self, raw)
+
+    def _release(self, raw):
+        """Setzt die Verbindung zurück und legt sie wieder in den Pool."""
+        try:
+            if raw.unread_result:
+                raw.consume_results()
+            if raw.in_transaction:
+                raw.rollback()
+            self._idle.put(raw)
+        except Exception:
+            self._discard(raw)
+        finally:
+            self._count("in_use", -1)
+            self._slots.release()
+
+    def stats(self):
+        """Momentaufnahme der Pool-Zähler."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["size"] = self.size
+        snapshot["idle"] = self._idle.qsize()
+        snapshot["avg_wait_ms"] = (
+            snapshot["wait_time"] / snapshot["waits"] * 1000 if snapshot["waits"] else 0.0
+        )
+        return snapshot
+
+    def close_idle(self):
+        """Schließt alle aktuell ungenutzten Verbindungen."""
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Gibt den prozessweiten Verbindungspool zurück (wird beim ersten Zugriff erstellt)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(connect, **load_pool_config())
+    return _pool
+
+
+def get_connection():
+    """Leiht eine DB-Verbindung aus dem Pool aus (Rückgabe per close() bzw. with-Block)."""
+    return get_pool().connection()
+
+
+def get_pool_stats():
+    """Zähler des Verbindungspools, oder None, falls noch keine Verbindung angefordert wurde."""
+    return _pool.stats() if _pool is not None else None
@@ -0,0 +1,76 @@
+"""
+Registry der bekannten Bank-CSV-Formate (Tabelle bank_formats, Migration 009).
+
+Nach jedem erfolgreichen Import wird das Format der Datei – Encoding,
+Trennzeichen, Header-Zeile, Spalten-Mapping, Datums- und Betragsformat –
+unter dem Fingerabdruck der Header-Zeile gespeichert. Beim nächsten Import
+desselben Formats übernimmt BankCSVParser diese Angaben direkt.
+"""
+import json
+
+
+def load_formats(cur):
+    """
+    Lädt alle bekannten Formate.
+
+    Returns:
+        Dict {Fingerabdruck: Format} im Aufbau von BankCSVParser.format_info
+    """
+    cur.execute(
+        """
+        SELECT fingerprint, encoding, delimiter, header_row, columns_json,
+               column_mapping, date_format, amount_format
+        FROM bank_formats
+        """
+    )
+    formats = {}
+    for fingerprint, encoding, delimiter, header_row, columns, mapping, date_format, amount_format in cur.fetchall():
+        formats[fingerprint] = {
+            "fingerprint": fingerprint,
+            "encoding": encoding,
+            "delimiter": delimiter,
+            "header_row": int(header_row),
+            "columns": json.loads(columns),
+            "column_mapping": json.loads(mapping),
+            "date_format": date_format,
+            "amount_format": amount_format,
+        }
+    return formats
+
+
+def save_format(cur, fmt):
+    """
+    Speichert ein Format nach einem erfolgreichen Import (ohne Commit).
+
+    Bereits bekannte Formate behalten Encoding, Header und Spalten; ergänzt
+    werden nur bisher unbekannte Datums- und Betragsformate. Ein gespeichertes
+    Datumsformat wird nur ersetzt, wenn es beim Import neu bestimmt wurde
+    (replace_date_format); ist das neue Format nicht verlässlich, wird es
+    gelöscht und beim nächsten Import erneut erkannt.
+    """
+    if not fmt or not fmt.get("fingerprint"):
+        return
+    cur.execute(
+        """
+        INSERT INTO bank_formats
+            (fingerprint, encoding, delimiter, header_row, columns_json, column_mapping,
+             date_format, amount_format, imports, last_used_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1, NOW())
+        ON DUPLICATE KEY UPDATE
+            date_format = IF(%s, VALUES(date_format), COALESCE(date_format, VALUES(date_format))),
+            amount_format = COALESCE(amount_format, VALUES(amount_format)),
+            imports = imports + 1,
+            last_used_at = NOW()
+        """,
+        (
+            fmt["fingerprint"],
+            fmt["encoding"],
+            fmt["delimiter"],
+            fmt["header_row"],
+            json.dumps(fmt["columns"], ensure_ascii=False),
+            json.dumps(fmt["column_mapping"], ensure_ascii=False),
+            fmt.get("date_format"),
+            fmt.get("amount_format"),
+            bool(fmt.get("replace_date_format")),
+        ),
+    )
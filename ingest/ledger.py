@@ -0,0 +1,120 @@
+"""
+Import-Ledger (Tabelle import_ledger, Migration 013).
+
+Für jede importierte CSV-Datei werden SHA-256 des Inhalts, Format,
+Zeilenzahl, Konto und Zeitraum der Buchungen gespeichert – in derselben
+Transaktion wie die Buchungen selbst.
+
+Eine Datei mit bereits bekanntem Hash wird gar nicht erst eingelesen.
+Überlappende Dateien (anderer Inhalt) laufen vollständig über die
+Duplikatsprüfung: auch innerhalb eines bereits importierten Zeitraums
+können nachträglich gebuchte Umsätze neu sein.
+"""
+import hashlib
+import os
+
+# Blockgröße beim Hashen der Dateien (Bytes)
+HASH_CHUNK = 1024 * 1024
+
+
+def stream_sha256(stream):
+    """SHA-256 (hex) eines Binär-Streams ab der aktuellen Position bis zum Ende."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_sha256(path):
+    """SHA-256 (hex) des Dateiinhalts."""
+    with open(path, "rb") as f:
+        return stream_sha256(f)
+
+
+def find_imported(cur, sha256):
+    """Ledger-Eintrag einer bereits importierten Datei als Dict oder None."""
+    cur.execute(
+        """
+        SELECT filename, imported, created_at
+        FROM import_ledger
+        WHERE sha256 = %s
+        """,
+        (sha256,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return {"filename": row[0], "imported": int(row[1]), "created_at": row[2]}
+
+
+class FileSpan:
+    """Konten und Zeitraum der Buchungszeilen einer Datei."""
+
+    def __init__(self):
+        self.kontos = set()
+        self.date_from = None
+        self.date_to = None
+
+    def observe(self, rows):
+        for row in rows:
+            datum, konto = row[0], row[6]
+            self.kontos.add(konto or "")
+            if self.date_from is None or datum < self.date_from:
+                self.date_from = datum
+            if self.date_to is None or datum > self.date_to:
+                self.date_to = datum
+
+    @property
+    def konto(self):
+        """Konto der Datei oder None, wenn sie keine oder mehrere Konten enthält."""
+        if len(self.kontos) != 1:
+            return None
+        return next(iter(self.kontos)) or None
+
+
+class ImportLedger:
+    """Ledger-Zustand eines Importlaufs: die Hashes der Dateien dieses Laufs."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def check(self, cur, path):
+        """
+        Hasht die Datei und sucht sie im Ledger.
+
+        Returns:
+            Ledger-Eintrag (Dict) einer identischen, bereits importierten Datei
+            oder None
+        """
+        sha256 = file_sha256(path)
+        self.hashes[path] = sha256
+        return find_imported(cur, sha256)
+
+    def record(self, cur, path, prepared_file, file_result, span):
+        """Vermerkt eine importierte Datei (ohne Commit)."""
+        sha256 = self.hashes.get(path) or file_sha256(path)
+        fmt = prepared_file.info.get("format") or {}
+        konto = span.konto
+        cur.execute(
+            """
+            INSERT INTO import_ledger
+                (sha256, filename, format_fingerprint, row_count, imported, duplicates,
+                 konto, date_from, date_to)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                imported = imported + VALUES(imported),
+                duplicates = VALUES(duplicates),
+                created_at = NOW()
+            """,
+            (
+                sha256,
+                os.path.basename(prepared_file.path)[:255],
+                fmt.get("fingerprint"),
+                prepared_file.row_count,
+                file_result.imported,
+                file_result.duplicates,
+                konto,
+                span.date_from,
+                span.date_to,
+            ),
+        )
@@ -0,0 +1,520 @@
+"""
+Import-Pipeline für Bank-CSV-Dateien und Kontoauszüge (CAMT.053, MT940).
+
+    from ingest.pipeline import run_import
+    result = run_import(["import/konto.csv"])
+    print(result.imported, result.timings)
+
+Jede Datei wird in einer eigenen Transaktion importiert; die Stufen (Parsen,
+Extraktion, Aufbereitung, Kategorisierung, Duplikatsprüfung, INSERT,
+Aggregate, Commit) werden je Datei einzeln gemessen. Zusätzlich werden die
+SQL-Anweisungen (Roundtrips) gezählt und verworfene Zeilen nach Grund
+erfasst; der Laufbericht wird in import_runs gespeichert (ingest/telemetry.py).
+
+Im eigenen Prozess wird jede Datei in einem Durchlauf blockweise gelesen und
+geschrieben (options.chunk_size Zeilen je Block). Mehrere Dateien werden bei
+workers > 1 in einem Prozess-Pool geparst und kategorisiert; Duplikatsprüfung
+und Schreiben bleiben im aufrufenden Prozess.
+
+CAMT.053- und MT940-Auszüge (utils/statement_parser.py) durchlaufen dieselben
+Stufen wie CSV-Dateien; die Formaterkennung entfällt.
+
+Bereits importierte Dateien (gleicher Inhalt) überspringt der Import-Ledger
+(ingest/ledger.py).
+"""
+import multiprocessing
+import os
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from db import get_connection
+from utils.helpers import load_config
+from utils.csv_parser import DEFAULT_CHUNK_SIZE, EngineRestart
+from utils.statement_parser import STATEMENT_EXTENSIONS, create_parser
+from services.bulk_insert import BuchungBatchWriter, DEFAULT_BATCH_SIZE
+from services.categorizer import KeywordCategorizer, load_keywords
+from ingest.formats import load_formats, save_format
+from ingest.ledger import FileSpan, ImportLedger
+from ingest.result import FileResult, ImportOptions, ImportResult, PreparedFile
+from ingest.telemetry import CountingCursor, record_run
+from ingest.transform import booking_rows, prepare_frame
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_DIR = os.path.join(BASE_DIR, "import")
+
+# Verhindert parallele Importe (Timer und Weboberfläche)
+IMPORT_LOCK = "haushaltsbuch_import"
+IMPORT_LOCK_TIMEOUT = 600
+
+# Importierbare Dateien im Import-Ordner
+IMPORT_EXTENSIONS = (".csv",) + STATEMENT_EXTENSIONS
+
+# Parser für das erneute Lesen nach einem EngineRestart
+PYTHON_ONLY = ("python",)
+
+# Prozesse für das parallele Aufbereiten mehrerer Dateien (0 = alle CPU-Kerne)
+DEFAULT_WORKERS = 0
+
+
+def load_import_options(**overrides):
+    """ImportOptions mit den Werten aus config.json ("IMPORT")."""
+    import_config = load_config().get("IMPORT", {})
+    workers = int(import_config.get("workers", DEFAULT_WORKERS))
+    options = ImportOptions(
+        batch_size=int(import_config.get("batch_size", DEFAULT_BATCH_SIZE)),
+        chunk_size=int(import_config.get("chunk_size", DEFAULT_CHUNK_SIZE)),
+        # 0 = Anzahl der CPU-Kerne
+        workers=workers if workers > 0 else (os.cpu_count() or 1),
+        use_ledger=bool(import_config.get("ledger", True)),
+    )
+    for name, value in overrides.items():
+        setattr(options, name, value)
+    return options
+
+
+def list_import_files(directory=IMPORT_DIR):
+    """Alle CSV-Dateien und Kontoauszüge im Import-Ordner (sortiert)."""
+    os.makedirs(directory, exist_ok=True)
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMPORT_EXTENSIONS)
+    ]
+
+
+def stream_file(csv_path, categorizer, chunk_size=DEFAULT_CHUNK_SIZE, formats=None, engines=None):
+    """
+    Liest eine CSV-Datei bzw. einen Kontoauszug blockweise in einem Durchlauf
+    (ohne Datenbankzugriff).
+
+    Format und Spalten werden sofort aus dem Dateianfang bestimmt (bei einem
+    bekannten Format aus formats ohne Erkennung); die Buchungen liefert der
+    Generator erst beim Durchlaufen.
+
+    Args:
+        engines: optional die zu versuchenden pandas-Parser (CSV), z. B.
+            ("python",) nach einem EngineRestart
+
+    Returns:
+        Tuple: (PreparedFile mit Format, Zählern und Laufzeiten,
+        Generator mit Listen von Buchungszeilen je Block)
+    """
+    prepared_file = PreparedFile(path=csv_path)
+
+    with prepared_file.stage("parse"):
+        # CAMT.053/MT940 nach Dateiendung, sonst robuster CSV-Parser
+        parser = create_parser(csv_path, formats)
+        if engines:
+            parser.engines = engines
+        eigene_iban, column_mapping = parser.sniff()
+    prepared_file.info = {
+        "statement_format": getattr(parser, "statement_format", None),
+        "known_format": parser.known_format,
+        "encoding": parser.encoding,
+        "delimiter": parser.delimiter,
+        "header_row": parser.header_row,
+        "iban": eigene_iban,
+        "column_mapping": column_mapping,
+    }
+
+    def chunks():
+        reader = parser.iter_chunks(chunk_size)
+        while True:
+            with prepared_file.stage("parse"):
+                df = next(reader, None)
+            if df is None:
+                # Verwendeter Parser steht erst nach dem letzten Block fest
+                prepared_file.info["engine"] = parser.engine
+                prepared_file.info["fallback_reason"] = parser.fallback_reason
+                prepared_file.info["date_rejected"] = parser.date_rejected
+                prepared_file.info["date_format"] = parser.date_format
+                # Für die Format-Registry (inkl. erkanntem Datums-/Betragsformat)
+                prepared_file.info["format"] = parser.format_info()
+                return
+
+            with prepared_file.stage("extract"):
+                # Daten spaltenweise extrahieren
+                frame = parser.extract_frame(df)
+            prepared_file.row_count += len(frame)
+
+            with prepared_file.stage("transform"):
+                prepared, rejected = prepare_frame(frame, eigene_iban)
+            # Zeilen ohne erkanntes Datum können nicht importiert werden
+            prepared_file.rejected += rejected
+
+            with prepared_file.stage("categorize"):
+                kategorien = categorizer.categorize_all(prepared['beschreibung'].tolist())
+                rows = list(booking_rows(prepared, kategorien))
+            yield rows
+
+    return prepared_file, chunks()
+
+
+def prepare_file(csv_path, categorizer, chunk_size=DEFAULT_CHUNK_SIZE, formats=None):
+    """
+    Parst, extrahiert und kategorisiert eine CSV-Datei (ohne Datenbankzugriff).
+
+    Returns:
+        PreparedFile mit den Buchungszeilen
+    """
+    prepared_file, chunks = stream_file(csv_path, categorizer, chunk_size, formats)
+    try:
+        for rows in chunks:
+            prepared_file.rows.extend(rows)
+    except EngineRestart as e:
+        # Noch nichts geschrieben: vollständig mit dem Python-Parser neu lesen
+        prepared_file, chunks = stream_file(csv_path, categorizer, chunk_size, formats, PYTHON_ONLY)
+        for rows in chunks:
+            prepared_file.rows.extend(rows)
+        prepared_file.info["fallback_reason"] = str(e)
+    return prepared_file
+
+
+def write_file(cursor, prepared_file, options, file_result, chunks=None, ledger=None):
+    """
+    Schreibt eine aufbereitete Datei über den übergebenen Cursor (ohne Commit).
+
+    Args:
+        chunks: optionale Blöcke von Buchungszeilen (aus stream_file); ohne
+            Angabe werden prepared_file.rows geschrieben
+        ledger: optional ImportLedger – die Datei wird im Ledger vermerkt,
+            sofern keine Zeile am Datumsformat oder beim Einfügen scheiterte
+            (Zeilen ohne Datum wie Fußzeilen zählen nicht)
+    """
+    # Duplikatsprüfung und INSERT erfolgen blockweise
+    writer = BuchungBatchWriter(cursor, batch_size=options.batch_size)
+    span = FileSpan()
+    for rows in (chunks if chunks is not None else [prepared_file.rows]):
+        if ledger is not None:
+            span.observe(rows)
+        writer.add_many(rows)
+    writer.finish()
+    # Format für den nächsten Import merken
+    save_format(cursor, prepared_file.info.get("format"))
+
+    file_result.rows = prepared_file.row_count
+    file_result.errors += prepared_file.rejected
+    file_result.engine = prepared_file.info.get("engine")
+    file_result.date_rejected = prepared_file.info.get("date_rejected", 0)
+    for name, seconds in prepared_file.timings.items():
+        file_result.add_timing(name, seconds)
+    for name, seconds in writer.timings.items():
+        file_result.add_timing(name, seconds)
+
+    file_result.imported = writer.inserted
+    file_result.duplicates = writer.duplicates
+    file_result.errors += writer.errors
+    # Zeilen mit abweichendem Datumsformat sind in prepared_file.rejected enthalten
+    file_result.rejected = {
+        "no_date": max(0, prepared_file.rejected - file_result.date_rejected),
+        "date_format": file_result.date_rejected,
+        "insert_error": writer.errors,
+    }
+
+    # Nur vollständig importierte Dateien vermerken: sonst würde die Datei
+    # dauerhaft abgelehnt, obwohl Buchungen fehlen
+    complete = not file_result.rejected["date_format"] and not file_result.rejected["insert_error"]
+    prepared_file.info["recorded"] = ledger is not None and complete
+    if prepared_file.info["recorded"]:
+        ledger.record(cursor, prepared_file.path, prepared_file, file_result, span)
+    return file_result
+
+
+def import_file(cursor, csv_path, categorizer, options, file_result=None, formats=None, ledger=None):
+    """
+    Importiert eine CSV-Datei blockweise über den übergebenen Cursor (ohne Commit).
+
+    Returns:
+        FileResult mit Zählern und Laufzeiten
+    """
+    file_result = file_result or FileResult(path=csv_path)
+    prepared_file, chunks = stream_file(csv_path, categorizer, options.chunk_size, formats)
+    _log_format(prepared_file, options)
+    return write_file(cursor, prepared_file, options, file_result, chunks, ledger)
+
+
+def _logger(options):
+    return print if options.verbose else (lambda *args, **kwargs: None)
+
+
+def _log_format(prepared_file, options):
+    log = _logger(options)
+    info = prepared_file.info
+    if info.get("statement_format"):
+        log(f"   ✅ Kontoauszug {info['statement_format']}")
+        if info["iban"]:
+            log(f"      - IBAN: {info['iban']}")
+        return
+    if info.get("known_format"):
+        log(f"   ✅ Bekanntes Format:")
+    else:
+        log(f"   ✅ Format erkannt:")
+    log(f"      - Encoding: {info['encoding']}")
+    log(f"      - Trennzeichen: {info['delimiter']}")
+    log(f"      - Header-Zeile: {info['header_row'] + 1}")
+    if info["iban"]:
+        log(f"      - IBAN: {info['iban']}")
+    log(f"      - Spalten-Mapping: {info['column_mapping']}")
+
+
+def _write_path(conn, cursor, csv_path, prepare, options, ledger=None):
+    """
+    Importiert eine Datei in einer eigenen Transaktion.
+
+    Args:
+        prepare: Funktion, die (PreparedFile, Blöcke oder None) liefert (oder
+            eine Ausnahme wirft); optional mit den zu verwendenden Parsern
+    """
+    log = _logger(options)
+    name = os.path.basename(csv_path)
+    log(f"📄 Lese {'Kontoauszug' if name.lower().endswith(STATEMENT_EXTENSIONS) else 'CSV'}: {name}")
+    file_result = FileResult(path=csv_path)
+    round_trips = cursor.round_trips
+
+    try:
+        try:
+            prepared_file, chunks = prepare()
+            _log_format(prepared_file, options)
+            write_file(cursor, prepared_file, options, file_result, chunks, ledger)
+        except EngineRestart as e:
+            # Bereits geschriebene Blöcke verwerfen, Datei mit dem Python-Parser neu lesen
+            conn.rollback()
+            log(f"   ⚠️  {e} – lese die Datei erneut mit dem Python-Parser")
+            file_result = FileResult(path=csv_path)
+            prepared_file, chunks = prepare(PYTHON_ONLY)
+            write_file(cursor, prepared_file, options, file_result, chunks, ledger)
+            prepared_file.info["fallback_reason"] = str(e)
+        with file_result.stage("commit"):
+            conn.commit()
+        # Commit zählt als eigener Roundtrip
+        file_result.round_trips = cursor.round_trips - round_trips + 1
+        if file_result.engine == "python":
+            log(f"   ⚠️  Python-Parser verwendet ({prepared_file.info.get('fallback_reason')})")
+        if file_result.date_rejected:
+            log(
+                f"   ⚠️  {file_result.date_rejected} Zeilen passen nicht zum Datumsformat "
+                f"{prepared_file.info['date_format']}"
+            )
+        log(
+            f"🎉 {file_result.imported} Buchungen importiert "
+            f"({file_result.rows_per_second:.0f} Zeilen/s, {file_result.round_trips} DB-Roundtrips)"
+        )
+        if file_result.errors > 0:
+            log(f"⚠️  {file_result.errors} Zeilen konnten nicht importiert werden")
+            if ledger is not None and not prepared_file.info["recorded"]:
+                log("   ↩️  Nicht im Import-Ledger vermerkt, die Datei kann erneut importiert werden")
+
+        if options.delete_files:
+            # Datei nach erfolgreichem Import löschen
+            os.remove(csv_path)
+            log(f"🗑️  {name} wurde gelöscht")
+
+    except Exception as e:
+        # Bereits geschriebene Blöcke dieser Datei verwerfen
+        conn.rollback()
+        file_result.failed = True
+        file_result.message = str(e)
+        file_result.round_trips = cursor.round_trips - round_trips
+        log(f"❌ Fehler beim Verarbeiten von {name}: {e}")
+        log(f"   Details: {traceback.format_exc()}")
+        # Datei nicht löschen bei Fehler, damit sie manuell geprüft werden kann
+
+    return file_result
+
+
+# =============================
+# Paralleles Aufbereiten
+# =============================
+_worker_categorizer = None
+_worker_formats = None
+
+
+def _init_worker(keywords, formats):
+    global _worker_categorizer, _worker_formats
+    _worker_categorizer = KeywordCategorizer(keywords)
+    _worker_formats = formats
+
+
+def _prepare_in_worker(csv_path, chunk_size):
+    return prepare_file(csv_path, _worker_categorizer, chunk_size, _worker_formats)
+
+
+def _report(options, done, total, csv_path):
+    if options.progress:
+        options.progress(int(done * 100 / total), f"Lese {os.path.basename(csv_path)}")
+
+
+def _skip_imported(cursor, paths, ledger, options, result):
+    """
+    Überspringt Dateien, die bereits importiert wurden (gleicher SHA-256 im
+    Ledger oder identisch mit einer früheren Datei dieses Laufs).
+
+    Returns:
+        Liste der noch zu importierenden Dateien
+    """
+    log = _logger(options)
+    remaining = []
+    seen = {}
+    for csv_path in paths:
+        name = os.path.basename(csv_path)
+        entry = ledger.check(cursor, csv_path)
+        sha256 = ledger.hashes[csv_path]
+        if entry is None and sha256 not in seen:
+            seen[sha256] = name
+            remaining.append(csv_path)
+            continue
+
+        if entry is not None:
+            message = f"Bereits importiert am {entry['created_at']:%d.%m.%Y %H:%M} ({entry['filename']})"
+        else:
+            message = f"Identisch mit {seen[sha256]}"
+        log(f"⏭️  {name}: {message}")
+        result.files.append(FileResult(path=csv_path, already_imported=True, message=message))
+        if options.delete_files:
+            os.remove(csv_path)
+            log(f"🗑️  {name} wurde gelöscht")
+    return remaining
+
+
+def _import_serial(conn, cursor, paths, categorizer, formats, options, result, ledger=None):
+    for index, csv_path in enumerate(paths):
+        _report(options, index, len(paths), csv_path)
+        # Blockweise lesen und schreiben: begrenzter Speicherbedarf auch bei großen Dateien
+        result.files.append(
+            _write_path(
+                conn, cursor, csv_path,
+                lambda engines=None: stream_file(csv_path, categorizer, options.chunk_size, formats, engines),
+                options,
+                ledger,
+            )
+        )
+
+
+def _import_parallel(conn, cursor, paths, keywords, formats, options, result, ledger=None):
+    """
+    Parst und kategorisiert die Dateien in einem Prozess-Pool; geschrieben wird
+    nacheinander im eigenen Prozess (eine Transaktion je Datei). Es werden
+    höchstens workers + 1 Dateien gleichzeitig aufbereitet bzw. gepuffert.
+    """
+    workers = min(options.workers, len(paths))
+    # spawn: sicher auch aus dem (mehrfädigen) Webprozess heraus
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(keywords, formats),
+    ) as executor:
+        queue = iter(paths)
+        pending = deque()
+        for csv_path in islice(queue, workers + 1):
+            pending.append((csv_path, executor.submit(_prepare_in_worker, csv_path, options.chunk_size)))
+
+        # Geschrieben wird in der Reihenfolge der Dateien – wie beim seriellen Import
+        for index in range(len(paths)):
+            csv_path, future = pending.popleft()
+            _report(options, index, len(paths), csv_path)
+            result.files.append(
+                _write_path(conn, cursor, csv_path, lambda engines=None: (future.result(), None), options, ledger)
+            )
+            # Nächste Datei erst nach dem Schreiben einreihen (begrenzter Puffer)
+            for next_path in islice(queue, 1):
+                pending.append((next_path, executor.submit(_prepare_in_worker, next_path, options.chunk_size)))
+
+
+def _run(conn, paths, options):
+    result = ImportResult(source=options.source)
+    # Zählt die SQL-Anweisungen des Laufs (Telemetrie)
+    cursor = CountingCursor(conn.cursor())
+    try:
+        if options.use_lock:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (IMPORT_LOCK, IMPORT_LOCK_TIMEOUT))
+            if not cursor.fetchone()[0]:
+                raise RuntimeError("Ein anderer Import läuft bereits")
+        try:
+            # Kategorien aus keyword_category-Tabelle laden
+            keywords = load_keywords(cursor)
+            # Bekannte Bankformate (Erkennung entfällt)
+            formats = load_formats(cursor)
+            # Bereits importierte Dateien (Import-Ledger)
+            ledger = None
+            if options.use_ledger:
+                ledger = ImportLedger()
+                paths = _skip_imported(cursor, paths, ledger, options, result)
+            if options.workers > 1 and len(paths) > 1:
+                _import_parallel(conn, cursor, paths, keywords, formats, options, result, ledger)
+            else:
+                _import_serial(
+                    conn, cursor, paths, KeywordCategorizer(keywords), formats, options, result, ledger
+                )
+        finally:
+            if options.use_lock:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (IMPORT_LOCK,))
+                cursor.fetchone()
+    finally:
+        result.round_trips = cursor.round_trips
+        cursor.close()
+    return result
+
+
+def _record_run(conn, result, options):
+    """Speichert den Laufbericht; ein Fehler dabei lässt den Import nicht scheitern."""
+    cur = conn.cursor()
+    try:
+        result.run_id = record_run(cur, result)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        _logger(options)(f"⚠️  Laufbericht konnte nicht gespeichert werden: {e}")
+    finally:
+        cur.close()
+
+
+def _run_and_record(conn, paths, options):
+    started_at = datetime.now()
+    started = time.perf_counter()
+    result = _run(conn, paths, options)
+    result.started_at = started_at
+    result.total_seconds = time.perf_counter() - started
+    if options.record_run:
+        _record_run(conn, result, options)
+    return result
+
+
+def run_import(paths, connection=None, options=None):
+    """
+    Importiert die angegebenen CSV-Dateien.
+
+    Args:
+        paths: Pfade der CSV-Dateien
+        connection: bestehende DB-Verbindung (wird nicht geschlossen); ohne
+            Angabe wird eine Verbindung aus dem Pool verwendet
+        options: ImportOptions (Standard: Werte aus config.json)
+
+    Returns:
+        ImportResult mit Zählern, Fehlern, Laufzeiten je Datei und Stufe und
+        der ID des gespeicherten Laufberichts (run_id)
+    """
+    options = options or load_import_options()
+    paths = list(paths)
+
+    if connection is not None:
+        result = _run_and_record(connection, paths, options)
+    else:
+        with get_connection() as conn:
+            result = _run_and_record(conn, paths, options)
+
+    if options.verbose:
+        print("✅ Alle CSVs verarbeitet.")
+    return result
+
+
+def import_directory(directory=IMPORT_DIR, connection=None, options=None):
+    """Importiert alle CSV-Dateien des Import-Ordners und löscht erfolgreich importierte."""
+    options = options or load_import_options(delete_files=True)
+    return run_import(list_import_files(directory), connection=connection, options=options)
@@ -0,0 +1,213 @@
+"""Optionen und Ergebnisse der Import-Pipeline."""
+import time
+from datetime import datetime
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional
+
+from services.bulk_insert import DEFAULT_BATCH_SIZE
+from utils.csv_parser import DEFAULT_CHUNK_SIZE
+
+
+# Reihenfolge der Stufen je Datei (für Ausgabe und Auswertung)
+STAGES = ("parse", "extract", "transform", "categorize", "dedupe", "insert", "rollup", "commit")
+
+# Gründe für verworfene Zeilen (FileResult.rejected)
+REJECT_REASONS = ("no_date", "date_format", "insert_error")
+
+
+def rows_per_second(rows: int, seconds: float) -> float:
+    """Durchsatz in Zeilen pro Sekunde (0 ohne messbare Laufzeit)."""
+    return round(rows / seconds, 1) if seconds > 0 else 0.0
+
+
+@dataclass
+class ImportOptions:
+    """Einstellungen für run_import."""
+    batch_size: int = DEFAULT_BATCH_SIZE
+    # Zeilen je eingelesenem CSV-Block
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    # Erfolgreich importierte Dateien löschen (Ordner import/)
+    delete_files: bool = False
+    # Parallele Importe über eine benannte Datenbanksperre verhindern
+    use_lock: bool = True
+    # Ausgaben wie bisher auf der Konsole
+    verbose: bool = True
+    # Optionale Rückmeldung progress(prozent, nachricht)
+    progress: Optional[Callable[[int, str], None]] = None
+    # Anzahl Prozesse für Parsen/Kategorisieren (1 = nacheinander im eigenen Prozess)
+    workers: int = 1
+    # Import-Ledger: bekannte Dateien und bereits importierte Zeiträume überspringen
+    use_ledger: bool = True
+    # Laufbericht in import_runs speichern; source kennzeichnet den Aufrufer
+    record_run: bool = True
+    source: str = "api"
+
+
+class _StageTimer:
+    """Laufzeitmessung je Stufe (erwartet ein Attribut timings)."""
+
+    @contextmanager
+    def stage(self, name: str):
+        """Misst die Laufzeit einer Stufe (mehrfacher Aufruf wird aufsummiert)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - started)
+
+    def add_timing(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+@dataclass
+class FileResult(_StageTimer):
+    """Ergebnis einer importierten Datei."""
+    path: str
+    rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    failed: bool = False
+    message: Optional[str] = None
+    # Verwendeter CSV-Parser ("c" oder "python" als Fallback)
+    engine: Optional[str] = None
+    # Zeilen, deren Datum nicht zum erkannten Datumsformat passt (in errors enthalten)
+    date_rejected: int = 0
+    # Identische Datei wurde bereits importiert (nicht eingelesen)
+    already_imported: bool = False
+    # Verworfene Zeilen je Grund (REJECT_REASONS, Summe = errors)
+    rejected: Dict[str, int] = field(default_factory=dict)
+    # SQL-Anweisungen an die Datenbank beim Schreiben dieser Datei
+    round_trips: int = 0
+    # Laufzeit je Stufe in Sekunden
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float:
+        return rows_per_second(self.rows, sum(self.timings.values()))
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["rows_per_second"] = self.rows_per_second
+        return data
+
+
+@dataclass
+class PreparedFile(_StageTimer):
+    """
+    Aufbereitete Datei (Ergebnis von Parsen, Extraktion und Kategorisierung),
+    bereit zum Schreiben. Enthält keine Datenbankobjekte und kann daher aus
+    einem Worker-Prozess zurückgegeben werden.
+    """
+    path: str
+    # Buchungszeilen in der Reihenfolge von BuchungBatchWriter.add (leer beim
+    # blockweisen Import direkt in die Datenbank)
+    rows: List[tuple] = field(default_factory=list)
+    row_count: int = 0
+    rejected: int = 0
+    # Erkanntes Format (Encoding, Trennzeichen, Header-Zeile, IBAN, Spalten)
+    info: Dict = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class ImportResult:
+    """Gesamtergebnis eines Imports."""
+    files: List[FileResult] = field(default_factory=list)
+    total_seconds: float = 0.0
+    # Startzeitpunkt (datetime) und Aufrufer des Laufs
+    started_at: Optional[datetime] = None
+    source: Optional[str] = None
+    # SQL-Anweisungen des gesamten Laufs (inkl. Sperre, Stammdaten, Ledger)
+    round_trips: int = 0
+    # ID des gespeicherten Laufberichts (import_runs)
+    run_id: Optional[int] = None
+
+    @property
+    def rows(self) -> int:
+        return sum(f.rows for f in self.files)
+
+    @property
+    def imported(self) -> int:
+        return sum(f.imported for f in self.files)
+
+    @property
+    def duplicates(self) -> int:
+        return sum(f.duplicates for f in self.files)
+
+    @property
+    def errors(self) -> int:
+        return sum(f.errors for f in self.files)
+
+    @property
+    def skipped_files(self) -> List[str]:
+        """Dateien, die bereits importiert waren und nicht eingelesen wurden."""
+        return [f.path for f in self.files if f.already_imported]
+
+    @property
+    def failed_files(self) -> List[str]:
+        return [f.path for f in self.files if f.failed]
+
+    @property
+    def parser_fallbacks(self) -> int:
+        """Anzahl Dateien, die der C-Parser abgelehnt hat (Python-Parser verwendet)."""
+        return sum(1 for f in self.files if f.engine == "python")
+
+    @property
+    def date_rejected(self) -> int:
+        return sum(f.date_rejected for f in self.files)
+
+    @property
+    def parsed_files(self) -> int:
+        return sum(1 for f in self.files if f.engine is not None)
+
+    @property
+    def rejected(self) -> Dict[str, int]:
+        """Verworfene Zeilen je Grund über alle Dateien."""
+        totals = {}
+        for file_result in self.files:
+            for reason, count in file_result.rejected.items():
+                totals[reason] = totals.get(reason, 0) + count
+        return totals
+
+    @property
+    def rows_per_second(self) -> float:
+        return rows_per_second(self.rows, self.total_seconds)
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Laufzeit je Stufe über alle Dateien."""
+        totals = {}
+        for file_result in self.files:
+            for name, seconds in file_result.timings.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def stage_rows_per_second(self) -> Dict[str, float]:
+        """Durchsatz je Stufe (gelesene Zeilen / Laufzeit der Stufe)."""
+        rows = self.rows
+        return {name: rows_per_second(rows, seconds) for name, seconds in self.timings.items()}
+
+    def to_dict(self) -> Dict:
+        """Ergebnis als JSON-fähiges Dict (z.B. für Hintergrund-Jobs)."""
+        return {
+            "run_id": self.run_id,
+            "source": self.source,
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "rows": self.rows,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "failed_files": self.failed_files,
+            "skipped_files": self.skipped_files,
+            "parser_fallbacks": self.parser_fallbacks,
+            "date_rejected": self.date_rejected,
+            "rejected": self.rejected,
+            "round_trips": self.round_trips,
+            "total_seconds": round(self.total_seconds, 3),
+            "rows_per_second": self.rows_per_second,
+            "timings": {name: round(seconds, 3) for name, seconds in self.timings.items()},
+            "stage_rows_per_second": self.stage_rows_per_second(),
+            "files": [f.to_dict() for f in self.files],
+        }
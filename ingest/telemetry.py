@@ -0,0 +1,119 @@
+"""
+Telemetrie des CSV-Imports.
+
+CountingCursor zählt die SQL-Anweisungen (Roundtrips) eines Imports; nach
+jedem Lauf speichert record_run den Laufbericht (Zähler, Laufzeit je Stufe,
+Durchsatz, verworfene Zeilen je Grund, Roundtrips) in der Tabelle
+import_runs (Migration 014). Die Upload-Seite zeigt die letzten Läufe an,
+/import_runs.json liefert sie zum Vergleich zwischen Versionen.
+"""
+import json
+
+
+# Anzahl Läufe auf der Upload-Seite
+RECENT_RUNS = 10
+
+
+class CountingCursor:
+    """
+    Reicht alle Aufrufe an den Cursor weiter und zählt execute/executemany
+    (executemany mit mehrzeiligem INSERT ist ein Roundtrip).
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.round_trips = 0
+
+    def execute(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+def record_run(cur, result):
+    """
+    Speichert den Laufbericht eines Imports (ohne Commit).
+
+    Returns:
+        ID des Eintrags in import_runs
+    """
+    report = result.to_dict()
+    cur.execute(
+        """
+        INSERT INTO import_runs
+            (source, started_at, total_seconds, files, failed_files, rows_read, imported,
+             duplicates, errors, rows_per_second, round_trips, report)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        (
+            (result.source or "api")[:20],
+            result.started_at,
+            round(result.total_seconds, 3),
+            len(result.files),
+            len(result.failed_files),
+            result.rows,
+            result.imported,
+            result.duplicates,
+            result.errors,
+            result.rows_per_second,
+            result.round_trips,
+            json.dumps(report, default=str),
+        ),
+    )
+    return cur.lastrowid
+
+
+_RUN_COLUMNS = """
+    id, source, started_at, total_seconds, files, failed_files, rows_read, imported,
+    duplicates, errors, rows_per_second, round_trips, report
+"""
+
+
+def _run_to_dict(row):
+    try:
+        report = json.loads(row[12]) if row[12] else {}
+    except ValueError:
+        report = {}
+    return {
+        "id": row[0],
+        "source": row[1],
+        "started_at": row[2].isoformat() if row[2] is not None else None,
+        "total_seconds": float(row[3]),
+        "files": int(row[4]),
+        "failed_files": int(row[5]),
+        "rows": int(row[6]),
+        "imported": int(row[7]),
+        "duplicates": int(row[8]),
+        "errors": int(row[9]),
+        "rows_per_second": float(row[10]),
+        "round_trips": int(row[11]),
+        "rejected": report.get("rejected", {}),
+        "timings": report.get("timings", {}),
+        "stage_rows_per_second": report.get("stage_rows_per_second", {}),
+        "report": report,
+    }
+
+
+def fetch_runs(cur, limit=RECENT_RUNS):
+    """Die letzten Importläufe (neueste zuerst) als Liste von Dicts."""
+    cur.execute(
+        f"SELECT {_RUN_COLUMNS} FROM import_runs ORDER BY id DESC LIMIT %s",
+        (int(limit),),
+    )
+    return [_run_to_dict(row) for row in cur.fetchall()]
+
+
+def fetch_run(cur, run_id):
+    """Ein Importlauf als Dict oder None, falls unbekannt."""
+    cur.execute(f"SELECT {_RUN_COLUMNS} FROM import_runs WHERE id = %s", (run_id,))
+    row = cur.fetchone()
+    return _run_to_dict(row) if row is not None else None
@@ -0,0 +1,60 @@
+"""Spaltenweise Aufbereitung der extrahierten CSV-Daten zu Buchungszeilen."""
+import pandas as pd
+
+
+def normalize_text_column(values):
+    """Vereinheitlicht Leerzeichen in einer Textspalte (pandas-NaN -> "")."""
+    text = values.fillna("").astype(str)
+    # pandas-NaN abfangen
+    text = text.where(text.str.strip().str.lower() != "nan", "")
+    return text.str.split().str.join(" ").astype(object)
+
+
+def parse_art_column(values):
+    """Art der Buchung: erstes Wort des Umsatztyps bzw. "Geldautomat"."""
+    values = values.fillna("").astype(str)
+    first_word = values.str.split().str[0].fillna("")
+    is_atm = values.str.lower().str.contains("geldautomat", regex=False)
+    return first_word.where(~is_atm, "Geldautomat").astype(object)
+
+
+def prepare_frame(frame, eigene_iban=None):
+    """
+    Bereitet das Ergebnis von BankCSVParser.extract_frame für den Import auf.
+
+    Zeilen ohne erkanntes Datum werden verworfen.
+
+    Returns:
+        Tuple: (DataFrame mit datum, art, beschreibung, soll, haben, konto,
+        gegen_iban; Anzahl verworfener Zeilen)
+    """
+    valid = frame['datum'].notna()
+    rejected = int((~valid).sum())
+    frame = frame[valid]
+
+    # Soll/Haben bestimmen
+    betrag = frame['betrag']
+    prepared = pd.DataFrame({
+        'datum': frame['datum'].dt.date,
+        'art': parse_art_column(frame['art']),
+        'beschreibung': normalize_text_column(frame['beschreibung']),
+        'soll': betrag.where(betrag < 0, 0.0).abs(),
+        'haben': betrag.where(betrag >= 0, 0.0),
+        'konto': frame['konto'].where(frame['konto'] != '', eigene_iban or ''),
+        'gegen_iban': frame['gegen_iban'],
+    }, index=frame.index)
+    return prepared, rejected
+
+
+def booking_rows(prepared, kategorien):
+    """Zeilen in der Reihenfolge von BuchungBatchWriter.add (Python-Typen)."""
+    return zip(
+        prepared['datum'].tolist(),
+        prepared['art'].tolist(),
+        prepared['beschreibung'].tolist(),
+        prepared['soll'].tolist(),
+        prepared['haben'].tolist(),
+        kategorien,
+        prepared['konto'].tolist(),
+        prepared['gegen_iban'].tolist(),
+    )
@@ -5,8 +5,12 @@ Datenbank-Migrationssystem
 Dieses Script prüft beim Start, welche Migrationen noch nicht angewendet wurden
 und führt sie automatisch aus. Migrationen werden in migrations/ als nummerierte
 SQL-Dateien gespeichert (z.B. 001_initial_schema.sql, 002_add_column.sql).
+
+Migrationen, die Logik benötigen (z.B. abhängig von MySQL/MariaDB), können als
+Python-Datei (z.B. 006_add_index.py) mit einer Funktion upgrade(conn) angelegt werden.
 """
 
+import importlib.util
 import os
 import re
 import mysql.connector
@@ -44,7 +48,7 @@ def get_pending_migrations(migrations_dir):
     
     migrations = []
     for file in sorted(os.listdir(migrations_dir)):
-        if file.endswith('.sql'):
+        if file.endswith('.sql') or file.endswith('.py'):
             # Extrahiere Versionsnummer aus Dateinamen (z.B. "001_..." -> "001")
             match = re.match(r'^(\d+)_', file)
             if match:
@@ -58,24 +62,44 @@ def get_pending_migrations(migrations_dir):
     return sorted(migrations, key=lambda x: int(x['version']))
 
 
+def load_python_migration(path):
+    """Lädt eine Python-Migration und gibt deren upgrade(conn)-Funktion zurück."""
+    name = "migration_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "upgrade"):
+        raise AttributeError(f"Migration {os.path.basename(path)} definiert keine Funktion upgrade(conn)")
+    return module.upgrade
+
+
 def apply_migration(conn, migration):
     """Wendet eine einzelne Migration an."""
     print(f"📝 Wende Migration {migration['version']} an: {migration['file']}")
     
-    with open(migration['path'], 'r', encoding='utf-8') as f:
-        sql = f.read()
-    
-    # Entferne Kommentare und teile in einzelne Statements
-    statements = [s.strip() for s in sql.split(';') if s.strip() and not s.strip().startswith('--')]
+    if migration['file'].endswith('.py'):
+        upgrade = load_python_migration(migration['path'])
+        statements = []
+    else:
+        upgrade = None
+        with open(migration['path'], 'r', encoding='utf-8') as f:
+            sql = f.read()
+        
+        # Entferne Kommentarzeilen und teile in einzelne Statements
+        # (Kommentare direkt vor einem Statement dürfen dieses nicht verschlucken)
+        sql = "\n".join(line for line in sql.splitlines() if not line.strip().startswith('--'))
+        statements = [s.strip() for s in sql.split(';') if s.strip()]
     
     cur = conn.cursor()
     try:
+        if upgrade is not None:
+            upgrade(conn)
         for statement in statements:
             if statement:
                 cur.execute(statement)
         
         # Markiere Migration als angewendet
-        description = migration['file'].replace('.sql', '').replace(f"{migration['version']}_", "")
+        description = os.path.splitext(migration['file'])[0].replace(f"{migration['version']}_", "")
         cur.execute(
             "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
             (migration['version'], description)
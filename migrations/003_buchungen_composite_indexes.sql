@@ -0,0 +1,9 @@
+-- Zusammengesetzte Indizes für die Dashboard-Filter
+-- Die Filter werden als Datumsbereiche (datum >= ? AND datum < ?) formuliert,
+-- damit diese Indizes genutzt werden können.
+
+-- Zeitraum (+ optional Konto)
+CREATE INDEX idx_buchungen_datum_konto ON buchungen (datum, konto);
+
+-- Kategorie-Filter innerhalb eines Zeitraums
+CREATE INDEX idx_buchungen_kategorie_datum ON buchungen (kategorie, datum);
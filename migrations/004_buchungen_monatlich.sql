@@ -0,0 +1,21 @@
+-- Monatsaggregate für Dashboard und Analyse
+-- Die Tabelle wird von allen Schreibpfaden inkrementell gepflegt
+-- (siehe services/rollup.py) und kann mit rebuild_rollup.py neu aufgebaut werden.
+
+CREATE TABLE IF NOT EXISTS buchungen_monatlich (
+  jahr SMALLINT NOT NULL,
+  monat TINYINT NOT NULL,
+  konto VARCHAR(50) NOT NULL DEFAULT '',
+  kategorie VARCHAR(255) NOT NULL DEFAULT '',
+  haben_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+  soll_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+  anzahl INT(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (jahr, monat, konto, kategorie)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- Bestehende Buchungen einmalig aggregieren
+INSERT INTO buchungen_monatlich (jahr, monat, konto, kategorie, haben_sum, soll_sum, anzahl)
+SELECT YEAR(datum), MONTH(datum), IFNULL(konto, ''), IFNULL(kategorie, ''),
+       IFNULL(SUM(haben), 0), IFNULL(SUM(soll), 0), COUNT(*)
+FROM buchungen
+GROUP BY YEAR(datum), MONTH(datum), IFNULL(konto, ''), IFNULL(kategorie, '');
@@ -0,0 +1,14 @@
+-- Keyset-Pagination für die Buchungsliste
+-- Sortierung und Suchposition laufen über (datum, id)
+
+CREATE INDEX idx_buchungen_datum_id ON buchungen (datum, id);
+
+-- Datenstand-Zähler: wird von jedem Schreibpfad erhöht und dient zur
+-- Invalidierung zwischengespeicherter Ergebnisse (z.B. Trefferanzahlen)
+CREATE TABLE IF NOT EXISTS data_version (
+  id TINYINT(1) NOT NULL,
+  version BIGINT(20) NOT NULL DEFAULT 0,
+  PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO data_version (id, version) VALUES (1, 0);
@@ -0,0 +1,25 @@
+"""
+Volltextindex auf buchungen.beschreibung für den Beschreibungsfilter.
+
+MySQL erhält einen ngram-Index (Teilstring-Suche ab 2 Zeichen). MariaDB kennt
+keinen ngram-Parser und erhält einen Wort-Index (Wort-/Präfixsuche).
+Stoppwörter werden für den Index deaktiviert, damit Begriffe wie "die" oder
+"and" (bzw. ngrams, die solche Wörter enthalten) nicht verloren gehen.
+"""
+
+
+def upgrade(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT VERSION()")
+        server_version = cur.fetchone()[0] or ""
+        parser = "" if "mariadb" in server_version.lower() else " WITH PARSER ngram"
+
+        # Gilt nur für diese Sitzung und wird beim Anlegen im Index hinterlegt
+        cur.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        cur.execute(
+            "ALTER TABLE buchungen "
+            f"ADD FULLTEXT INDEX ft_buchungen_beschreibung (beschreibung){parser}"
+        )
+    finally:
+        cur.close()
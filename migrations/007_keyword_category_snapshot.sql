@@ -0,0 +1,10 @@
+-- Stand der Schlüsselwörter beim letzten Kategorieabgleich (reload_category.py)
+-- Der inkrementelle Abgleich prüft nur Buchungen, die von seither
+-- hinzugefügten, geänderten oder entfernten Schlüsselwörtern betroffen sind
+
+CREATE TABLE IF NOT EXISTS keyword_category_snapshot (
+  schluesselwort VARCHAR(255) NOT NULL,
+  kategorie VARCHAR(255) NOT NULL,
+  keyword_id INT(11) NOT NULL,
+  PRIMARY KEY (schluesselwort)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,15 @@
+-- Hintergrund-Jobs (CSV-Import, Kategorieabgleich) mit Status, Fortschritt und Ergebnis
+
+CREATE TABLE IF NOT EXISTS jobs (
+  id INT(11) NOT NULL AUTO_INCREMENT,
+  typ VARCHAR(50) NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'queued',
+  progress TINYINT(3) UNSIGNED NOT NULL DEFAULT 0,
+  message VARCHAR(255) DEFAULT NULL,
+  result LONGTEXT DEFAULT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  started_at TIMESTAMP NULL DEFAULT NULL,
+  finished_at TIMESTAMP NULL DEFAULT NULL,
+  PRIMARY KEY (id),
+  KEY idx_jobs_status (status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,18 @@
+-- Registry bekannter Bank-CSV-Formate, Schlüssel ist der Fingerabdruck der
+-- Header-Zeile. Bekannte Formate werden beim Import ohne Erkennung
+-- (Encoding, Trennzeichen, Header, Spalten) eingelesen
+
+CREATE TABLE IF NOT EXISTS bank_formats (
+  fingerprint CHAR(40) NOT NULL,
+  encoding VARCHAR(40) NOT NULL,
+  delimiter VARCHAR(4) NOT NULL,
+  header_row INT(11) NOT NULL,
+  columns_json TEXT NOT NULL,
+  column_mapping TEXT NOT NULL,
+  date_format VARCHAR(20) DEFAULT NULL,
+  amount_format VARCHAR(10) DEFAULT NULL,
+  imports INT(11) NOT NULL DEFAULT 0,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  last_used_at TIMESTAMP NULL DEFAULT NULL,
+  PRIMARY KEY (fingerprint)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,68 @@
+"""
+Inhalts-Hash für die Duplikatsprüfung (buchungen.dedupe_hash).
+
+Der Hash wird über die normalisierten Vergleichsfelder (Datum, Beschreibung,
+Soll, Haben, Konto, Gegen-IBAN) gebildet, siehe services.bulk_insert.dedupe_hash,
+und ist eindeutig indiziert. Buchungen ohne Vergleichsschlüssel (ein Textfeld
+ist NULL) sowie spätere Duplikate bereits vorhandener Buchungen behalten NULL.
+
+Die Übernahme der vorhandenen Buchungen erfolgt blockweise mit Commit je
+Block; bricht sie ab, setzt ein erneuter Lauf bei den noch fehlenden
+Buchungen fort.
+"""
+from services.bulk_insert import dedupe_hash, existing_hashes
+
+BATCH_SIZE = 5000
+
+
+def _has_column(cur):
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'buchungen' AND COLUMN_NAME = 'dedupe_hash'
+        """
+    )
+    return cur.fetchone()[0] > 0
+
+
+def upgrade(conn):
+    cur = conn.cursor()
+    try:
+        if not _has_column(cur):
+            cur.execute(
+                "ALTER TABLE buchungen "
+                "ADD COLUMN dedupe_hash CHAR(40) CHARACTER SET ascii COLLATE ascii_bin DEFAULT NULL, "
+                "ADD UNIQUE KEY uniq_buchungen_dedupe_hash (dedupe_hash)"
+            )
+
+        last_id = 0
+        while True:
+            cur.execute(
+                """
+                SELECT id, datum, beschreibung, soll, haben, konto, gegen_iban
+                FROM buchungen
+                WHERE id > %s AND dedupe_hash IS NULL
+                ORDER BY id
+                LIMIT %s
+                """,
+                (last_id, BATCH_SIZE),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            hashes = [(dedupe_hash(*row[1:]), row[0]) for row in rows]
+            seen = existing_hashes(cur, (h for h, _id in hashes))
+            updates = []
+            for h, b_id in hashes:
+                if h is None or h in seen:
+                    continue
+                seen.add(h)
+                updates.append((h, b_id))
+            if updates:
+                cur.executemany("UPDATE buchungen SET dedupe_hash = %s WHERE id = %s", updates)
+            conn.commit()
+            print(f"   Buchungen bis ID {last_id}: {len(updates)} Hashes gesetzt")
+    finally:
+        cur.close()
@@ -0,0 +1,16 @@
+-- Warteschlange der an Paperless zu sendenden Belege (Dateien in image/)
+-- mit Anzahl der Versuche, letztem Fehler und Zeitpunkt des nächsten Versuchs
+
+CREATE TABLE IF NOT EXISTS paperless_outbox (
+  id INT(11) NOT NULL AUTO_INCREMENT,
+  filename VARCHAR(255) NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'pending',
+  attempts INT(11) NOT NULL DEFAULT 0,
+  last_error VARCHAR(500) DEFAULT NULL,
+  next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  sent_at TIMESTAMP NULL DEFAULT NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uniq_paperless_outbox_filename (filename),
+  KEY idx_paperless_outbox_due (status, next_attempt_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
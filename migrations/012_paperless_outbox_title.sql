@@ -0,0 +1,4 @@
+-- Belege werden inhaltsadressiert (SHA-256 als Dateiname) gespeichert; der
+-- Titel für Paperless (ursprünglicher Dateiname) steht in der Outbox
+
+ALTER TABLE paperless_outbox ADD COLUMN title VARCHAR(255) DEFAULT NULL AFTER filename;
@@ -0,0 +1,22 @@
+-- Import-Ledger: eine Zeile je importierter CSV-Datei (SHA-256 des Inhalts,
+-- Format, Zeilenzahl, Konto und Zeitraum). Identische Dateien werden nicht
+-- erneut eingelesen; Buchungen im bereits importierten Zeitraum eines Kontos
+-- werden ohne Duplikatsprüfung übersprungen
+
+CREATE TABLE IF NOT EXISTS import_ledger (
+  id INT(11) NOT NULL AUTO_INCREMENT,
+  sha256 CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  filename VARCHAR(255) NOT NULL,
+  format_fingerprint CHAR(40) DEFAULT NULL,
+  row_count INT(11) NOT NULL DEFAULT 0,
+  imported INT(11) NOT NULL DEFAULT 0,
+  duplicates INT(11) NOT NULL DEFAULT 0,
+  covered INT(11) NOT NULL DEFAULT 0,
+  konto VARCHAR(50) DEFAULT NULL,
+  date_from DATE DEFAULT NULL,
+  date_to DATE DEFAULT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  UNIQUE KEY uniq_import_ledger_sha256 (sha256),
+  KEY idx_import_ledger_konto (konto, date_from, date_to)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,23 @@
+-- Laufberichte des CSV-Imports: Zähler, Laufzeit, Durchsatz und
+-- Datenbank-Roundtrips je Lauf; report enthält den vollständigen Bericht
+-- (Stufen und Dateien) als JSON
+
+CREATE TABLE IF NOT EXISTS import_runs (
+  id INT(11) NOT NULL AUTO_INCREMENT,
+  source VARCHAR(20) NOT NULL DEFAULT 'api',
+  started_at TIMESTAMP NULL DEFAULT NULL,
+  total_seconds DECIMAL(10,3) NOT NULL DEFAULT 0,
+  files INT(11) NOT NULL DEFAULT 0,
+  failed_files INT(11) NOT NULL DEFAULT 0,
+  rows_read INT(11) NOT NULL DEFAULT 0,
+  imported INT(11) NOT NULL DEFAULT 0,
+  duplicates INT(11) NOT NULL DEFAULT 0,
+  covered INT(11) NOT NULL DEFAULT 0,
+  errors INT(11) NOT NULL DEFAULT 0,
+  rows_per_second DECIMAL(12,1) NOT NULL DEFAULT 0,
+  round_trips INT(11) NOT NULL DEFAULT 0,
+  report LONGTEXT DEFAULT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  KEY idx_import_runs_created (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
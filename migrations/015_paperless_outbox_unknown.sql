@@ -0,0 +1,5 @@
+-- Beleg wurde gesendet, das Ergebnis ist aber unbekannt (z.B. Timeout beim
+-- Warten auf die Antwort): vor dem nächsten Senden wird in Paperless geprüft,
+-- ob das Dokument bereits angekommen ist
+
+ALTER TABLE paperless_outbox ADD COLUMN outcome_unknown TINYINT(1) NOT NULL DEFAULT 0 AFTER last_error;
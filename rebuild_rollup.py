@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Monatsaggregate (buchungen_monatlich) prüfen oder neu aufbauen.
+
+    python rebuild_rollup.py           # vollständiger Neuaufbau
+    python rebuild_rollup.py --check   # nur Konsistenzprüfung (Exit-Code 1 bei Abweichungen)
+"""
+
+import argparse
+import sys
+
+from db import get_connection
+from services.rollup import check_consistency, rebuild
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monatsaggregate prüfen oder neu aufbauen")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Nur prüfen, ob die Aggregate mit den Buchungen übereinstimmen",
+    )
+    args = parser.parse_args(argv)
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            if args.check:
+                print("🔍 Prüfe Monatsaggregate...")
+                mismatches = check_consistency(cur)
+                if not mismatches:
+                    print("✅ Monatsaggregate sind konsistent")
+                    return 0
+                print(f"❌ {len(mismatches)} Abweichung(en) gefunden:")
+                for m in mismatches[:50]:
+                    jahr, monat, konto, kategorie = m["key"]
+                    print(
+                        f"   {jahr}-{monat:02d} | {konto or '-'} | {kategorie or '-'}: "
+                        f"erwartet {m['expected']}, gespeichert {m['actual']}"
+                    )
+                if len(mismatches) > 50:
+                    print(f"   ... und {len(mismatches) - 50} weitere")
+                print("   Neuaufbau mit: python rebuild_rollup.py")
+                return 1
+
+            print("🔄 Baue Monatsaggregate neu auf...")
+            rebuild(cur)
+            conn.commit()
+            print("✅ Monatsaggregate neu aufgebaut")
+            return 0
+        finally:
+            cur.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
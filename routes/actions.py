@@ -1,37 +1,39 @@
 """Aktions-Routen (Edit, Delete, Import, etc.)."""
 from datetime import datetime
 from flask import Blueprint, render_template, request, redirect, flash, url_for
-import subprocess
-import sys
-import os
 
 from db import get_connection
 from utils.helpers import parse_amount
 from services.data_service import fetch_categories
+from services import rollup
+from services.bulk_insert import dedupe_hash, existing_hashes
+from services.jobs import submit_import, submit_recategorize
 
 bp = Blueprint('actions', __name__)
 
 
 @bp.route("/reload-categories", methods=["POST"])
 def reload_categories():
+    # Standard: vollständiges Neuladen; inkrementell nur auf ausdrücklichen Wunsch
+    incremental = request.form.get("incremental") == "1"
     try:
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        subprocess.run([sys.executable, "reload_category.py"], check=True, cwd=base_dir)
-        flash("Kategorien wurden neu geladen.", "success")
-    except subprocess.CalledProcessError as exc:
+        job_id = submit_recategorize(incremental=incremental)
+        flash("Kategorien werden im Hintergrund neu geladen.", "success")
+    except Exception as exc:
         flash(f"Fehler beim Neuladen: {exc}", "error")
-    return redirect(url_for("dashboard.dashboard"))
+        return redirect(url_for("settings.settings", tab="keywords"))
+    return redirect(url_for("settings.settings", tab="keywords", job=job_id))
 
 
 @bp.route("/import_data", methods=["POST"])
 def import_data():
     try:
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        subprocess.run([sys.executable, "import_data.py"], check=True, cwd=base_dir)
-        flash("Daten wurden neu eingelesen.", "success")
-    except subprocess.CalledProcessError as exc:
+        job_id = submit_import()
+        flash("Der Import läuft im Hintergrund.", "success")
+    except Exception as exc:
         flash(f"Fehler beim lesen der Daten: {exc}", "error")
-    return redirect(url_for("dashboard.dashboard"))
+        return redirect(url_for("upload.upload"))
+    return redirect(url_for("upload.upload", job=job_id))
 
 
 @bp.route("/edit/<int:buchung_id>", methods=["GET", "POST"])
@@ -63,6 +65,19 @@ def edit_buchung(buchung_id):
 
             with get_connection() as conn:
                 cur = conn.cursor()
+                cur.execute(
+                    "SELECT datum, konto, kategorie, haben, soll, gegen_iban, dedupe_hash "
+                    "FROM buchungen WHERE id=%s FOR UPDATE",
+                    (buchung_id,),
+                )
+                old_row = cur.fetchone()
+                # Inhalts-Hash neu berechnen; gleicht die Buchung danach einer
+                # anderen, bleibt sie ohne Hash (wie vorhandene Duplikate)
+                buchung_hash = None
+                if old_row:
+                    buchung_hash = dedupe_hash(datum, beschreibung, soll, haben, old_row[1], old_row[5])
+                    if buchung_hash not in (None, old_row[6]) and existing_hashes(cur, [buchung_hash]):
+                        buchung_hash = None
                 cur.execute(
                     """
                     UPDATE buchungen
@@ -73,11 +88,19 @@ def edit_buchung(buchung_id):
                         haben=%s,
                         kategorie=%s,
                         kategorie2=%s,
-                        manually_edit=%s
+                        manually_edit=%s,
+                        dedupe_hash=%s
                     WHERE id=%s
                     """,
-                    (datum, art, beschreibung, soll, haben, kategorie, kategorie2, manually_edit_flag, buchung_id),
+                    (datum, art, beschreibung, soll, haben, kategorie, kategorie2, manually_edit_flag,
+                     buchung_hash, buchung_id),
                 )
+                if old_row:
+                    old_datum, konto, old_kategorie, old_haben, old_soll = old_row[:5]
+                    delta = rollup.RollupDelta()
+                    delta.remove(old_datum, konto, old_kategorie, old_haben, old_soll)
+                    delta.add(datum, konto, kategorie, haben, soll)
+                    delta.apply(cur)
                 conn.commit()
                 cur.close()
 
@@ -141,7 +164,14 @@ def delete_buchung(buchung_id):
     try:
         with get_connection() as conn:
             cur = conn.cursor()
+            cur.execute(
+                "SELECT datum, konto, kategorie, haben, soll FROM buchungen WHERE id=%s FOR UPDATE",
+                (buchung_id,),
+            )
+            old_row = cur.fetchone()
             cur.execute("DELETE FROM buchungen WHERE id=%s", (buchung_id,))
+            if old_row:
+                rollup.remove_booking(cur, *old_row)
             conn.commit()
             cur.close()
         flash("Buchung wurde gelöscht.", "success")
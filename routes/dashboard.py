@@ -1,16 +1,18 @@
 """Dashboard-Routen."""
-from datetime import datetime, date
-from flask import Blueprint, render_template, request, redirect, flash, url_for, Response
-import csv
-from io import StringIO
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, flash, url_for
 
 from db import get_connection
 from utils.helpers import parse_amount, parse_filter_params, load_filter_data
 from services.data_service import (
     fetch_categories, fetch_konten_details, fetch_category_summary,
     fetch_time_series, fetch_buchungen, fetch_einzahlungen_by_iban,
-    fetch_total_saldo, fetch_analysis_data, fetch_available_years
+    fetch_total_saldo, fetch_analysis_data, fetch_available_years, page_cursors
 )
+from services.query_filters import compile_filters
+from services.search import get_search_mode
+from services.export_service import stream_csv, format_datum, format_betrag, csv_download_response
+from services import rollup
 
 bp = Blueprint('dashboard', __name__)
 
@@ -60,6 +62,7 @@ def index():
                         1,
                     ),
                 )
+                rollup.add_booking(cur, datum, konto, kategorie, haben, soll)
                 conn.commit()
                 cur.close()
 
@@ -98,7 +101,9 @@ def dashboard():
         kategorie_filter=kategorie_filter or None,
         kategorie2_filter=kategorie2_filter or None,
         beschreibung_filter=beschreibung_filter or None,
+        cursor=filters["cursor"] or None,
     )
+    prev_cursor, next_cursor = page_cursors(buchungen)
     einzahlungen = fetch_einzahlungen_by_iban(year, month)
 
     labels_cat = [c["kategorie"] for c in cat_summary]
@@ -132,6 +137,8 @@ def dashboard():
         buchungen=buchungen,
         current_page=page,
         total_pages=total_pages,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
         total_buchungen=total_buchungen,
         kategorien=kategorien,
         konten=konten,
@@ -156,32 +163,15 @@ def export_buchungen():
     kategorie2_filter = filters["kategorie2_filter"]
     beschreibung_filter = filters["beschreibung_filter"]
 
-    where = []
-    params = []
-    if year:
-        where.append("YEAR(datum) = %s")
-        params.append(year)
-    if month:
-        if isinstance(month, list):
-            placeholders = ",".join(["%s"] * len(month))
-            where.append(f"MONTH(datum) IN ({placeholders})")
-            params.extend(month)
-        else:
-            where.append("MONTH(datum) = %s")
-            params.append(month)
-    if konto:
-        where.append("konto = %s")
-        params.append(konto)
-    if kategorie_filter:
-        where.append("kategorie = %s")
-        params.append(kategorie_filter)
-    if kategorie2_filter:
-        where.append("kategorie2 LIKE %s")
-        params.append(f"%{kategorie2_filter}%")
-    if beschreibung_filter:
-        where.append("beschreibung LIKE %s")
-        params.append(f"%{beschreibung_filter}%")
-    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    where_sql, params = compile_filters(
+        year,
+        month,
+        konto=konto,
+        kategorie=kategorie_filter,
+        kategorie2=kategorie2_filter,
+        beschreibung=beschreibung_filter,
+        search_mode=get_search_mode() if beschreibung_filter else "like",
+    )
 
     sql = f"""
         SELECT datum, art, beschreibung, soll, haben, kategorie, kategorie2, konto
@@ -190,48 +180,27 @@ def export_buchungen():
         ORDER BY datum DESC, id DESC
     """
 
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-        cur.close()
-
-    # CSV erstellen (deutsches Semikolon-Format)
-    output = StringIO()
-    writer = csv.writer(output, delimiter=";")
-
-    # Kopfzeile
-    writer.writerow(
-        ["Datum", "Art", "Beschreibung", "Soll", "Haben", "Kategorie", "Unterkategorie", "Konto"]
-    )
-
-    for datum, art, beschreibung, soll, haben, kategorie, kategorie2, konto_val in rows:
-        if isinstance(datum, (datetime, date)):
-            datum_str = datum.strftime("%d.%m.%Y")
-        else:
-            datum_str = str(datum) if datum is not None else ""
-        writer.writerow(
-            [
-                datum_str,
-                art or "",
-                beschreibung or "",
-                f"{float(soll or 0):.2f}".replace(".", ","),
-                f"{float(haben or 0):.2f}".replace(".", ","),
-                kategorie or "",
-                kategorie2 or "",
-                konto_val or "",
-            ]
-        )
-
-    csv_data = output.getvalue()
-    output.close()
-
-    filename = f"buchungen_{year}_{month}.csv"
-    return Response(
-        csv_data,
-        mimetype="text/csv; charset=utf-8",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    def format_row(row):
+        datum, art, beschreibung, soll, haben, kategorie, kategorie2, konto_val = row
+        return [
+            format_datum(datum),
+            art or "",
+            beschreibung or "",
+            format_betrag(soll),
+            format_betrag(haben),
+            kategorie or "",
+            kategorie2 or "",
+            konto_val or "",
+        ]
+
+    # CSV im deutschen Semikolon-Format, während des Lesens gestreamt
+    chunks = stream_csv(
+        sql,
+        params,
+        ["Datum", "Art", "Beschreibung", "Soll", "Haben", "Kategorie", "Unterkategorie", "Konto"],
+        format_row,
     )
+    return csv_download_response(chunks, f"buchungen_{year}_{month}.csv")
 
 
 @bp.route("/buchungen")
@@ -254,8 +223,10 @@ def buchungen():
         kategorie_filter=kategorie_filter or None,
         kategorie2_filter=kategorie2_filter or None,
         beschreibung_filter=beschreibung_filter or None,
+        cursor=filters["cursor"] or None,
     )
 
+    prev_cursor, next_cursor = page_cursors(buchungen_list)
     kategorien, konten = load_filter_data()
 
     return render_template(
@@ -265,6 +236,8 @@ def buchungen():
         buchungen=buchungen_list,
         current_page=page,
         total_pages=total_pages,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
         total_buchungen=total_buchungen,
         kategorien=kategorien,
         konten=konten,
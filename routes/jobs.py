@@ -0,0 +1,15 @@
+"""Job-Routen (Statusabfrage für Hintergrund-Jobs)."""
+from flask import Blueprint, jsonify
+
+from services.jobs import get_job
+
+bp = Blueprint('jobs', __name__)
+
+
+@bp.route("/jobs/<int:job_id>")
+def job_status(job_id):
+    """Status, Fortschritt und Ergebnis eines Jobs als JSON."""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+    return jsonify(job)
@@ -1,13 +1,13 @@
 """Settings-Routen."""
-from flask import Blueprint, render_template, request, redirect, flash, url_for, Response
-from datetime import datetime, date
-import csv
-from io import StringIO
+from flask import Blueprint, render_template, request, redirect, flash, url_for
+from datetime import datetime
 from werkzeug.utils import secure_filename
 
-from db import get_connection
+from db import get_connection, get_pool_stats
 from utils.helpers import load_config, save_config
 from services.data_service import fetch_konten_details, fetch_category_master, fetch_keyword_mappings
+from services import restore
+from services.export_service import stream_csv, format_datum, format_betrag, csv_download_response
 from utils.version import CURRENT_VERSION, is_update_available
 
 bp = Blueprint('settings', __name__)
@@ -322,6 +322,7 @@ def settings():
         edit_mapping=edit_mapping,
         paperless_config=paperless_config,
         version_info=version_info,
+        pool_stats=get_pool_stats(),
         active_tab=active_tab,
     )
 
@@ -335,33 +336,7 @@ def export_all_buchungen():
         ORDER BY datum DESC, id DESC
     """
 
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(sql)
-        rows = cur.fetchall()
-        cur.close()
-
-    # CSV erstellen (deutsches Semikolon-Format)
-    output = StringIO()
-    writer = csv.writer(output, delimiter=";")
-
-    # Kopfzeile
-    writer.writerow(
-        [
-            "Datum",
-            "Art",
-            "Beschreibung",
-            "Soll",
-            "Haben",
-            "Kategorie",
-            "Unterkategorie",
-            "Konto",
-            "Gegen-IBAN",
-            "Erstellt am",
-        ]
-    )
-
-    for row in rows:
+    def format_row(row):
         (
             datum,
             art,
@@ -374,46 +349,41 @@ def export_all_buchungen():
             gegen_iban,
             erzeugt_am,
         ) = row
+        return [
+            format_datum(datum),
+            art or "",
+            beschreibung or "",
+            format_betrag(soll),
+            format_betrag(haben),
+            kategorie or "",
+            kategorie2 or "",
+            konto_val or "",
+            gegen_iban or "",
+            format_datum(erzeugt_am, "%d.%m.%Y %H:%M:%S"),
+        ]
 
-        # Datum formatieren
-        if isinstance(datum, (datetime, date)):
-            datum_str = datum.strftime("%d.%m.%Y")
-        else:
-            datum_str = str(datum) if datum is not None else ""
-
-        # Erstellt am formatieren
-        if isinstance(erzeugt_am, (datetime, date)):
-            erzeugt_am_str = erzeugt_am.strftime("%d.%m.%Y %H:%M:%S")
-        else:
-            erzeugt_am_str = str(erzeugt_am) if erzeugt_am is not None else ""
-
-        writer.writerow(
-            [
-                datum_str,
-                art or "",
-                beschreibung or "",
-                f"{float(soll or 0):.2f}".replace(".", ","),
-                f"{float(haben or 0):.2f}".replace(".", ","),
-                kategorie or "",
-                kategorie2 or "",
-                konto_val or "",
-                gegen_iban or "",
-                erzeugt_am_str,
-            ]
-        )
-
-    csv_data = output.getvalue()
-    output.close()
+    # CSV im deutschen Semikolon-Format, während des Lesens gestreamt
+    chunks = stream_csv(
+        sql,
+        (),
+        [
+            "Datum",
+            "Art",
+            "Beschreibung",
+            "Soll",
+            "Haben",
+            "Kategorie",
+            "Unterkategorie",
+            "Konto",
+            "Gegen-IBAN",
+            "Erstellt am",
+        ],
+        format_row,
+    )
 
     # Dateiname mit aktuellem Datum
     today = datetime.now().strftime("%Y%m%d")
-    filename = f"alle_buchungen_{today}.csv"
-
-    return Response(
-        csv_data,
-        mimetype="text/csv; charset=utf-8",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+    return csv_download_response(chunks, f"alle_buchungen_{today}.csv")
 
 
 @bp.route("/settings/import", methods=["POST"])
@@ -433,103 +403,28 @@ def import_buchungen():
         return redirect(url_for("settings.settings", tab="export"))
 
     try:
-        # CSV-Datei einlesen
-        content = file.read().decode("utf-8")
-        reader = csv.DictReader(StringIO(content), delimiter=";")
+        # Datei zeilenweise lesen, nicht vollständig in den Speicher laden
+        reader = restore.open_export(file.stream)
 
         # Erwartete Spalten prüfen
-        expected_columns = [
-            "Datum",
-            "Art",
-            "Beschreibung",
-            "Soll",
-            "Haben",
-            "Kategorie",
-            "Unterkategorie",
-            "Konto",
-            "Gegen-IBAN",
-        ]
-        if not all(col in reader.fieldnames for col in expected_columns):
+        if not all(col in (reader.fieldnames or []) for col in restore.EXPECTED_COLUMNS):
             flash(
-                f"CSV-Datei hat nicht die erwarteten Spalten. Erwartet: {', '.join(expected_columns)}",
+                f"CSV-Datei hat nicht die erwarteten Spalten. Erwartet: {', '.join(restore.EXPECTED_COLUMNS)}",
                 "error",
             )
             return redirect(url_for("settings.settings", tab="export"))
 
-        imported_count = 0
-        skipped_count = 0
-        error_count = 0
-
         with get_connection() as conn:
             cur = conn.cursor()
+            try:
+                result = restore.restore_buchungen(cur, reader)
+                conn.commit()
+            finally:
+                cur.close()
 
-            for row in reader:
-                try:
-                    # Datum parsen (Format: DD.MM.YYYY)
-                    datum_str = row["Datum"].strip()
-                    if not datum_str:
-                        error_count += 1
-                        continue
-
-                    try:
-                        datum = datetime.strptime(datum_str, "%d.%m.%Y").date()
-                    except ValueError:
-                        # Versuche alternatives Format
-                        try:
-                            datum = datetime.strptime(datum_str, "%Y-%m-%d").date()
-                        except ValueError:
-                            error_count += 1
-                            continue
-
-                    # Beträge parsen (deutsches Format: Komma als Dezimaltrennzeichen)
-                    soll_str = row["Soll"].strip().replace(".", "").replace(",", ".")
-                    haben_str = row["Haben"].strip().replace(".", "").replace(",", ".")
-
-                    try:
-                        soll = float(soll_str) if soll_str else 0.0
-                        haben = float(haben_str) if haben_str else 0.0
-                    except ValueError:
-                        error_count += 1
-                        continue
-
-                    # Textfelder
-                    art = row.get("Art", "").strip() or None
-                    beschreibung = row.get("Beschreibung", "").strip() or None
-                    kategorie = row.get("Kategorie", "").strip() or None
-                    kategorie2 = row.get("Unterkategorie", "").strip() or None
-                    konto = row.get("Konto", "").strip() or None
-                    gegen_iban = row.get("Gegen-IBAN", "").strip() or None
-
-                    # Duplikatsprüfung
-                    cur.execute(
-                        """
-                        SELECT COUNT(*) FROM buchungen
-                        WHERE datum=%s AND beschreibung=%s AND soll=%s AND haben=%s
-                        AND konto=%s AND gegen_iban=%s
-                        """,
-                        (datum, beschreibung, soll, haben, konto, gegen_iban),
-                    )
-
-                    if cur.fetchone()[0] == 0:
-                        # Buchung einfügen
-                        cur.execute(
-                            """
-                            INSERT INTO buchungen
-                            (datum, art, beschreibung, soll, haben, kategorie, kategorie2, konto, gegen_iban, manually_edit)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """,
-                            (datum, art, beschreibung, soll, haben, kategorie, kategorie2, konto, gegen_iban, 1),
-                        )
-                        imported_count += 1
-                    else:
-                        skipped_count += 1
-
-                except Exception as e:
-                    error_count += 1
-                    continue
-
-            conn.commit()
-            cur.close()
+        imported_count = result["imported"]
+        skipped_count = result["skipped"]
+        error_count = result["errors"]
 
         # Erfolgsmeldung
         messages = []
@@ -539,12 +434,13 @@ def import_buchungen():
             messages.append(f"{skipped_count} Duplikat(e) übersprungen.")
         if error_count > 0:
             messages.append(f"{error_count} Zeile(n) konnten nicht importiert werden.")
+            details = "; ".join(f"Zeile {zeile}: {message}" for zeile, message in result["error_details"][:3])
+            messages.append(f"({details}{' …' if error_count > 3 else ''})")
 
         if messages:
             flash(" ".join(messages), "success" if imported_count > 0 else "warning")
         else:
             flash("Keine Buchungen konnten importiert werden.", "error")
-
     except Exception as exc:
         flash(f"Fehler beim Importieren: {exc}", "error")
 
@@ -1,11 +1,16 @@
 """Upload-Routen."""
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, flash, url_for
+from flask import Blueprint, render_template, request, redirect, flash, url_for, jsonify
 from werkzeug.utils import secure_filename
 import os
-import re
-import subprocess
-import sys
+
+from db import get_connection
+from ingest.ledger import find_imported, stream_sha256
+from ingest.pipeline import IMPORT_EXTENSIONS
+from ingest.result import STAGES
+from ingest.telemetry import RECENT_RUNS, fetch_run, fetch_runs
+from services import receipts
+from services.jobs import submit_import, wake_paperless
 
 bp = Blueprint('upload', __name__)
 
@@ -13,7 +18,44 @@ bp = Blueprint('upload', __name__)
 @bp.route("/upload", methods=["GET"])
 def upload():
     """Separate Seite für CSV-Upload und -Verarbeitung."""
-    return render_template("upload_data.html")
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                runs = fetch_runs(cur)
+            finally:
+                cur.close()
+    except Exception as exc:
+        print(f"⚠️  Importläufe konnten nicht geladen werden: {exc}")
+        runs = []
+    return render_template("upload_data.html", runs=runs, stages=STAGES)
+
+
+@bp.route("/import_runs.json")
+def import_runs_json():
+    """Laufberichte der letzten Importe als JSON (?limit=, Standard 10, höchstens 1000)."""
+    limit = min(max(request.args.get("limit", RECENT_RUNS, type=int), 1), 1000)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            runs = fetch_runs(cur, limit)
+        finally:
+            cur.close()
+    return jsonify(runs)
+
+
+@bp.route("/import_runs/<int:run_id>.json")
+def import_run_json(run_id):
+    """Vollständiger Laufbericht eines Imports als JSON."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            run = fetch_run(cur, run_id)
+        finally:
+            cur.close()
+    if run is None:
+        return jsonify({"error": "Importlauf nicht gefunden"}), 404
+    return jsonify(run)
 
 
 @bp.route("/paperless", methods=["GET", "POST"])
@@ -33,21 +75,34 @@ def paperless():
             flash("Nur Bilddateien (PDF, JPG, PNG, HEIC) sind erlaubt.", "error")
             return redirect(url_for("upload.paperless"))
 
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        image_dir = os.path.join(base_dir, "image")
-        os.makedirs(image_dir, exist_ok=True)
-
-        # Eindeutigen Dateinamen erstellen mit Timestamp
+        # Titel in Paperless wie bisher: Zeitstempel und ursprünglicher Name
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_name = os.path.splitext(filename)[0]
-        new_filename = f"{timestamp}_{safe_name}{file_ext}"
-        target_path = os.path.join(image_dir, new_filename)
+        title_name = f"{timestamp}_{safe_name}{file_ext}"
 
+        # Beleg blockweise speichern (inhaltsadressiert) und in die Outbox eintragen
         try:
-            file.save(target_path)
-            flash(f"Bild '{new_filename}' wurde erfolgreich gespeichert.", "success")
+            with get_connection() as conn:
+                cur = conn.cursor()
+                try:
+                    stored = receipts.store_receipt(cur, file.stream, title_name)
+                    conn.commit()
+                finally:
+                    cur.close()
         except Exception as exc:
             flash(f"Bild konnte nicht gespeichert werden: {exc}", "error")
+            return redirect(url_for("upload.paperless"))
+
+        if stored["duplicate"]:
+            flash("Dieser Beleg wurde bereits hochgeladen und wird nicht erneut gesendet.", "warning")
+            return redirect(url_for("upload.paperless"))
+        flash(f"Bild '{title_name}' wurde erfolgreich gespeichert.", "success")
+
+        # Sofort im Hintergrund senden
+        try:
+            wake_paperless()
+        except Exception as exc:
+            flash(f"Bild gespeichert, aber Upload an Paperless nicht gestartet: {exc}", "warning")
 
         return redirect(url_for("upload.paperless"))
 
@@ -57,50 +112,64 @@ def paperless():
 
 @bp.route("/upload_csv", methods=["POST"])
 def upload_csv():
-    file = request.files.get("csv_file")
-    if not file or file.filename == "":
+    files = [file for file in request.files.getlist("csv_file") if file and file.filename]
+    if not files:
         flash("Bitte eine CSV-Datei auswählen.", "error")
         return redirect(url_for("upload.upload"))
 
-    filename = os.path.basename(file.filename)
-    if not filename.lower().endswith(".csv"):
-        flash("Nur CSV-Dateien sind erlaubt.", "error")
+    filenames = [os.path.basename(file.filename) for file in files]
+    if not all(filename.lower().endswith(IMPORT_EXTENSIONS) for filename in filenames):
+        flash("Nur CSV-Dateien und Kontoauszüge (CAMT.053 .xml, MT940 .sta) sind erlaubt.", "error")
         return redirect(url_for("upload.upload"))
 
+    # Erneut importieren: Import-Ledger für diesen Import übergehen
+    force = bool(request.form.get("force"))
+
+    # Bereits importierte Dateien (Import-Ledger) sofort ablehnen
+    known = []
+    if not force:
+        try:
+            with get_connection() as conn:
+                cur = conn.cursor()
+                try:
+                    for file, filename in zip(files, filenames):
+                        sha256 = stream_sha256(file.stream)
+                        file.stream.seek(0)
+                        if find_imported(cur, sha256) is not None:
+                            known.append(filename)
+                finally:
+                    cur.close()
+        except Exception as exc:
+            flash(f"Import-Ledger konnte nicht geprüft werden: {exc}", "error")
+            return redirect(url_for("upload.upload"))
+
+    if known:
+        flash(f"Bereits importiert, wird übersprungen: {', '.join(known)}", "warning")
+        files = [file for file, filename in zip(files, filenames) if filename not in known]
+        filenames = [filename for filename in filenames if filename not in known]
+        if not files:
+            return redirect(url_for("upload.upload"))
+
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     import_dir = os.path.join(base_dir, "import")
     os.makedirs(import_dir, exist_ok=True)
 
-    target_path = os.path.join(import_dir, filename)
-    try:
-        file.save(target_path)
-        
-        # Direkt nach dem Upload import_data.py ausführen
+    for file, filename in zip(files, filenames):
         try:
-            result = subprocess.run(
-                [sys.executable, "import_data.py"], 
-                check=True, 
-                cwd=base_dir,
-                capture_output=True,
-                text=True
-            )
-            
-            # Anzahl der importierten Buchungen aus dem Output extrahieren
-            total_imported = 0
-            # Suche nach "🎉 X Buchungen importiert" im Output
-            matches = re.findall(r'🎉\s*(\d+)\s*Buchungen importiert', result.stdout)
-            if matches:
-                total_imported = sum(int(m) for m in matches)
-            
-            if total_imported > 0:
-                flash(f"Daten wurden importiert und automatisch verarbeitet. {total_imported} Buchung(en) wurden importiert.", "success")
-            else:
-                flash("Daten wurden importiert und automatisch verarbeitet. Keine neuen Buchungen gefunden (möglicherweise Duplikate).", "success")
-        except subprocess.CalledProcessError as exc:
-            flash(f"Datei hochgeladen, aber Fehler beim Import: {exc}", "error")
+            file.save(os.path.join(import_dir, filename))
         except Exception as exc:
-            flash(f"Datei hochgeladen, aber Fehler beim Import: {exc}", "error")
+            flash(f"CSV '{filename}' konnte nicht hochgeladen werden: {exc}", "error")
+            return redirect(url_for("upload.upload"))
+
+    # Ein Import für alle Dateien, der Fortschritt wird auf der Upload-Seite angezeigt
+    try:
+        job_id = submit_import(force=force)
     except Exception as exc:
-        flash(f"CSV konnte nicht hochgeladen werden: {exc}", "error")
+        flash(f"Datei hochgeladen, aber Fehler beim Import: {exc}", "error")
+        return redirect(url_for("upload.upload"))
 
-    return redirect(url_for("upload.upload"))
+    if len(files) > 1:
+        flash(f"{len(files)} Dateien wurden hochgeladen, der Import läuft im Hintergrund.", "success")
+    else:
+        flash("Datei wurde hochgeladen, der Import läuft im Hintergrund.", "success")
+    return redirect(url_for("upload.upload", job=job_id))
@@ -0,0 +1,205 @@
+"""
+Gebündeltes Einfügen importierter Buchungen.
+
+Statt je CSV-Zeile eine Duplikatsprüfung (SELECT) und ein INSERT abzusetzen,
+sammelt BuchungBatchWriter die Zeilen, prüft jeden Block mit einer einzigen
+Abfrage gegen den Bestand und schreibt die neuen Zeilen per executemany
+(mehrzeiliges INSERT).
+
+Als Duplikat gilt – wie bisher – eine Buchung mit gleichem Datum, gleicher
+Beschreibung, gleichem Soll/Haben, gleichem Konto und gleicher Gegen-IBAN.
+Verglichen wird über die Spalte buchungen.dedupe_hash (eindeutiger Index,
+Migration 010).
+"""
+import hashlib
+import time
+import unicodedata
+
+from services.rollup import RollupDelta
+
+
+DEFAULT_BATCH_SIZE = 500
+
+_INSERT_SQL = """
+    INSERT INTO buchungen
+    (datum, art, beschreibung, soll, haben, kategorie, konto, gegen_iban, dedupe_hash)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+"""
+
+# MySQL-Fehlercode für eine Verletzung eines eindeutigen Index
+ER_DUP_ENTRY = 1062
+
+# Eindeutiger Index auf dedupe_hash (Migration 010)
+DEDUPE_KEY = "uniq_buchungen_dedupe_hash"
+
+
+def _normalize_text(value):
+    """
+    Vergleichsform eines Textes entsprechend der Spaltenkollation
+    utf8mb4_general_ci (ohne Groß-/Kleinschreibung und Akzente,
+    Leerzeichen am Ende werden ignoriert).
+    """
+    decomposed = unicodedata.normalize("NFD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.lower().rstrip(" ")
+
+
+def duplicate_key(datum, beschreibung, soll, haben, konto, gegen_iban):
+    """
+    Vergleichsschlüssel einer Buchung für die Duplikatsprüfung.
+
+    Gibt None zurück, wenn ein Textfeld NULL ist – solche Zeilen sind
+    (wie bei ``spalte = %s`` in SQL) niemals gleich.
+    """
+    if beschreibung is None or konto is None or gegen_iban is None:
+        return None
+    return (
+        datum,
+        _normalize_text(beschreibung),
+        float(soll or 0),
+        float(haben or 0),
+        _normalize_text(konto),
+        _normalize_text(gegen_iban),
+    )
+
+
+def dedupe_hash(datum, beschreibung, soll, haben, konto, gegen_iban):
+    """
+    Inhalts-Hash (SHA-1, hex) des Vergleichsschlüssels für buchungen.dedupe_hash.
+
+    Gibt None zurück, wenn die Buchung keinen Vergleichsschlüssel hat.
+    """
+    key = duplicate_key(datum, beschreibung, soll, haben, konto, gegen_iban)
+    if key is None:
+        return None
+    datum, beschreibung, soll, haben, konto, gegen_iban = key
+    text = "\x1f".join([
+        datum.isoformat() if hasattr(datum, "isoformat") else str(datum),
+        beschreibung,
+        f"{soll:.2f}",
+        f"{haben:.2f}",
+        konto,
+        gegen_iban,
+    ])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def existing_hashes(cursor, hashes):
+    """Welche der Hashes bereits in buchungen vorkommen (eine indizierte Abfrage)."""
+    hashes = sorted({h for h in hashes if h is not None})
+    if not hashes:
+        return set()
+    placeholders = ", ".join(["%s"] * len(hashes))
+    cursor.execute(
+        f"SELECT dedupe_hash FROM buchungen WHERE dedupe_hash IN ({placeholders})",
+        hashes,
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def is_duplicate_error(exc):
+    """
+    True, wenn die Ausnahme eine Verletzung des Index auf dedupe_hash ist.
+
+    Kollisionen mit dem älteren Schlüssel unique_buchung (Zeilen, die sich in
+    Konto oder Gegen-IBAN unterscheiden) sind keine Duplikate, sondern Fehler.
+    """
+    return getattr(exc, "errno", None) == ER_DUP_ENTRY and DEDUPE_KEY in str(exc)
+
+
+class BuchungBatchWriter:
+    """
+    Schreibt importierte Buchungen blockweise über den Cursor der
+    Import-Transaktion.
+
+    Zähler:
+        inserted   – eingefügte Buchungen
+        duplicates – übersprungene Duplikate
+        errors     – Zeilen, die nicht eingefügt werden konnten
+
+    timings enthält die Laufzeit (Sekunden) von Duplikatsprüfung, INSERTs und
+    Aggregat-Aktualisierung.
+    """
+
+    def __init__(self, cursor, batch_size=DEFAULT_BATCH_SIZE, rollup_delta=None):
+        self.cursor = cursor
+        self.batch_size = max(1, int(batch_size))
+        self.rollup_delta = rollup_delta if rollup_delta is not None else RollupDelta()
+        self.inserted = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.timings = {"dedupe": 0.0, "insert": 0.0, "rollup": 0.0}
+        self._pending = []
+
+    def add(self, datum, art, beschreibung, soll, haben, kategorie, konto, gegen_iban):
+        """Nimmt eine Buchung auf; volle Blöcke werden sofort geschrieben."""
+        self._pending.append((datum, art, beschreibung, soll, haben, kategorie, konto, gegen_iban))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, rows):
+        """Nimmt mehrere Buchungen (Tupel in der Reihenfolge von add) auf."""
+        for row in rows:
+            self._pending.append(tuple(row))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """Prüft den aktuellen Block auf Duplikate und schreibt die neuen Zeilen."""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+
+        started = time.perf_counter()
+        hashed = [
+            row + (dedupe_hash(row[0], row[2], row[3], row[4], row[6], row[7]),)
+            for row in rows
+        ]
+        existing = existing_hashes(self.cursor, (row[8] for row in hashed))
+        new_rows = []
+        for row in hashed:
+            key = row[8]
+            if key is not None and key in existing:
+                self.duplicates += 1
+                continue
+            new_rows.append(row)
+            # Spätere gleiche Zeilen im selben Block sind Duplikate dieser Zeile
+            if key is not None:
+                existing.add(key)
+
+        self.timings["dedupe"] += time.perf_counter() - started
+
+        if not new_rows:
+            return
+        started = time.perf_counter()
+        try:
+            self.cursor.executemany(_INSERT_SQL, new_rows)
+            for row in new_rows:
+                self._inserted(row)
+        except Exception:
+            # Das fehlgeschlagene Statement wurde vollständig zurückgerollt –
+            # zeilenweise wiederholen, damit nur die fehlerhaften Zeilen fehlen
+            for row in new_rows:
+                try:
+                    self.cursor.execute(_INSERT_SQL, row)
+                    self._inserted(row)
+                except Exception as e:
+                    if is_duplicate_error(e):
+                        # Zwischenzeitlich von einem anderen Vorgang eingefügt
+                        self.duplicates += 1
+                        continue
+                    self.errors += 1
+                    print(f"   ⚠️  Fehler bei Zeile: {e}")
+        self.timings["insert"] += time.perf_counter() - started
+
+    def _inserted(self, row):
+        datum, _art, _beschreibung, soll, haben, kategorie, konto = row[:7]
+        self.rollup_delta.add(datum, konto, kategorie, haben, soll)
+        self.inserted += 1
+
+    def finish(self):
+        """Schreibt den letzten Block und die Änderungen an den Monatsaggregaten."""
+        self.flush()
+        started = time.perf_counter()
+        self.rollup_delta.apply(self.cursor)
+        self.timings["rollup"] += time.perf_counter() - started
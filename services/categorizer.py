@@ -0,0 +1,159 @@
+"""
+Kategorisierung von Buchungen anhand der Schlüsselwörter (keyword_category).
+
+Alle Schlüsselwörter werden einmalig zu einem Aho-Corasick-Automaten
+zusammengefasst, der jede Beschreibung in einem Durchlauf durchsucht –
+unabhängig von der Anzahl der Schlüsselwörter. Es gilt weiterhin: Das erste
+Schlüsselwort (in Tabellenreihenfolge), das als ganzes Wort in der
+Beschreibung vorkommt, bestimmt die Kategorie.
+"""
+from collections import deque
+
+
+DEFAULT_CATEGORY = "Sonstiges"
+
+
+def _is_word_char(ch):
+    # Entspricht \w in regulären Ausdrücken (Unicode)
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordCategorizer:
+    """
+    Ordnet Beschreibungen über die Schlüsselwort-Tabelle einer Kategorie zu.
+
+    Ein Treffer zählt wie bisher bei ``re.search(r"\\b" + re.escape(key) + r"\\b", text)``
+    (ohne Groß-/Kleinschreibung): Die Wortgrenzen werden für jeden Treffer des
+    Automaten an Anfang und Ende geprüft. Unter allen Treffern gewinnt das
+    Schlüsselwort mit dem kleinsten Index.
+    """
+
+    def __init__(self, keywords, default=DEFAULT_CATEGORY):
+        """
+        Args:
+            keywords: Paare (schluesselwort, kategorie) in Vorrangreihenfolge
+            default: Kategorie, wenn kein Schlüsselwort passt
+        """
+        self.keywords = []
+        self.categories = []
+        seen = set()
+        for key, kategorie in keywords:
+            key = key.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            self.keywords.append(key)
+            self.categories.append(kategorie)
+        self.default = default
+        self._build()
+
+    def _build(self):
+        # Zustand 0 ist die Wurzel; je Zustand: Übergänge, Fehlerzustand, Treffer
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        # Ein leeres Schlüsselwort passt (wie r"\b\b") auf jeden Text mit Wortzeichen
+        self._empty_index = None
+
+        for index, key in enumerate(self.keywords):
+            if not key:
+                if self._empty_index is None:
+                    self._empty_index = index
+                continue
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                # Treffer der Suffix-Zustände übernehmen
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        for out in self._out:
+            out.sort()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def match_index(self, text):
+        """Index des ersten passenden Schlüsselworts oder None."""
+        if not text:
+            return None
+        text = text.lower()
+        length = len(text)
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        keywords = self.keywords
+
+        best = None
+        if self._empty_index is not None and any(_is_word_char(ch) for ch in text):
+            best = self._empty_index
+
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = pos + 1
+            for index in out[state]:
+                if best is not None and index >= best:
+                    break
+                key = keywords[index]
+                start = end - len(key)
+                # \b am Anfang und am Ende des Schlüsselworts
+                before = start > 0 and _is_word_char(text[start - 1])
+                if before == _is_word_char(key[0]):
+                    continue
+                after = end < length and _is_word_char(text[end])
+                if after == _is_word_char(key[-1]):
+                    continue
+                best = index
+                break
+            if best == 0:
+                break
+        return best
+
+    def categorize(self, text):
+        """Kategorie für eine Beschreibung."""
+        index = self.match_index(text)
+        return self.default if index is None else self.categories[index]
+
+    def categorize_all(self, texts):
+        """Kategorien für mehrere Beschreibungen (gleiche Texte nur einmal auswerten)."""
+        cache = {}
+        result = []
+        for text in texts:
+            kategorie = cache.get(text)
+            if kategorie is None:
+                kategorie = cache[text] = self.categorize(text)
+            result.append(kategorie)
+        return result
+
+
+def load_keywords(cur):
+    """Lädt die Schlüsselwörter in Tabellenreihenfolge."""
+    cur.execute("SELECT schluesselwort, kategorie FROM keyword_category ORDER BY id")
+    return cur.fetchall()
+
+
+def load_categorizer(cur):
+    """Erstellt einen KeywordCategorizer aus der Tabelle keyword_category."""
+    return KeywordCategorizer(load_keywords(cur))
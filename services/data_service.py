@@ -1,13 +1,19 @@
 """Datenbank-Service-Funktionen für die Anwendung."""
+import base64
+import json
 import math
+import threading
+from datetime import date
 from db import get_connection
+from services.query_filters import compile_filters, compile_rollup_filters
+from services.search import get_search_mode
 
 
 def fetch_available_years():
     """Holt alle verfügbaren Jahre aus der Datenbank."""
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT DISTINCT YEAR(datum) FROM buchungen ORDER BY YEAR(datum) DESC")
+        cur.execute("SELECT DISTINCT jahr FROM buchungen_monatlich ORDER BY jahr DESC")
         years = [str(row[0]) for row in cur.fetchall()]
         cur.close()
         return years
@@ -49,25 +55,12 @@ def fetch_keyword_mappings():
 
 
 def fetch_category_summary(year=None, month=None):
-    where = []
-    params = []
-    if year:
-        where.append("YEAR(datum) = %s")
-        params.append(year)
-    if month:
-        if isinstance(month, list):
-            placeholders = ",".join(["%s"] * len(month))
-            where.append(f"MONTH(datum) IN ({placeholders})")
-            params.extend(month)
-        else:
-            where.append("MONTH(datum) = %s")
-            params.append(month)
-    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    where_sql, params = compile_rollup_filters(year, month)
     sql = f"""
         SELECT kategorie,
-               SUM(haben) AS haben_sum,
-               SUM(soll) AS soll_sum
-        FROM buchungen
+               SUM(haben_sum) AS haben_sum,
+               SUM(soll_sum) AS soll_sum
+        FROM buchungen_monatlich
         {where_sql}
         GROUP BY kategorie
         ORDER BY kategorie
@@ -78,33 +71,20 @@ def fetch_category_summary(year=None, month=None):
         rows = cur.fetchall()
         cur.close()
         return [
-            {"kategorie": r[0], "haben": float(r[1] or 0), "soll": float(r[2] or 0)}
+            {"kategorie": r[0] or None, "haben": float(r[1] or 0), "soll": float(r[2] or 0)}
             for r in rows
         ]
 
 
 def fetch_time_series(year=None, month=None):
-    where = []
-    params = []
-    if year:
-        where.append("YEAR(datum) = %s")
-        params.append(year)
-    if month:
-        if isinstance(month, list):
-            placeholders = ",".join(["%s"] * len(month))
-            where.append(f"MONTH(datum) IN ({placeholders})")
-            params.extend(month)
-        else:
-            where.append("MONTH(datum) = %s")
-            params.append(month)
-    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    where_sql, params = compile_rollup_filters(year, month)
     sql = f"""
-        SELECT DATE_FORMAT(datum, '%%Y-%%m-01') AS period,
-               SUM(haben - soll) AS saldo
-        FROM buchungen
+        SELECT CONCAT(jahr, '-', LPAD(monat, 2, '0'), '-01') AS period,
+               SUM(haben_sum - soll_sum) AS saldo
+        FROM buchungen_monatlich
         {where_sql}
-        GROUP BY period
-        ORDER BY period
+        GROUP BY jahr, monat
+        ORDER BY jahr, monat
     """
     with get_connection() as conn:
         cur = conn.cursor()
@@ -115,20 +95,9 @@ def fetch_time_series(year=None, month=None):
 
 
 def fetch_einzahlungen_by_iban(year=None, month=None):
-    where = ["haben > 0", "gegen_iban IS NOT NULL", "gegen_iban != ''"]
-    params = []
-    if year:
-        where.append("YEAR(datum) = %s")
-        params.append(year)
-    if month:
-        if isinstance(month, list):
-            placeholders = ",".join(["%s"] * len(month))
-            where.append(f"MONTH(datum) IN ({placeholders})")
-            params.extend(month)
-        else:
-            where.append("MONTH(datum) = %s")
-            params.append(month)
-    where_sql = f"WHERE {' AND '.join(where)}"
+    where_sql, params = compile_filters(
+        year, month, extra=["haben > 0", "gegen_iban IS NOT NULL", "gegen_iban != ''"]
+    )
     sql = f"""
         SELECT gegen_iban,
                SUM(haben) AS total_haben
@@ -181,73 +150,140 @@ def fetch_konten_details():
         ]
 
 
-def fetch_buchungen(year=None, month=None, page=1, per_page=30, konto=None, kategorie2_filter=None, kategorie_filter=None, beschreibung_filter=None):
-    where = []
-    params = []
-    if year:
-        where.append("YEAR(datum) = %s")
-        params.append(year)
-    if month:
-        if isinstance(month, list):
-            placeholders = ",".join(["%s"] * len(month))
-            where.append(f"MONTH(datum) IN ({placeholders})")
-            params.extend(month)
+# Zwischenspeicher für Trefferanzahlen: {(where_sql, params): (data_version, anzahl)}
+# Schreibpfade erhöhen data_version (services/rollup.py), wodurch Einträge verfallen.
+_COUNT_CACHE = {}
+_COUNT_CACHE_LOCK = threading.Lock()
+_COUNT_CACHE_MAX = 512
+
+
+def _count_buchungen(cur, where_sql, params):
+    """Anzahl der gefilterten Buchungen, zwischengespeichert je Filter und Datenstand."""
+    cur.execute("SELECT version FROM data_version WHERE id = 1")
+    row = cur.fetchone()
+    version = row[0] if row else None
+    key = (where_sql, tuple(str(p) for p in params))
+
+    with _COUNT_CACHE_LOCK:
+        cached = _COUNT_CACHE.get(key)
+    if cached and version is not None and cached[0] == version:
+        return cached[1]
+
+    cur.execute(f"SELECT COUNT(*) FROM buchungen {where_sql}", params)
+    total = cur.fetchone()[0]
+    if version is not None:
+        with _COUNT_CACHE_LOCK:
+            if len(_COUNT_CACHE) >= _COUNT_CACHE_MAX:
+                _COUNT_CACHE.clear()
+            _COUNT_CACHE[key] = (version, total)
+    return total
+
+
+def encode_cursor(buchung, direction):
+    """
+    Erzeugt ein undurchsichtiges Cursor-Token für die Keyset-Pagination.
+
+    Args:
+        buchung: Dict mit "datum" und "id" (erste bzw. letzte Buchung der Seite)
+        direction: "next" (ältere Buchungen) oder "prev" (neuere Buchungen)
+    """
+    payload = {"d": buchung["datum"].isoformat(), "i": int(buchung["id"]), "r": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Liest ein Cursor-Token; gibt (datum, id, direction) oder None bei ungültigem Token zurück."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        direction = payload["r"]
+        if direction not in ("next", "prev"):
+            return None
+        return date.fromisoformat(payload["d"]), int(payload["i"]), direction
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def page_cursors(buchungen):
+    """Cursor-Tokens (zurück, weiter) für eine Seite von Buchungen."""
+    if not buchungen:
+        return None, None
+    return encode_cursor(buchungen[0], "prev"), encode_cursor(buchungen[-1], "next")
+
+
+def fetch_buchungen(year=None, month=None, page=1, per_page=30, konto=None, kategorie2_filter=None, kategorie_filter=None, beschreibung_filter=None, cursor=None):
+    """
+    Holt eine Seite gefilterter Buchungen (neueste zuerst).
+
+    Mit ``cursor`` (Token aus page_cursors) wird per Keyset-Pagination ab der
+    Position des Tokens gesucht, statt per OFFSET zu überspringen – jede Seite
+    kostet dann etwa so viel wie die erste. Ohne Cursor wird ``page`` per OFFSET
+    angesprungen.
+    """
+    where_sql, params = compile_filters(
+        year,
+        month,
+        konto=konto,
+        kategorie=kategorie_filter,
+        kategorie2=kategorie2_filter,
+        beschreibung=beschreibung_filter,
+        search_mode=get_search_mode() if beschreibung_filter else "like",
+    )
+
+    seek = decode_cursor(cursor)
+    if seek:
+        seek_datum, seek_id, direction = seek
+        if direction == "next":
+            seek_sql = "datum <= %s AND (datum < %s OR id < %s)"
+            order_sql = "datum DESC, id DESC"
         else:
-            where.append("MONTH(datum) = %s")
-            params.append(month)
-    if konto:
-        where.append("konto = %s")
-        params.append(konto)
-    if kategorie_filter:
-        where.append("kategorie = %s")
-        params.append(kategorie_filter)
-    if kategorie2_filter:
-        where.append("kategorie2 LIKE %s")
-        params.append(f"%{kategorie2_filter}%")
-    if beschreibung_filter:
-        where.append("beschreibung LIKE %s")
-        params.append(f"%{beschreibung_filter}%")
-    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
-    
-    # Gesamtanzahl
-    count_sql = f"SELECT COUNT(*) FROM buchungen {where_sql}"
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(count_sql, params)
-        total = cur.fetchone()[0]
-        cur.close()
-    
-    # Buchungen mit Pagination
-    offset = (page - 1) * per_page
+            seek_sql = "datum >= %s AND (datum > %s OR id > %s)"
+            order_sql = "datum ASC, id ASC"
+        page_where = f"{where_sql} AND {seek_sql}" if where_sql else f"WHERE {seek_sql}"
+        page_params = params + [seek_datum, seek_datum, seek_id, per_page]
+        limit_sql = "LIMIT %s"
+    else:
+        order_sql = "datum DESC, id DESC"
+        page_where = where_sql
+        page_params = params + [per_page, (page - 1) * per_page]
+        limit_sql = "LIMIT %s OFFSET %s"
+
     sql = f"""
         SELECT id, datum, art, beschreibung, soll, haben, kategorie, kategorie2, konto
         FROM buchungen
-        {where_sql}
-        ORDER BY datum DESC, id DESC
-        LIMIT %s OFFSET %s
+        {page_where}
+        ORDER BY {order_sql}
+        {limit_sql}
     """
-    params_with_pagination = params + [per_page, offset]
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute(sql, params_with_pagination)
+        # Gesamtanzahl
+        total = _count_buchungen(cur, where_sql, params)
+        # Buchungen der Seite
+        cur.execute(sql, page_params)
         rows = cur.fetchall()
         cur.close()
-        buchungen = [
-            {
-                "id": r[0],
-                "datum": r[1],
-                "art": r[2] or "",
-                "beschreibung": r[3] or "",
-                "soll": float(r[4] or 0),
-                "haben": float(r[5] or 0),
-                "kategorie": r[6] or "",
-                "kategorie2": r[7] or "",
-                "konto": r[8] or "",
-            }
-            for r in rows
-        ]
 
-    
+    if seek and seek[2] == "prev":
+        rows.reverse()
+    buchungen = [
+        {
+            "id": r[0],
+            "datum": r[1],
+            "art": r[2] or "",
+            "beschreibung": r[3] or "",
+            "soll": float(r[4] or 0),
+            "haben": float(r[5] or 0),
+            "kategorie": r[6] or "",
+            "kategorie2": r[7] or "",
+            "konto": r[8] or "",
+        }
+        for r in rows
+    ]
+
     total_pages = math.ceil(total / per_page) if total > 0 else 1
     return buchungen, total, total_pages
 
@@ -257,7 +293,7 @@ def fetch_total_saldo():
     with get_connection() as conn:
         cur = conn.cursor()
         cur.execute(
-            "SELECT COALESCE(SUM(IFNULL(haben,0) - IFNULL(soll,0)), 0) AS saldo FROM buchungen"
+            "SELECT COALESCE(SUM(haben_sum - soll_sum), 0) AS saldo FROM buchungen_monatlich"
         )
         row = cur.fetchone()
         cur.close()
@@ -279,66 +315,32 @@ def fetch_analysis_data(year, month, konto=None, kategorie_filter=None, compare_
         compare_year = str(compare_year)
     
     # Aktuelles Jahr
-    where_current = []
-    params_current = []
-    if year:
-        where_current.append("YEAR(datum) = %s")
-        params_current.append(year)
-    if month:
-        if isinstance(month, list):
-            placeholders = ",".join(["%s"] * len(month))
-            where_current.append(f"MONTH(datum) IN ({placeholders})")
-            params_current.extend(month)
-        else:
-            where_current.append("MONTH(datum) = %s")
-            params_current.append(month)
-    if konto:
-        where_current.append("konto = %s")
-        params_current.append(konto)
-    if kategorie_filter:
-        where_current.append("kategorie = %s")
-        params_current.append(kategorie_filter)
-    where_sql_current = f"WHERE {' AND '.join(where_current)}" if where_current else ""
+    where_sql_current, params_current = compile_rollup_filters(
+        year, month, konto=konto, kategorie=kategorie_filter
+    )
     
     # Vergleichsjahr (gleiche Monate) - nur wenn angegeben
-    where_previous = []
-    params_previous = []
-    if compare_year:
-        where_previous.append("YEAR(datum) = %s")
-        params_previous.append(compare_year)
-    if month:
-        if isinstance(month, list):
-            placeholders = ",".join(["%s"] * len(month))
-            where_previous.append(f"MONTH(datum) IN ({placeholders})")
-            params_previous.extend(month)
-        else:
-            where_previous.append("MONTH(datum) = %s")
-            params_previous.append(month)
-    if konto:
-        where_previous.append("konto = %s")
-        params_previous.append(konto)
-    if kategorie_filter:
-        where_previous.append("kategorie = %s")
-        params_previous.append(kategorie_filter)
-    where_sql_previous = f"WHERE {' AND '.join(where_previous)}" if where_previous else ""
+    where_sql_previous, params_previous = compile_rollup_filters(
+        compare_year, month, konto=konto, kategorie=kategorie_filter
+    )
     
     # Gesamtwerte aktuelles Jahr
     sql_current = f"""
         SELECT 
-            SUM(haben) AS total_haben,
-            SUM(soll) AS total_soll,
-            SUM(haben - soll) AS cashflow
-        FROM buchungen
+            SUM(haben_sum) AS total_haben,
+            SUM(soll_sum) AS total_soll,
+            SUM(haben_sum - soll_sum) AS cashflow
+        FROM buchungen_monatlich
         {where_sql_current}
     """
     
     # Gesamtwerte Vergleichsjahr
     sql_previous = f"""
         SELECT 
-            SUM(haben) AS total_haben,
-            SUM(soll) AS total_soll,
-            SUM(haben - soll) AS cashflow
-        FROM buchungen
+            SUM(haben_sum) AS total_haben,
+            SUM(soll_sum) AS total_soll,
+            SUM(haben_sum - soll_sum) AS cashflow
+        FROM buchungen_monatlich
         {where_sql_previous}
     """
     
@@ -346,9 +348,9 @@ def fetch_analysis_data(year, month, konto=None, kategorie_filter=None, compare_
     sql_cat_current = f"""
         SELECT 
             kategorie,
-            SUM(haben) AS haben_sum,
-            SUM(soll) AS soll_sum
-        FROM buchungen
+            SUM(haben_sum) AS haben_sum,
+            SUM(soll_sum) AS soll_sum
+        FROM buchungen_monatlich
         {where_sql_current}
         GROUP BY kategorie
         ORDER BY kategorie
@@ -358,9 +360,9 @@ def fetch_analysis_data(year, month, konto=None, kategorie_filter=None, compare_
     sql_cat_previous = f"""
         SELECT 
             kategorie,
-            SUM(haben) AS haben_sum,
-            SUM(soll) AS soll_sum
-        FROM buchungen
+            SUM(haben_sum) AS haben_sum,
+            SUM(soll_sum) AS soll_sum
+        FROM buchungen_monatlich
         {where_sql_previous}
         GROUP BY kategorie
         ORDER BY kategorie
@@ -369,27 +371,27 @@ def fetch_analysis_data(year, month, konto=None, kategorie_filter=None, compare_
     # Monatliche Zeitreihe aktuelles Jahr
     sql_ts_current = f"""
         SELECT 
-            MONTH(datum) AS month_num,
-            SUM(haben) AS haben_sum,
-            SUM(soll) AS soll_sum,
-            SUM(haben - soll) AS cashflow
-        FROM buchungen
+            monat AS month_num,
+            SUM(haben_sum) AS haben_sum,
+            SUM(soll_sum) AS soll_sum,
+            SUM(haben_sum - soll_sum) AS cashflow
+        FROM buchungen_monatlich
         {where_sql_current}
-        GROUP BY MONTH(datum)
-        ORDER BY MONTH(datum)
+        GROUP BY monat
+        ORDER BY monat
     """
     
     # Monatliche Zeitreihe Vergleichsjahr
     sql_ts_previous = f"""
         SELECT 
-            MONTH(datum) AS month_num,
-            SUM(haben) AS haben_sum,
-            SUM(soll) AS soll_sum,
-            SUM(haben - soll) AS cashflow
-        FROM buchungen
+            monat AS month_num,
+            SUM(haben_sum) AS haben_sum,
+            SUM(soll_sum) AS soll_sum,
+            SUM(haben_sum - soll_sum) AS cashflow
+        FROM buchungen_monatlich
         {where_sql_previous}
-        GROUP BY MONTH(datum)
-        ORDER BY MONTH(datum)
+        GROUP BY monat
+        ORDER BY monat
     """
     
     with get_connection() as conn:
@@ -0,0 +1,104 @@
+"""Streaming-CSV-Export von Buchungen."""
+import csv
+import zlib
+from datetime import datetime, date
+from io import StringIO
+
+import mysql.connector
+from flask import request, Response
+
+from db import connect
+
+
+# Anzahl Zeilen, die je Runde vom Server geholt und als CSV ausgegeben werden
+EXPORT_BATCH_SIZE = 1000
+
+
+def format_datum(value, fmt="%d.%m.%Y"):
+    """Formatiert ein Datum für den CSV-Export (deutsches Format)."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime(fmt)
+    return str(value) if value is not None else ""
+
+
+def format_betrag(value):
+    """Formatiert einen Betrag mit Komma als Dezimaltrennzeichen."""
+    return f"{float(value or 0):.2f}".replace(".", ",")
+
+
+def stream_csv(sql, params, header, format_row, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Führt die Abfrage aus und liefert das Ergebnis stückweise als CSV-Text.
+
+    Der Cursor ist ungepuffert: Zeilen werden in Blöcken von ``batch_size``
+    vom Server geholt, sodass der Speicherverbrauch unabhängig von der
+    Ergebnisgröße bleibt. Die Kopfzeile wird sofort ausgegeben.
+
+    Der Download nutzt eine eigene, ungepoolte Verbindung: langsame Clients
+    belegen so keinen Platz im Pool der Web-App, und bei einem Abbruch wird
+    die Verbindung geschlossen statt die restlichen Zeilen zu lesen.
+
+    Args:
+        sql, params: Abfrage und Parameter
+        header: Liste der Spaltenüberschriften
+        format_row: Funktion, die eine DB-Zeile in eine CSV-Zeile (Liste) umwandelt
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow(header)
+    yield buffer.getvalue()
+
+    conn = connect()
+    cur = conn.cursor(buffered=False)
+    try:
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            buffer.seek(0)
+            buffer.truncate(0)
+            for row in rows:
+                writer.writerow(format_row(row))
+            yield buffer.getvalue()
+    finally:
+        try:
+            cur.close()
+        except mysql.connector.Error:
+            # Bei Abbruch des Downloads sind noch Zeilen ungelesen und close()
+            # meldet "Unread result found"; das würde den GeneratorExit überdecken
+            pass
+        finally:
+            if conn.unread_result:
+                # Nicht leerlesen: Socket schließen, der Server bricht die Abfrage ab
+                conn.shutdown()
+            else:
+                conn.close()
+
+
+def gzip_stream(chunks, level=6):
+    """Komprimiert einen Text-Stream im gzip-Format, ohne ihn zwischenzuspeichern."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        # Nach jedem Block ausgeben, damit der Client sofort Daten erhält
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_download_response(chunks, filename):
+    """
+    Liefert einen CSV-Stream als Download aus.
+
+    Akzeptiert der Client gzip, wird der Stream beim Senden komprimiert.
+    """
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Vary": "Accept-Encoding",
+    }
+    if "gzip" in request.accept_encodings:
+        headers["Content-Encoding"] = "gzip"
+        chunks = gzip_stream(chunks)
+    return Response(chunks, content_type="text/csv; charset=utf-8", headers=headers)
@@ -0,0 +1,301 @@
+"""
+Hintergrund-Jobs im Webprozess (CSV-Import, Kategorieabgleich, Paperless-Upload).
+
+Jobs laufen in einem Thread-Pool des laufenden Webprozesses – ohne neuen
+Python-Interpreter und ohne den HTTP-Request zu blockieren. Status,
+Fortschritt und Ergebnis stehen in der Tabelle jobs (Migration 008) und
+können über /jobs/<id> abgefragt werden.
+
+Paperless-Uploads laufen in einer eigenen Warteschlange, damit sie weder auf
+einen CSV-Import warten noch ihn aufhalten.
+
+Konfiguration (config.json, optional):
+    "JOBS": {"workers": 1}
+"""
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from db import get_connection
+from utils.helpers import load_config
+
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+DEFAULT_WORKERS = 1
+
+QUEUE_DEFAULT = "default"
+QUEUE_PAPERLESS = "paperless"
+
+# Job-Arten mit eigener Warteschlange (eigener Thread-Pool mit einem Thread)
+JOB_QUEUES = {"paperless": QUEUE_PAPERLESS}
+
+# Mindestabstand zwischen zwei Fortschrittsmeldungen in der Datenbank (Sekunden)
+PROGRESS_INTERVAL = 0.5
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+# Platzhalter für "aktueller Zeitpunkt der Datenbank" in _update
+_NOW = object()
+
+
+def load_jobs_config():
+    """Liest die Job-Konfiguration ("JOBS") aus config.json."""
+    jobs_config = load_config().get("JOBS", {})
+    return {"workers": max(1, int(jobs_config.get("workers", DEFAULT_WORKERS)))}
+
+
+def _get_executor(queue=QUEUE_DEFAULT):
+    executor = _executors.get(queue)
+    if executor is None:
+        with _executor_lock:
+            if not _executors:
+                _mark_interrupted()
+            executor = _executors.get(queue)
+            if executor is None:
+                workers = load_jobs_config()["workers"] if queue == QUEUE_DEFAULT else 1
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"job-{queue}")
+                _executors[queue] = executor
+    return executor
+
+
+def _mark_interrupted():
+    """Jobs eines früheren Prozesses, die nie beendet wurden, als fehlgeschlagen markieren."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            UPDATE jobs
+            SET status = %s, message = %s, finished_at = NOW()
+            WHERE status IN (%s, %s)
+            """,
+            (STATUS_FAILED, "Abgebrochen (Anwendung wurde neu gestartet)", STATUS_QUEUED, STATUS_RUNNING),
+        )
+        conn.commit()
+        cur.close()
+
+
+def _update(job_id, **fields):
+    assignments = ", ".join(
+        f"{column} = NOW()" if value is _NOW else f"{column} = %s"
+        for column, value in fields.items()
+    )
+    params = [value for value in fields.values() if value is not _NOW]
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"UPDATE jobs SET {assignments} WHERE id = %s", params + [job_id])
+        conn.commit()
+        cur.close()
+
+
+class JobProgress:
+    """
+    Fortschrittsmeldung eines laufenden Jobs; wird der Job-Funktion als
+    erstes Argument übergeben: progress(prozent, nachricht).
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def __call__(self, percent, message=None):
+        now = time.monotonic()
+        if now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        fields = {"progress": max(0, min(100, int(percent)))}
+        if message is not None:
+            fields["message"] = str(message)[:255]
+        _update(self.job_id, **fields)
+
+
+def _run(job_id, fn, args, kwargs):
+    try:
+        _update(job_id, status=STATUS_RUNNING, started_at=_NOW)
+        result = fn(JobProgress(job_id), *args, **kwargs) or {}
+        _update(
+            job_id,
+            status=STATUS_DONE,
+            progress=100,
+            message=str(result.get("message", ""))[:255] or None,
+            result=json.dumps(result, default=str),
+            finished_at=_NOW,
+        )
+    except Exception as exc:
+        print(f"❌ Job {job_id} fehlgeschlagen: {exc}")
+        print(traceback.format_exc())
+        try:
+            _update(
+                job_id,
+                status=STATUS_FAILED,
+                message=str(exc)[:255],
+                result=json.dumps({"error": str(exc)}),
+                finished_at=_NOW,
+            )
+        except Exception:
+            print(traceback.format_exc())
+
+
+def submit(typ, fn, *args, **kwargs):
+    """
+    Legt einen Job an und startet ihn im Hintergrund.
+
+    Args:
+        typ: Art des Jobs (z.B. "import")
+        fn: Job-Funktion fn(progress, *args, **kwargs) -> Dict (Ergebnis,
+            optional mit "message" als Zusammenfassung)
+
+    Returns:
+        ID des Jobs
+    """
+    executor = _get_executor(JOB_QUEUES.get(typ, QUEUE_DEFAULT))
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO jobs (typ, status) VALUES (%s, %s)", (typ, STATUS_QUEUED))
+        job_id = cur.lastrowid
+        conn.commit()
+        cur.close()
+    executor.submit(_run, job_id, fn, args, kwargs)
+    return job_id
+
+
+def _format_timestamp(value):
+    return value.isoformat() if value is not None else None
+
+
+def get_job(job_id):
+    """Status eines Jobs als Dict oder None, falls unbekannt."""
+    # Stellt sicher, dass Jobs eines früheren Prozesses nicht ewig als laufend gelten
+    _get_executor()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT id, typ, status, progress, message, result, created_at, started_at, finished_at
+            FROM jobs
+            WHERE id = %s
+            """,
+            (job_id,),
+        )
+        row = cur.fetchone()
+        cur.close()
+    if row is None:
+        return None
+
+    result = None
+    if row[5]:
+        try:
+            result = json.loads(row[5])
+        except ValueError:
+            result = None
+    return {
+        "id": row[0],
+        "typ": row[1],
+        "status": row[2],
+        "progress": int(row[3] or 0),
+        "message": row[4],
+        "result": result,
+        "created_at": _format_timestamp(row[6]),
+        "started_at": _format_timestamp(row[7]),
+        "finished_at": _format_timestamp(row[8]),
+        "finished": row[2] in (STATUS_DONE, STATUS_FAILED),
+    }
+
+
+# =============================
+# Job-Funktionen
+# =============================
+def import_job(progress, force=False):
+    """
+    CSV-Dateien aus import/ einlesen.
+
+    Args:
+        force: ohne Import-Ledger (bereits importierte Dateien und Zeiträume
+            erneut einlesen; Duplikate verhindert weiterhin dedupe_hash)
+    """
+    from ingest.pipeline import import_directory, load_import_options
+
+    overrides = {"use_ledger": False} if force else {}
+    result = import_directory(
+        options=load_import_options(delete_files=True, progress=progress, source="web", **overrides)
+    ).to_dict()
+
+    failed = [os.path.basename(path) for path in result["failed_files"]]
+    if not result["files"]:
+        result["message"] = "Keine CSV-Dateien zum Importieren gefunden."
+    elif len(result["skipped_files"]) == len(result["files"]):
+        result["message"] = "Die Datei(en) wurden bereits importiert."
+    elif result["imported"] > 0:
+        result["message"] = f"{result['imported']} Buchung(en) wurden importiert."
+    else:
+        result["message"] = "Keine neuen Buchungen gefunden (möglicherweise Duplikate)."
+    if failed:
+        result["message"] += f" Fehler bei: {', '.join(failed)}"
+    return result
+
+
+def recategorize_job(progress, incremental=False):
+    """Kategorien der Buchungen neu bestimmen."""
+    from services.recategorize import recategorize
+
+    progress(0, "Kategorien werden neu bestimmt")
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            result = recategorize(cur, incremental=incremental)
+            conn.commit()
+        finally:
+            cur.close()
+    result["message"] = (
+        f"Kategorien wurden neu geladen: {result['updated']} von {result['checked']} "
+        f"geprüften Buchungen aktualisiert."
+    )
+    return result
+
+
+def paperless_job(progress):
+    """Fällige Belege der Outbox an Paperless senden."""
+    from services.outbox import send_pending
+
+    result = send_pending(progress=progress)
+    if result is None:
+        return {"message": "Paperless ist nicht konfiguriert."}
+    if result["busy"]:
+        result["message"] = "Belege werden bereits gesendet."
+        return result
+    result["message"] = f"{result['sent']} Beleg(e) an Paperless gesendet."
+    if result["retry"]:
+        result["message"] += f" {result['retry']} werden später erneut versucht."
+    if result["failed"]:
+        result["message"] += f" {result['failed']} endgültig fehlgeschlagen."
+    return result
+
+
+def submit_import(force=False):
+    """Startet den CSV-Import und – unabhängig davon – den Upload offener Belege."""
+    job_id = submit("import", import_job, force=force)
+    wake_paperless()
+    return job_id
+
+
+def submit_paperless():
+    return submit("paperless", paperless_job)
+
+
+def wake_paperless():
+    """Weckt den Outbox-Dispatcher; läuft keiner, wird ein Paperless-Job gestartet."""
+    from services import outbox
+
+    if not outbox.notify():
+        submit_paperless()
+
+
+def submit_recategorize(incremental=False):
+    return submit("kategorien", recategorize_job, incremental=incremental)
@@ -0,0 +1,460 @@
+"""
+Warteschlange (Outbox) für den Upload von Belegen an Paperless.
+
+Jeder Beleg in image/ wird in der Tabelle paperless_outbox (Migration 011)
+vermerkt – mit Anzahl der Versuche, letztem Fehler und Zeitpunkt des
+nächsten Versuchs. Fehlgeschlagene Uploads werden mit wachsendem Abstand
+wiederholt, dauerhaft abgelehnte (z.B. HTTP 400) nicht mehr. Ist das Ergebnis
+eines Uploads unbekannt (Abbruch nach dem Senden), wird der Beleg vor dem
+nächsten Versuch in Paperless gesucht statt sofort erneut gesendet
+(Migration 015).
+
+Der OutboxDispatcher läuft als Thread im Webprozess: die Upload-Route trägt
+neue Belege ein und weckt ihn, zusätzlich beobachtet er image/ per inotify
+(optionales Paket inotify_simple) bzw. prüft sonst in kurzen Abständen den
+Änderungszeitpunkt des Ordners. Der Ordner wird nur beim Start und nach
+einer Änderung neu eingelesen, nicht bei jedem Durchlauf.
+
+import_data.py (Timer) leert die Outbox zusätzlich, falls die Weboberfläche
+nicht läuft. Ein MySQL-Lock stellt sicher, dass nur ein Prozess sendet.
+"""
+import os
+import threading
+import traceback
+
+from db import get_connection
+from services.paperless import (
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    DEFAULT_WORKERS,
+    IMAGE_DIR,
+    IMAGE_EXTENSIONS,
+    PaperlessUploader,
+    RETRY_STATUS,
+    list_images,
+    load_paperless_config,
+)
+
+try:
+    import inotify_simple
+except ImportError:  # optional, ohne inotify wird der Ordner abgefragt
+    inotify_simple = None
+
+
+OUTBOX_TABLE = "paperless_outbox"
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+# Verhindert, dass zwei Prozesse gleichzeitig senden (Webprozess und Timer)
+OUTBOX_LOCK = "haushaltsbuch_paperless_outbox"
+
+# Nach so vielen fehlgeschlagenen Versuchen wird ein Beleg aufgegeben
+MAX_ATTEMPTS = 10
+
+# Abstand bis zum nächsten Versuch (Sekunden): RETRY_BASE * 2^(Versuche-1), höchstens RETRY_MAX
+RETRY_BASE = 60
+RETRY_MAX = 6 * 3600
+
+# Frühester erneuter Versuch nach unbekanntem Ergebnis (Paperless verarbeitet Belege asynchron)
+UNKNOWN_DELAY = 15 * 60
+
+# Abfrageintervall des Ordners ohne inotify und längste Ruhezeit des Dispatchers (Sekunden)
+POLL_INTERVAL = 5
+IDLE_INTERVAL = 300
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def enqueue(cur, filename, title=None):
+    """
+    Trägt einen Beleg (Dateiname in image/) in die Outbox ein; bekannte werden
+    ignoriert. Gibt True zurück, wenn der Beleg neu ist.
+    """
+    cur.execute(
+        f"INSERT IGNORE INTO {OUTBOX_TABLE} (filename, title) VALUES (%s, %s)",
+        (filename, title),
+    )
+    return cur.rowcount > 0
+
+
+def requeue_failed(cur, filename):
+    """Reiht einen endgültig fehlgeschlagenen Beleg erneut ein; True, wenn er fehlgeschlagen war."""
+    cur.execute(
+        f"""
+        UPDATE {OUTBOX_TABLE}
+        SET status = %s, attempts = 0, last_error = NULL, next_attempt_at = NOW()
+        WHERE filename = %s AND status = %s
+        """,
+        (STATUS_PENDING, filename, STATUS_FAILED),
+    )
+    return cur.rowcount > 0
+
+
+def register_directory(cur, image_dir=IMAGE_DIR):
+    """Trägt alle Belege aus image/ ein, die noch nicht in der Outbox stehen."""
+    filenames = [os.path.basename(path) for path in list_images(image_dir)]
+    if not filenames:
+        return 0
+    cur.executemany(
+        f"INSERT IGNORE INTO {OUTBOX_TABLE} (filename) VALUES (%s)",
+        [(filename,) for filename in filenames],
+    )
+    return max(0, cur.rowcount)
+
+
+def _due(cur, limit):
+    cur.execute(
+        f"""
+        SELECT id, filename, title, attempts, outcome_unknown
+        FROM {OUTBOX_TABLE}
+        WHERE status = %s AND next_attempt_at <= NOW()
+        ORDER BY next_attempt_at, id
+        LIMIT %s
+        """,
+        (STATUS_PENDING, limit),
+    )
+    return cur.fetchall()
+
+
+def _count_due(cur):
+    cur.execute(
+        f"SELECT COUNT(*) FROM {OUTBOX_TABLE} WHERE status = %s AND next_attempt_at <= NOW()",
+        (STATUS_PENDING,),
+    )
+    return cur.fetchone()[0]
+
+
+def seconds_until_due(cur):
+    """Sekunden bis zum nächsten fälligen Beleg oder None, wenn keiner wartet."""
+    cur.execute(
+        f"""
+        SELECT GREATEST(0, TIMESTAMPDIFF(SECOND, NOW(), MIN(next_attempt_at)))
+        FROM {OUTBOX_TABLE}
+        WHERE status = %s
+        """,
+        (STATUS_PENDING,),
+    )
+    row = cur.fetchone()
+    return None if row is None or row[0] is None else int(row[0])
+
+
+def retry_delay(attempts):
+    """Wartezeit (Sekunden) nach dem attempts-ten fehlgeschlagenen Versuch."""
+    return min(RETRY_BASE * (2 ** max(0, attempts - 1)), RETRY_MAX)
+
+
+def _delay(attempts, file_result):
+    """Wartezeit bis zum nächsten Versuch; bei unbekanntem Ergebnis mindestens UNKNOWN_DELAY."""
+    delay = retry_delay(attempts)
+    return max(delay, UNKNOWN_DELAY) if file_result.get("unknown") else delay
+
+
+def _record(cur, outbox_id, attempts, file_result):
+    if file_result["sent"]:
+        cur.execute(
+            f"""
+            UPDATE {OUTBOX_TABLE}
+            SET status = %s, attempts = %s, last_error = NULL, outcome_unknown = 0, sent_at = NOW()
+            WHERE id = %s
+            """,
+            (STATUS_SENT, attempts, outbox_id),
+        )
+        return STATUS_SENT
+
+    status = file_result["status"]
+    permanent = (status is not None and status not in RETRY_STATUS) or file_result.get("missing")
+    new_status = STATUS_FAILED if permanent or attempts >= MAX_ATTEMPTS else STATUS_PENDING
+    cur.execute(
+        f"""
+        UPDATE {OUTBOX_TABLE}
+        SET status = %s, attempts = %s, last_error = %s, outcome_unknown = %s,
+            next_attempt_at = NOW() + INTERVAL %s SECOND
+        WHERE id = %s
+        """,
+        (
+            new_status,
+            attempts,
+            (file_result["error"] or "")[:500],
+            bool(file_result.get("unknown")),
+            _delay(attempts, file_result),
+            outbox_id,
+        ),
+    )
+    return new_status
+
+
+def _check_unknown(uploader, path):
+    """
+    Sucht einen Beleg mit unbekanntem Upload-Ergebnis in Paperless.
+
+    Returns:
+        Ergebnis-Dict wie PaperlessUploader.upload, wenn der Beleg angekommen
+        ist oder Paperless nicht antwortet; None, wenn er erneut zu senden ist
+    """
+    result = {
+        "file": os.path.basename(path),
+        "sent": False,
+        "unknown": True,
+        "status": None,
+        "attempts": 0,
+        "error": None,
+        "seconds": 0.0,
+    }
+    try:
+        if uploader.find_document(path):
+            result.update(sent=True, unknown=False)
+            return result
+    except Exception as e:
+        result["error"] = f"Ergebnis des letzten Uploads unbekannt, Prüfung fehlgeschlagen: {e}"
+        return result
+    return None
+
+
+def drain(progress=None, image_dir=IMAGE_DIR, config=None):
+    """
+    Sendet alle fälligen Belege der Outbox; gesendete Dateien werden gelöscht.
+
+    Returns:
+        Dict mit sent, failed (aufgegeben), retry (später erneut), files
+        (Ergebnis je Datei) und busy (ein anderer Prozess sendet gerade) oder
+        None, wenn Paperless nicht konfiguriert ist
+    """
+    config = config or load_paperless_config()
+    if config is None:
+        return None
+
+    result = {"sent": 0, "failed": 0, "retry": 0, "files": [], "busy": False}
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT GET_LOCK(%s, 0)", (OUTBOX_LOCK,))
+            if not cur.fetchone()[0]:
+                result["busy"] = True
+                return result
+            try:
+                with PaperlessUploader(
+                    config["url"],
+                    config["token"],
+                    document_type_id=config.get("document_type_id"),
+                    workers=config.get("workers", DEFAULT_WORKERS),
+                    retries=config.get("retries", DEFAULT_RETRIES),
+                    timeout=config.get("timeout", DEFAULT_TIMEOUT),
+                ) as uploader:
+                    _drain(conn, cur, uploader, image_dir, result, progress)
+            finally:
+                cur.execute("SELECT RELEASE_LOCK(%s)", (OUTBOX_LOCK,))
+                cur.fetchone()
+        finally:
+            cur.close()
+    return result
+
+
+def send_pending(progress=None, image_dir=IMAGE_DIR):
+    """
+    Trägt die Belege aus image/ ein und leert anschließend die Outbox
+    (für import_data.py und den Paperless-Job, ohne laufenden Dispatcher).
+    """
+    config = load_paperless_config()
+    if config is None:
+        print("\n📸 Paperless-Konfiguration nicht gefunden, überspringe Bild-Upload")
+        return None
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            register_directory(cur, image_dir)
+            conn.commit()
+        finally:
+            cur.close()
+    result = drain(progress=progress, image_dir=image_dir, config=config)
+    if result["busy"]:
+        print("\n📸 Belege werden bereits von einem anderen Prozess gesendet")
+    elif not result["files"] and not result["failed"]:
+        print("\n📸 Keine fälligen Belege in der Outbox")
+    return result
+
+
+def _drain(conn, cur, uploader, image_dir, result, progress):
+    from services.receipts import optimize_image
+
+    total = _count_due(cur)
+    while True:
+        rows = _due(cur, uploader.workers * 4)
+        if not rows:
+            return
+        entries = {}
+        checked = []
+        for outbox_id, filename, title, attempts, unknown in rows:
+            path = os.path.join(image_dir, filename)
+            if not os.path.exists(path):
+                status = _record(cur, outbox_id, attempts + 1, {
+                    "sent": False, "status": None, "missing": True, "error": "Datei nicht gefunden",
+                })
+                result["failed"] += status == STATUS_FAILED
+                print(f"⚠️  {filename} nicht mehr in image/ vorhanden")
+                continue
+            entries[path] = (outbox_id, attempts + 1, title)
+            if unknown:
+                # Nicht blind erneut senden: erst prüfen, ob der Beleg angekommen ist
+                file_result = _check_unknown(uploader, path)
+                if file_result is not None:
+                    checked.append((path, file_result))
+        conn.commit()
+
+        def on_result(path, file_result):
+            outbox_id, attempts, _title = entries[path]
+            status = _record(cur, outbox_id, attempts, file_result)
+            conn.commit()
+            name = file_result["file"]
+            if status == STATUS_SENT:
+                result["sent"] += 1
+                try:
+                    os.remove(path)
+                    print(f"✅ {name} erfolgreich gesendet und gelöscht")
+                except Exception as e:
+                    print(f"⚠️  {name} gesendet, aber konnte nicht gelöscht werden: {e}")
+            elif status == STATUS_FAILED:
+                result["failed"] += 1
+                print(f"❌ {name} endgültig fehlgeschlagen nach {attempts} Versuch(en): {file_result['error']}")
+            elif file_result.get("unknown"):
+                result["retry"] += 1
+                print(
+                    f"⚠️  {name}: Ergebnis unbekannt, Prüfung in Paperless in "
+                    f"{_delay(attempts, file_result)}s: {file_result['error']}"
+                )
+            else:
+                result["retry"] += 1
+                print(f"⚠️  {name} fehlgeschlagen, neuer Versuch in {retry_delay(attempts)}s: {file_result['error']}")
+            if progress:
+                done = result["sent"] + result["failed"] + result["retry"]
+                progress(min(99, int(done * 100 / max(total, done))), f"{done} von {max(total, done)} Beleg(en) verarbeitet")
+
+        for path, file_result in checked:
+            on_result(path, file_result)
+            result["files"].append(file_result)
+            del entries[path]
+        if not entries:
+            continue
+        print(f"\n📸 {len(entries)} Beleg(e) aus der Outbox, sende an Paperless...")
+        result["files"].extend(uploader.upload_many(
+            list(entries),
+            on_result=on_result,
+            titles={path: entry[2] for path, entry in entries.items() if entry[2]},
+            prepare=optimize_image,
+        ))
+
+
+def _watch_inotify(image_dir, on_change, stop):
+    flags = inotify_simple.flags
+    inotify = inotify_simple.INotify()
+    try:
+        inotify.add_watch(image_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+        while not stop.is_set():
+            filenames = [
+                event.name for event in inotify.read(timeout=POLL_INTERVAL * 1000)
+                if os.path.splitext(event.name.lower())[1] in IMAGE_EXTENSIONS
+            ]
+            if filenames:
+                on_change(filenames)
+    finally:
+        inotify.close()
+
+
+def _watch_polling(image_dir, on_change, stop):
+    # Nur der Änderungszeitpunkt des Ordners wird abgefragt, eingelesen wird erst nach einer Änderung
+    last_mtime = os.stat(image_dir).st_mtime_ns
+    while not stop.wait(POLL_INTERVAL):
+        mtime = os.stat(image_dir).st_mtime_ns
+        if mtime != last_mtime:
+            last_mtime = mtime
+            on_change(None)
+
+
+class OutboxDispatcher:
+    """
+    Leert die Outbox im Hintergrund, sobald ein neuer Beleg eingetragen wird
+    (wake), sich image/ ändert oder ein Wiederholungszeitpunkt erreicht ist.
+    """
+
+    def __init__(self, image_dir=IMAGE_DIR):
+        self.image_dir = image_dir
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self):
+        os.makedirs(self.image_dir, exist_ok=True)
+        threading.Thread(target=self._run, name="paperless-outbox", daemon=True).start()
+        threading.Thread(target=self._watch, name="paperless-watch", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def _watch(self):
+        watch = _watch_inotify if inotify_simple is not None else _watch_polling
+        try:
+            watch(self.image_dir, self._on_change, self._stop)
+        except Exception as exc:
+            print(f"⚠️  Beobachtung von image/ beendet: {exc}")
+
+    def _on_change(self, filenames):
+        with get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                if filenames is None:
+                    register_directory(cur, self.image_dir)
+                else:
+                    for filename in filenames:
+                        enqueue(cur, filename)
+                conn.commit()
+            finally:
+                cur.close()
+        self.wake()
+
+    def _next_wait(self):
+        with get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                seconds = seconds_until_due(cur)
+            finally:
+                cur.close()
+        return IDLE_INTERVAL if seconds is None else min(seconds, IDLE_INTERVAL)
+
+    def _run(self):
+        try:
+            self._on_change(None)
+        except Exception:
+            print(traceback.format_exc())
+        while not self._stop.is_set():
+            try:
+                result = drain(image_dir=self.image_dir)
+                # Ein anderer Prozess sendet gerade: später erneut prüfen
+                wait = POLL_INTERVAL if result and result["busy"] else self._next_wait()
+            except Exception:
+                print(traceback.format_exc())
+                wait = IDLE_INTERVAL
+            self._wake.wait(wait)
+            self._wake.clear()
+
+
+def start_dispatcher(image_dir=IMAGE_DIR):
+    """Startet den Dispatcher dieses Prozesses (höchstens einmal)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = OutboxDispatcher(image_dir).start()
+    return _dispatcher
+
+
+def notify():
+    """Weckt den Dispatcher dieses Prozesses; False, wenn keiner läuft."""
+    if _dispatcher is None:
+        return False
+    _dispatcher.wake()
+    return True
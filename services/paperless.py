@@ -0,0 +1,260 @@
+"""
+Upload von Belegen (Bilder, PDFs aus image/) an Paperless-ngx.
+
+PaperlessUploader sendet mehrere Dateien gleichzeitig über eine gemeinsame
+requests.Session (Keep-Alive, ein Verbindungspool für alle Threads).
+Fehler beim Verbindungsaufbau und vorübergehende Serverfehler (429, 5xx)
+werden mit exponentiell wachsender Wartezeit wiederholt. Bricht die
+Verbindung erst nach dem Senden ab (z.B. Timeout beim Warten auf die
+Antwort), kann Paperless den Beleg bereits angenommen haben: dann wird nicht
+erneut gesendet, das Ergebnis gilt als unbekannt (find_document prüft es
+später). Für jede Datei wird ein Ergebnis (gesendet, unbekannt, HTTP-Status,
+Versuche, Fehler) geliefert.
+
+Welche Belege wann gesendet werden, regelt die Outbox (services/outbox.py).
+
+Konfiguration (config.json):
+    "PAPERLESS": {"ip": "...", "token": "...", "document_type_id": "",
+                  "workers": 4, "retries": 3, "timeout": 30}
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from utils.helpers import load_config
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_DIR = os.path.join(BASE_DIR, "image")
+
+# Unterstützte Bildformate
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".heic", ".heif", ".pdf"}
+
+UPLOAD_PATH = "/api/documents/post_document/"
+DOCUMENTS_PATH = "/api/documents/"
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 30
+
+# Wartezeit vor dem ersten erneuten Versuch (Sekunden), verdoppelt sich je Versuch
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# HTTP-Status, bei denen ein erneuter Versuch sinnvoll ist
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def load_paperless_config():
+    """
+    Paperless-Konfiguration ("PAPERLESS") aus config.json oder None, wenn
+    Adresse oder Token fehlen.
+    """
+    paperless_config = load_config().get("PAPERLESS", {})
+    if not (paperless_config.get("ip") and paperless_config.get("token")):
+        return None
+    return {
+        "url": paperless_config["ip"],
+        "token": paperless_config["token"],
+        "document_type_id": paperless_config.get("document_type_id") or None,
+        "workers": max(1, int(paperless_config.get("workers", DEFAULT_WORKERS))),
+        "retries": max(0, int(paperless_config.get("retries", DEFAULT_RETRIES))),
+        "timeout": float(paperless_config.get("timeout", DEFAULT_TIMEOUT)),
+    }
+
+
+def _retry_after(response):
+    """Wartezeit aus dem Header Retry-After (nur Sekundenangabe) oder None."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_sent(exc):
+    """
+    True, wenn die Anfrage Paperless sicher nicht erreicht hat (Timeout oder
+    Fehler beim Verbindungsaufbau, z.B. Verbindung abgelehnt).
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = exc.args[0] if exc.args else None
+    # requests verpackt den Fehler von urllib3 in MaxRetryError.reason
+    return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+
+
+class PaperlessUploader:
+    """
+    Sendet Dateien an die Paperless-API.
+
+        uploader = PaperlessUploader("http://paperless:8000", token)
+        results = uploader.upload_many(paths)
+
+    Jedes Ergebnis ist ein Dict mit file, sent, unknown, status, attempts,
+    error und seconds.
+    """
+
+    def __init__(self, url, token, document_type_id=None, workers=DEFAULT_WORKERS,
+                 retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT,
+                 backoff=BACKOFF_BASE, session=None):
+        self.api_url = url.rstrip("/") + UPLOAD_PATH
+        self.documents_url = url.rstrip("/") + DOCUMENTS_PATH
+        self.document_type_id = document_type_id
+        self.workers = max(1, int(workers))
+        self.retries = max(0, int(retries))
+        self.timeout = timeout
+        self.backoff = backoff
+        self.session = session or self._create_session(token)
+
+    def _create_session(self, token):
+        session = requests.Session()
+        session.headers["Authorization"] = f"Token {token}"
+        # Ein Pool mit einer Verbindung je gleichzeitigem Upload
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _post(self, path, title=None):
+        data = {}
+        if self.document_type_id:
+            data["document_type"] = self.document_type_id
+        if title:
+            data["title"] = title
+        with open(path, "rb") as f:
+            return self.session.post(
+                self.api_url,
+                files={"document": (os.path.basename(path), f)},
+                data=data,
+                timeout=self.timeout,
+            )
+
+    def _wait(self, attempt, response=None):
+        delay = _retry_after(response)
+        if delay is None:
+            delay = self.backoff * (2 ** (attempt - 1))
+        time.sleep(min(delay, BACKOFF_MAX))
+
+    def find_document(self, path):
+        """
+        Prüft anhand der MD5-Prüfsumme, ob die Datei bereits als Dokument in
+        Paperless liegt (wirft requests-Fehler, wenn Paperless nicht antwortet).
+        """
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(block)
+        response = self.session.get(
+            self.documents_url,
+            params={"checksum__iexact": md5.hexdigest(), "page_size": 1},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json().get("count", 0) > 0
+
+    def upload(self, path, title=None):
+        """
+        Sendet eine Datei; wiederholt vorübergehende Fehler bis zu retries Mal.
+
+        Erneut gesendet wird nur, wenn die Anfrage Paperless nicht erreicht hat
+        oder Paperless mit einem vorübergehenden Fehler antwortet. Nach einem
+        Abbruch während der Anfrage (z.B. ReadTimeout) ist unknown gesetzt.
+        """
+        result = {
+            "file": os.path.basename(path),
+            "sent": False,
+            "unknown": False,
+            "status": None,
+            "attempts": 0,
+            "error": None,
+            "seconds": 0.0,
+        }
+        started = time.perf_counter()
+        for attempt in range(1, self.retries + 2):
+            result["attempts"] = attempt
+            response = None
+            try:
+                response = self._post(path, title)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                result["error"] = str(e)
+                if not _not_sent(e):
+                    # Paperless kann den Beleg bereits angenommen haben
+                    result["unknown"] = True
+                    break
+            except (requests.exceptions.RequestException, OSError) as e:
+                result["error"] = str(e)
+                break
+            else:
+                result["status"] = response.status_code
+                if response.status_code in (200, 201, 202):
+                    result["sent"] = True
+                    result["error"] = None
+                    break
+                result["error"] = f"Status {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUS:
+                    break
+            if attempt <= self.retries:
+                self._wait(attempt, response)
+        result["seconds"] = time.perf_counter() - started
+        return result
+
+    def _prepare_and_upload(self, path, title, prepare):
+        if prepare is not None:
+            try:
+                prepare(path)
+            except Exception as e:
+                print(f"⚠️  {os.path.basename(path)} konnte nicht vorbereitet werden: {e}")
+        return self.upload(path, title)
+
+    def upload_many(self, paths, on_result=None, titles=None, prepare=None):
+        """
+        Sendet mehrere Dateien mit höchstens workers gleichzeitigen Uploads.
+
+        Args:
+            on_result: optional, wird für jedes Ergebnis sofort aufgerufen
+                (im aufrufenden Thread): on_result(path, result)
+            titles: optional, Dict {Pfad: Titel in Paperless}
+            prepare: optional, wird vor dem Upload im Upload-Thread mit dem
+                Pfad aufgerufen (z.B. zum Verkleinern von Bildern)
+
+        Returns:
+            Liste der Ergebnisse in der Reihenfolge von paths
+        """
+        paths = list(paths)
+        results = [None] * len(paths)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="paperless") as executor:
+            futures = {
+                executor.submit(self._prepare_and_upload, path, (titles or {}).get(path), prepare): index
+                for index, path in enumerate(paths)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                if on_result:
+                    on_result(paths[index], results[index])
+        return results
+
+
+def list_images(image_dir=IMAGE_DIR):
+    """Pfade aller Belege im Ordner image/."""
+    os.makedirs(image_dir, exist_ok=True)
+    return [
+        os.path.join(image_dir, f)
+        for f in sorted(os.listdir(image_dir))
+        if os.path.splitext(f.lower())[1] in IMAGE_EXTENSIONS
+    ]
@@ -0,0 +1,161 @@
+"""
+Filter-Compiler für Abfragen auf der Tabelle buchungen.
+
+Übersetzt die Dashboard-Filter (Jahr, Monate, Konto, Kategorie, ...) in
+WHERE-Klauseln. Jahr/Monat werden dabei nicht als YEAR(datum)/MONTH(datum)
+ausgedrückt, sondern als zusammengefasste Bereiche ``datum >= %s AND datum < %s``,
+damit MySQL die Indizes auf ``datum`` nutzen kann.
+"""
+from datetime import date
+
+from services.search import compile_search
+
+
+def _normalize_months(month):
+    """Wandelt einen Monat oder eine Monatsliste in eine sortierte Liste von ints (1-12)."""
+    if not month:
+        return []
+    values = month if isinstance(month, (list, tuple, set)) else [month]
+    months = set()
+    for m in values:
+        try:
+            m = int(m)
+        except (TypeError, ValueError):
+            continue
+        if 1 <= m <= 12:
+            months.add(m)
+    return sorted(months)
+
+
+def _month_start(year, month):
+    """Erster Tag des Monats; Monat 13 entspricht dem 1. Januar des Folgejahres."""
+    if month == 13:
+        return date(year + 1, 1, 1)
+    return date(year, month, 1)
+
+
+def month_ranges(year, month=None):
+    """
+    Fasst die gewählten Monate eines Jahres zu zusammenhängenden Datumsbereichen zusammen.
+
+    Returns:
+        Liste von (start, ende) Tupeln mit halboffenen Intervallen [start, ende).
+        Beispiel: Jahr 2024, Monate [1, 2, 3, 5] ->
+        [(2024-01-01, 2024-04-01), (2024-05-01, 2024-06-01)]
+    """
+    year = int(year)
+    months = _normalize_months(month)
+    if not months:
+        return [(date(year, 1, 1), date(year + 1, 1, 1))]
+
+    ranges = []
+    start = prev = months[0]
+    for m in months[1:]:
+        if m == prev + 1:
+            prev = m
+            continue
+        ranges.append((_month_start(year, start), _month_start(year, prev + 1)))
+        start = prev = m
+    ranges.append((_month_start(year, start), _month_start(year, prev + 1)))
+    return ranges
+
+
+def _period_conditions(year, month):
+    """Bedingungen und Parameter für Jahr/Monate."""
+    if year:
+        try:
+            ranges = month_ranges(year, month)
+        except (TypeError, ValueError):
+            # Ungültiges Jahr: wie zuvor bei YEAR(datum) = 'abc' keine Treffer
+            return ["1 = 0"], []
+        parts = ["(datum >= %s AND datum < %s)"] * len(ranges)
+        params = [value for r in ranges for value in r]
+        if len(parts) == 1:
+            return ["datum >= %s AND datum < %s"], params
+        return [f"({' OR '.join(parts)})"], params
+
+    months = _normalize_months(month)
+    if months:
+        # Ohne Jahr lässt sich kein Datumsbereich bilden
+        placeholders = ",".join(["%s"] * len(months))
+        return [f"MONTH(datum) IN ({placeholders})"], list(months)
+    return [], []
+
+
+def compile_filters(
+    year=None,
+    month=None,
+    konto=None,
+    kategorie=None,
+    kategorie2=None,
+    beschreibung=None,
+    extra=None,
+    search_mode="like",
+):
+    """
+    Baut die WHERE-Klausel für Abfragen auf buchungen.
+
+    Args:
+        year: Jahr (str/int) oder None
+        month: Monat oder Liste von Monaten (1-12) oder None
+        konto: exakter Kontofilter
+        kategorie: exakter Kategoriefilter
+        kategorie2: Teilstring-Filter auf die Unterkategorie
+        beschreibung: Suchbegriff(e) für die Beschreibung (siehe services/search.py)
+        extra: zusätzliche, parameterlose Bedingungen (werden vorangestellt)
+        search_mode: "like", "ngram" oder "word" (siehe services.search.get_search_mode)
+
+    Returns:
+        Tuple: (where_sql, params) – where_sql ist leer oder beginnt mit "WHERE".
+    """
+    where = list(extra or [])
+    conditions, params = _period_conditions(year, month)
+    where.extend(conditions)
+    if konto:
+        where.append("konto = %s")
+        params.append(konto)
+    if kategorie:
+        where.append("kategorie = %s")
+        params.append(kategorie)
+    if kategorie2:
+        where.append("kategorie2 LIKE %s")
+        params.append(f"%{kategorie2}%")
+    if beschreibung:
+        search_conditions, search_params = compile_search(beschreibung, search_mode)
+        where.extend(search_conditions)
+        params.extend(search_params)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    return where_sql, params
+
+
+def compile_rollup_filters(year=None, month=None, konto=None, kategorie=None):
+    """
+    Baut die WHERE-Klausel für Abfragen auf die Monatsaggregate (buchungen_monatlich).
+
+    Die Aggregattabelle ist nach (jahr, monat, konto, kategorie) geschlüsselt, daher
+    werden Jahr/Monate direkt auf diese Spalten abgebildet.
+
+    Returns:
+        Tuple: (where_sql, params) – where_sql ist leer oder beginnt mit "WHERE".
+    """
+    where = []
+    params = []
+    if year:
+        try:
+            params.append(int(year))
+            where.append("jahr = %s")
+        except (TypeError, ValueError):
+            where.append("1 = 0")
+    months = _normalize_months(month)
+    if months:
+        placeholders = ",".join(["%s"] * len(months))
+        where.append(f"monat IN ({placeholders})")
+        params.extend(months)
+    if konto:
+        where.append("konto = %s")
+        params.append(konto)
+    if kategorie:
+        where.append("kategorie = %s")
+        params.append(kategorie)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    return where_sql, params
@@ -0,0 +1,194 @@
+"""
+Neuberechnung der Kategorien aller (nicht manuell bearbeiteten) Buchungen.
+
+Die Kategorien werden blockweise in Python bestimmt; geschrieben werden nur
+Buchungen, deren Kategorie sich tatsächlich ändert – gesammelt in einer
+temporären Tabelle und mit einem einzigen UPDATE ... JOIN übernommen.
+Anschließend werden nur die betroffenen Monate der Aggregate neu berechnet.
+
+Im inkrementellen Modus werden nur Buchungen geprüft, deren Beschreibung ein
+seit dem letzten Abgleich hinzugefügtes, geändertes oder entferntes
+Schlüsselwort enthält. Grundlage ist der Schlüsselwort-Stand des letzten
+Abgleichs (Tabelle keyword_category_snapshot, Migration 007).
+"""
+from services.categorizer import KeywordCategorizer
+from services.rollup import refresh_months
+
+
+SNAPSHOT_TABLE = "keyword_category_snapshot"
+READ_BATCH_SIZE = 5000
+WRITE_BATCH_SIZE = 1000
+
+# Ab dieser Anzahl geänderter Schlüsselwörter lohnt die Vorauswahl nicht mehr
+MAX_INCREMENTAL_KEYWORDS = 100
+
+_NOT_MANUAL = "(manually_edit IS NULL OR manually_edit = 0)"
+
+
+def normalize_text(text):
+    """Text bereinigen: alle Leerzeichen, Tabs, Zeilenumbrüche -> 1 Leerzeichen"""
+    if not text:
+        return ""
+    return " ".join(text.split())
+
+
+def _like_escape(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _load_keywords(cur):
+    cur.execute("SELECT id, schluesselwort, kategorie FROM keyword_category ORDER BY id")
+    return cur.fetchall()
+
+
+def changed_keywords(cur, keywords):
+    """
+    Vergleicht die aktuellen Schlüsselwörter mit dem Stand des letzten Abgleichs.
+
+    Als geändert gilt ein Schlüsselwort, das neu ist, entfernt wurde, eine
+    andere Kategorie hat oder neu angelegt wurde (andere ID = anderer Vorrang).
+
+    Returns:
+        Liste geänderter Schlüsselwörter oder None, wenn noch kein Stand existiert
+    """
+    cur.execute(f"SELECT keyword_id, schluesselwort, kategorie FROM {SNAPSHOT_TABLE}")
+    snapshot = cur.fetchall()
+    if not snapshot:
+        return None
+
+    previous = {key.lower(): (keyword_id, kategorie) for keyword_id, key, kategorie in snapshot}
+    current = {key.lower(): (keyword_id, kategorie) for keyword_id, key, kategorie in keywords}
+    return sorted(
+        key for key in set(previous) | set(current)
+        if previous.get(key) != current.get(key)
+    )
+
+
+def _candidate_filter(keywords):
+    """
+    Vorauswahl der Buchungen, die eines der Schlüsselwörter enthalten können.
+
+    Jedes Wort des Schlüsselworts muss per LIKE vorkommen – eine Obermenge der
+    Treffer, da die Beschreibung vor dem Vergleich noch normalisiert wird.
+
+    Returns:
+        Tuple (sql, params) oder None, wenn keine Vorauswahl möglich ist
+    """
+    clauses = []
+    params = []
+    for key in keywords:
+        words = key.split()
+        if not words:
+            return None
+        clauses.append("(" + " AND ".join(["beschreibung LIKE %s"] * len(words)) + ")")
+        params.extend(f"%{_like_escape(word)}%" for word in words)
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def _save_snapshot(cur, keywords):
+    cur.execute(f"DELETE FROM {SNAPSHOT_TABLE}")
+    if keywords:
+        cur.executemany(
+            f"INSERT INTO {SNAPSHOT_TABLE} (schluesselwort, kategorie, keyword_id) VALUES (%s, %s, %s)",
+            [(key, kategorie, keyword_id) for keyword_id, key, kategorie in keywords],
+        )
+
+
+def _write_changes(cur, changes):
+    """Übernimmt geänderte Kategorien (id, kategorie) über eine temporäre Tabelle."""
+    cur.execute(
+        """
+        CREATE TEMPORARY TABLE tmp_kategorie_update (
+          id INT(11) NOT NULL,
+          kategorie VARCHAR(255) NOT NULL,
+          PRIMARY KEY (id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+        """
+    )
+    try:
+        for start in range(0, len(changes), WRITE_BATCH_SIZE):
+            cur.executemany(
+                "INSERT INTO tmp_kategorie_update (id, kategorie) VALUES (%s, %s)",
+                changes[start:start + WRITE_BATCH_SIZE],
+            )
+        cur.execute(
+            """
+            UPDATE buchungen b
+            JOIN tmp_kategorie_update t ON t.id = b.id
+            SET b.kategorie = t.kategorie
+            WHERE (b.manually_edit IS NULL OR b.manually_edit = 0)
+            """
+        )
+        return cur.rowcount
+    finally:
+        cur.execute("DROP TEMPORARY TABLE IF EXISTS tmp_kategorie_update")
+
+
+def recategorize(cur, incremental=False):
+    """
+    Bestimmt die Kategorien neu und schreibt nur geänderte Buchungen.
+
+    Läuft vollständig über den übergebenen Cursor; der Aufrufer committet.
+
+    Returns:
+        Dict mit mode, keywords_changed, checked, updated und months
+    """
+    keywords = _load_keywords(cur)
+    categorizer = KeywordCategorizer((key, kategorie) for _id, key, kategorie in keywords)
+
+    mode = "full"
+    changed = None
+    where_sql = _NOT_MANUAL
+    params = []
+    if incremental:
+        changed = changed_keywords(cur, keywords)
+        if changed is not None and len(changed) <= MAX_INCREMENTAL_KEYWORDS:
+            candidate_filter = _candidate_filter(changed)
+            if candidate_filter is not None:
+                mode = "incremental"
+                where_sql = f"{_NOT_MANUAL} AND {candidate_filter[0]}"
+                params = candidate_filter[1]
+
+    result = {
+        "mode": mode,
+        "keywords_changed": len(changed) if changed is not None else None,
+        "checked": 0,
+        "updated": 0,
+        "months": 0,
+    }
+
+    changes = []
+    months = set()
+    if mode == "full" or changed:
+        last_id = 0
+        while True:
+            cur.execute(
+                f"""
+                SELECT id, datum, beschreibung, kategorie
+                FROM buchungen
+                WHERE id > %s AND {where_sql}
+                ORDER BY id
+                LIMIT %s
+                """,
+                [last_id] + params + [READ_BATCH_SIZE],
+            )
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            result["checked"] += len(rows)
+
+            for b_id, datum, beschreibung, kategorie_alt in rows:
+                kategorie = categorizer.categorize(normalize_text(beschreibung))
+                if kategorie != kategorie_alt:
+                    changes.append((b_id, kategorie))
+                    months.add((datum.year, datum.month))
+
+    if changes:
+        result["updated"] = _write_changes(cur, changes)
+        # Kategorien haben sich geändert: betroffene Monatsaggregate neu berechnen
+        refresh_months(cur, months)
+        result["months"] = len(months)
+
+    _save_snapshot(cur, keywords)
+    return result
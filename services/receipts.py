@@ -0,0 +1,166 @@
+"""
+Ablage hochgeladener Belege (Fotos, PDFs) für den Versand an Paperless.
+
+Ein Upload wird blockweise nach image/ kopiert und dabei mit SHA-256
+gehasht; die Datei heißt anschließend <sha256><endung> (inhaltsadressiert).
+Derselbe Beleg wird daher nur einmal gespeichert und nur einmal an
+Paperless gesendet – auch wenn er erneut hochgeladen wird, nachdem er
+bereits gesendet wurde (die Outbox kennt den Dateinamen weiterhin). Der
+ursprüngliche Dateiname wird als Titel für Paperless übernommen.
+
+Vor dem Upload verkleinert die Outbox JPEG- und PNG-Bilder auf die
+konfigurierte Kantenlänge und komprimiert sie neu (optimize_image, nur
+wenn Pillow installiert ist).
+
+Konfiguration (config.json, optional):
+    "RECEIPTS": {"max_upload_mb": 25, "max_side": 2000, "jpeg_quality": 85}
+
+max_upload_mb begrenzt nur Belege und wird beim Speichern geprüft
+(store_receipt). Unabhängig davon begrenzt MAX_UPLOAD_MB (app.py, Standard
+50) als MAX_CONTENT_LENGTH jede Anfrage, auch CSV-Uploads; größere Anfragen
+lehnt Flask ab, bevor diese Prüfung erreicht wird.
+"""
+import hashlib
+import os
+import tempfile
+
+from services import outbox
+from services.paperless import IMAGE_DIR, IMAGE_EXTENSIONS
+from utils.helpers import load_config
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional, ohne Pillow werden Bilder unverändert gesendet
+    Image = None
+
+
+DEFAULT_MAX_UPLOAD_MB = 25
+DEFAULT_MAX_SIDE = 2000
+DEFAULT_JPEG_QUALITY = 85
+
+# Blockgröße beim Kopieren des Uploads (Bytes)
+COPY_CHUNK = 256 * 1024
+
+# Formate, die verkleinert werden (Endung -> Pillow-Format)
+RESIZABLE = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}
+
+
+class ReceiptTooLarge(ValueError):
+    """Der Beleg überschreitet die zulässige Größe."""
+
+
+def load_receipts_config():
+    """Liest die Beleg-Konfiguration ("RECEIPTS") aus config.json."""
+    receipts_config = load_config().get("RECEIPTS", {})
+    return {
+        "max_upload_mb": max(1, int(receipts_config.get("max_upload_mb", DEFAULT_MAX_UPLOAD_MB))),
+        "max_side": max(0, int(receipts_config.get("max_side", DEFAULT_MAX_SIDE))),
+        "jpeg_quality": min(95, max(30, int(receipts_config.get("jpeg_quality", DEFAULT_JPEG_QUALITY)))),
+    }
+
+
+def max_upload_bytes():
+    """Größter zulässiger Beleg in Bytes (RECEIPTS.max_upload_mb, nicht MAX_CONTENT_LENGTH)."""
+    return load_receipts_config()["max_upload_mb"] * 1024 * 1024
+
+
+def _copy_hashed(stream, target, limit):
+    """Kopiert stream blockweise nach target; gibt (sha256, Bytes) zurück."""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(COPY_CHUNK)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            raise ReceiptTooLarge(f"Beleg größer als {limit // (1024 * 1024)} MB")
+        digest.update(chunk)
+        target.write(chunk)
+    return digest.hexdigest(), size
+
+
+def store_receipt(cur, stream, original_name, image_dir=IMAGE_DIR):
+    """
+    Speichert einen hochgeladenen Beleg und trägt ihn in die Outbox ein (der
+    Aufrufer committet).
+
+    Args:
+        stream: Binär-Stream des Uploads
+        original_name: Dateiname des Uploads (Endung und Titel)
+
+    Returns:
+        Dict mit filename, sha256, size und duplicate (Beleg war bereits
+        vorhanden bzw. wurde bereits gesendet)
+    """
+    ext = os.path.splitext(original_name)[1].lower()
+    if ext not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Dateityp {ext or '(ohne Endung)'} wird nicht unterstützt")
+    limit = max_upload_bytes()
+
+    os.makedirs(image_dir, exist_ok=True)
+    # Temporäre Datei ohne Bild-Endung, damit Outbox und Ordnerbeobachtung sie ignorieren
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=image_dir)
+    try:
+        with os.fdopen(fd, "wb") as target:
+            sha256, size = _copy_hashed(stream, target, limit)
+
+        filename = f"{sha256}{ext}"
+        title = os.path.splitext(original_name)[0][:255] or None
+        # Bereits bekannt: nur endgültig fehlgeschlagene Belege werden erneut eingereiht
+        duplicate = not (outbox.enqueue(cur, filename, title=title) or outbox.requeue_failed(cur, filename))
+        if not duplicate:
+            os.replace(tmp_path, os.path.join(image_dir, filename))
+            tmp_path = None
+        return {"filename": filename, "sha256": sha256, "size": size, "duplicate": duplicate}
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def optimize_image(path, config=None):
+    """
+    Verkleinert ein JPEG/PNG auf höchstens max_side Pixel Kantenlänge und
+    komprimiert es neu; die Datei wird nur ersetzt, wenn sie kleiner wird.
+    Bilder, die bereits passen, bleiben unverändert (mehrfacher Aufruf ist
+    unschädlich).
+
+    Returns:
+        True, wenn die Datei ersetzt wurde
+    """
+    fmt = RESIZABLE.get(os.path.splitext(path)[1].lower())
+    if Image is None or fmt is None:
+        return False
+    config = config or load_receipts_config()
+    max_side = config["max_side"]
+    if not max_side:
+        return False
+
+    tmp_path = None
+    try:
+        with Image.open(path) as image:
+            if max(image.size) <= max_side:
+                return False
+            # Ausrichtung aus den EXIF-Daten übernehmen (Handyfotos)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            fd, tmp_path = tempfile.mkstemp(prefix=".optimize-", suffix=".part", dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as target:
+                if fmt == "JPEG":
+                    image.save(target, "JPEG", quality=config["jpeg_quality"], optimize=True, progressive=True)
+                else:
+                    image.save(target, "PNG", optimize=True)
+    except (OSError, ValueError) as exc:
+        print(f"⚠️  {os.path.basename(path)} konnte nicht verkleinert werden: {exc}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    if os.path.getsize(tmp_path) >= os.path.getsize(path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
@@ -0,0 +1,252 @@
+"""
+Wiederherstellung von Buchungen aus einem CSV-Export (Einstellungen → Export).
+
+Die hochgeladene Datei wird zeilenweise gelesen, nicht vollständig in den
+Speicher geladen. Die Zeilen werden blockweise per executemany in eine
+temporäre Staging-Tabelle geschrieben und anschließend mit einem einzigen
+INSERT … SELECT (Anti-Join über buchungen.dedupe_hash und den älteren
+Schlüssel unique_buchung) übernommen. Bereits vorhandene Buchungen und
+Duplikate innerhalb der Datei werden übersprungen; andere Fehler beim
+Übernehmen brechen die Wiederherstellung ab, statt als Warnung unterzugehen.
+
+Der Inhalts-Hash wird in Python berechnet (services.bulk_insert.dedupe_hash),
+daher wird nicht über LOAD DATA LOCAL INFILE geladen – das ist zudem bei
+vielen MySQL-Servern deaktiviert.
+"""
+import csv
+import io
+from datetime import datetime
+
+from services import rollup
+from services.bulk_insert import dedupe_hash
+
+
+EXPECTED_COLUMNS = [
+    "Datum",
+    "Art",
+    "Beschreibung",
+    "Soll",
+    "Haben",
+    "Kategorie",
+    "Unterkategorie",
+    "Konto",
+    "Gegen-IBAN",
+]
+
+RESTORE_BATCH_SIZE = 2000
+
+STAGING_TABLE = "tmp_restore"
+
+# Höchstens so viele Fehlermeldungen je Wiederherstellung im Ergebnis
+MAX_ERROR_DETAILS = 20
+
+_COLUMNS = "datum, art, beschreibung, soll, haben, kategorie, kategorie2, konto, gegen_iban, dedupe_hash"
+
+_CREATE_SQL = f"""
+    CREATE TEMPORARY TABLE {STAGING_TABLE} (
+        zeile INT NOT NULL,
+        datum DATE NOT NULL,
+        art VARCHAR(100) DEFAULT NULL,
+        beschreibung TEXT DEFAULT NULL,
+        soll DECIMAL(10,2) DEFAULT NULL,
+        haben DECIMAL(10,2) DEFAULT NULL,
+        kategorie VARCHAR(255) DEFAULT NULL,
+        kategorie2 VARCHAR(255) DEFAULT NULL,
+        konto VARCHAR(50) DEFAULT NULL,
+        gegen_iban VARCHAR(34) DEFAULT NULL,
+        dedupe_hash CHAR(40) CHARACTER SET ascii COLLATE ascii_bin DEFAULT NULL,
+        PRIMARY KEY (zeile),
+        UNIQUE KEY unique_buchung (datum, art, beschreibung(255), soll, haben)
+    ) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+"""
+
+# Zeilen, die innerhalb der Datei mit unique_buchung kollidieren, werden
+# übersprungen (betroffene Zeilen 0); andere Fehler bleiben Fehler.
+_STAGE_SQL = f"""
+    INSERT INTO {STAGING_TABLE} (zeile, {_COLUMNS})
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE zeile = zeile
+"""
+
+# Übernahme aller neuen Zeilen. Kein INSERT IGNORE: das würde auch Fehler wie
+# abgeschnittene Werte zu Warnungen machen. Stattdessen schließt der Anti-Join
+# neben dedupe_hash auch den älteren Schlüssel unique_buchung aus (gleiche
+# Präfixlänge und Kollation wie der Index).
+_MERGE_SQL = f"""
+    INSERT INTO buchungen ({_COLUMNS}, manually_edit)
+    SELECT t.datum, t.art, t.beschreibung, t.soll, t.haben, t.kategorie, t.kategorie2,
+           t.konto, t.gegen_iban, t.dedupe_hash, 1
+    FROM {STAGING_TABLE} t
+    LEFT JOIN buchungen b ON b.dedupe_hash = t.dedupe_hash
+    LEFT JOIN buchungen u
+           ON u.datum = t.datum
+          AND u.art = t.art
+          AND LEFT(u.beschreibung, 255) = LEFT(t.beschreibung, 255)
+          AND u.soll = t.soll
+          AND u.haben = t.haben
+    WHERE b.id IS NULL AND u.id IS NULL
+    ORDER BY t.zeile
+"""
+
+
+def _parse_datum(value):
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_betrag(value):
+    """Betrag im deutschen Format (Komma als Dezimaltrennzeichen)."""
+    value = value.strip().replace(".", "").replace(",", ".")
+    return float(value) if value else 0.0
+
+
+def parse_row(row):
+    """
+    Wandelt eine Zeile des Exports in ein Tupel in der Spaltenreihenfolge der
+    Staging-Tabelle (ohne Zeilennummer) um.
+
+    Returns:
+        Tupel oder None, wenn Datum oder Beträge nicht lesbar sind
+    """
+    datum = _parse_datum((row.get("Datum") or "").strip())
+    if datum is None:
+        return None
+    try:
+        soll = _parse_betrag(row.get("Soll") or "")
+        haben = _parse_betrag(row.get("Haben") or "")
+    except ValueError:
+        return None
+
+    def text(column):
+        return (row.get(column) or "").strip() or None
+
+    beschreibung = text("Beschreibung")
+    konto = text("Konto")
+    gegen_iban = text("Gegen-IBAN")
+    return (
+        datum,
+        text("Art"),
+        beschreibung,
+        soll,
+        haben,
+        text("Kategorie"),
+        text("Unterkategorie"),
+        konto,
+        gegen_iban,
+        dedupe_hash(datum, beschreibung, soll, haben, konto, gegen_iban),
+    )
+
+
+class _Stager:
+    """Schreibt geparste Zeilen blockweise in die Staging-Tabelle."""
+
+    def __init__(self, cursor, batch_size):
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.staged = 0
+        # Duplikate innerhalb der Datei (Schlüssel unique_buchung)
+        self.duplicates = 0
+        self.errors = 0
+        # (Zeile, Fehlermeldung), höchstens MAX_ERROR_DETAILS
+        self.error_details = []
+        self.months = set()
+        self._pending = []
+
+    def error(self, zeile, message):
+        self.errors += 1
+        if len(self.error_details) < MAX_ERROR_DETAILS:
+            self.error_details.append((zeile, message))
+
+    def add(self, zeile, values):
+        self._pending.append((zeile,) + values)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            self.cursor.executemany(_STAGE_SQL, rows)
+            staged = rows
+            inserted = max(0, self.cursor.rowcount)
+        except Exception:
+            # Block zeilenweise wiederholen, damit nur die fehlerhaften Zeilen fehlen
+            staged = []
+            inserted = 0
+            for row in rows:
+                try:
+                    self.cursor.execute(_STAGE_SQL, row)
+                    staged.append(row)
+                    inserted += max(0, self.cursor.rowcount)
+                except Exception as e:
+                    self.error(row[0], str(e))
+        self.staged += inserted
+        self.duplicates += len(staged) - inserted
+        self.months.update((row[1].year, row[1].month) for row in staged)
+
+
+def restore_buchungen(cursor, reader, batch_size=RESTORE_BATCH_SIZE):
+    """
+    Übernimmt die Buchungen eines CSV-Exports über den Cursor der aufrufenden
+    Transaktion (der Aufrufer committet).
+
+    Args:
+        reader: csv.DictReader über den Export (Spalten siehe EXPECTED_COLUMNS)
+
+    Returns:
+        Dict mit imported, skipped (Duplikate), errors (nicht übernommene
+        Zeilen) und error_details (Liste von (Zeile, Fehlermeldung), höchstens
+        MAX_ERROR_DETAILS)
+    """
+    stager = _Stager(cursor, max(1, int(batch_size)))
+    seen = set()
+    skipped = 0
+
+    cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {STAGING_TABLE}")
+    cursor.execute(_CREATE_SQL)
+    try:
+        for zeile, row in enumerate(reader, start=1):
+            values = parse_row(row)
+            if values is None:
+                stager.error(zeile, "Datum oder Betrag nicht lesbar")
+                continue
+            key = values[-1]
+            if key is not None:
+                if key in seen:
+                    skipped += 1
+                    continue
+                seen.add(key)
+            stager.add(zeile, values)
+        stager.flush()
+
+        imported = 0
+        if stager.staged:
+            cursor.execute(_MERGE_SQL)
+            imported = max(0, cursor.rowcount)
+            skipped += stager.staged - imported
+            if imported:
+                rollup.refresh_months(cursor, stager.months)
+        skipped += stager.duplicates
+    finally:
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {STAGING_TABLE}")
+
+    return {
+        "imported": imported,
+        "skipped": skipped,
+        "errors": stager.errors,
+        "error_details": stager.error_details,
+    }
+
+
+def open_export(stream):
+    """
+    csv.DictReader über einen hochgeladenen Export (Binär-Stream), ohne die
+    Datei vollständig einzulesen.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    return csv.DictReader(text, delimiter=";")
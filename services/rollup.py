@@ -0,0 +1,189 @@
+"""
+Pflege der Monatsaggregate (Tabelle buchungen_monatlich).
+
+Die Aggregate (Summe Haben, Summe Soll, Anzahl je Jahr/Monat/Konto/Kategorie)
+werden von jedem Schreibpfad inkrementell aktualisiert – immer über den Cursor
+der schreibenden Transaktion, damit Buchungen und Aggregate gemeinsam committet
+oder zurückgerollt werden. Dabei wird auch der Datenstand-Zähler (data_version)
+erhöht, an dem zwischengespeicherte Abfrageergebnisse ihre Gültigkeit prüfen.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+
+ROLLUP_TABLE = "buchungen_monatlich"
+
+_UPSERT_SQL = f"""
+    INSERT INTO {ROLLUP_TABLE} (jahr, monat, konto, kategorie, haben_sum, soll_sum, anzahl)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        haben_sum = haben_sum + VALUES(haben_sum),
+        soll_sum = soll_sum + VALUES(soll_sum),
+        anzahl = anzahl + VALUES(anzahl)
+"""
+
+
+def mark_changed(cur):
+    """Erhöht den Datenstand-Zähler, damit zwischengespeicherte Ergebnisse verfallen."""
+    cur.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+
+def _to_decimal(value):
+    if value is None:
+        return Decimal("0")
+    return Decimal(str(value)).quantize(Decimal("0.01"))
+
+
+def rollup_key(datum, konto, kategorie):
+    """Schlüssel einer Buchung in der Aggregattabelle: (jahr, monat, konto, kategorie)."""
+    return (datum.year, datum.month, konto or "", kategorie or "")
+
+
+class RollupDelta:
+    """
+    Sammelt Änderungen an den Aggregaten, z.B. während eines Imports,
+    und schreibt sie anschließend gebündelt.
+    """
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: [Decimal("0"), Decimal("0"), 0])
+
+    def add(self, datum, konto, kategorie, haben, soll, sign=1):
+        """Registriert eine hinzugefügte (sign=1) oder entfernte (sign=-1) Buchung."""
+        delta = self._deltas[rollup_key(datum, konto, kategorie)]
+        delta[0] += sign * _to_decimal(haben)
+        delta[1] += sign * _to_decimal(soll)
+        delta[2] += sign
+
+    def remove(self, datum, konto, kategorie, haben, soll):
+        self.add(datum, konto, kategorie, haben, soll, sign=-1)
+
+    def __bool__(self):
+        return bool(self._deltas)
+
+    def apply(self, cur):
+        """Schreibt alle gesammelten Änderungen über den übergebenen Cursor."""
+        if not self._deltas:
+            return
+        rows = [
+            (jahr, monat, konto, kategorie, haben, soll, anzahl)
+            for (jahr, monat, konto, kategorie), (haben, soll, anzahl) in self._deltas.items()
+            if anzahl or haben or soll
+        ]
+        if rows:
+            cur.executemany(_UPSERT_SQL, rows)
+        # Leer gewordene Gruppen entfernen
+        emptied = [row[:4] for row in rows if row[6] < 0]
+        if emptied:
+            cur.executemany(
+                f"""
+                DELETE FROM {ROLLUP_TABLE}
+                WHERE jahr = %s AND monat = %s AND konto = %s AND kategorie = %s AND anzahl <= 0
+                """,
+                emptied,
+            )
+        mark_changed(cur)
+        self._deltas.clear()
+
+
+def add_booking(cur, datum, konto, kategorie, haben, soll):
+    """Verbucht eine neu eingefügte Buchung in den Aggregaten."""
+    delta = RollupDelta()
+    delta.add(datum, konto, kategorie, haben, soll)
+    delta.apply(cur)
+
+
+def remove_booking(cur, datum, konto, kategorie, haben, soll):
+    """Entfernt eine gelöschte Buchung aus den Aggregaten."""
+    delta = RollupDelta()
+    delta.remove(datum, konto, kategorie, haben, soll)
+    delta.apply(cur)
+
+
+def _aggregate_select(where_sql=""):
+    return f"""
+        SELECT YEAR(datum), MONTH(datum), IFNULL(konto, ''), IFNULL(kategorie, ''),
+               IFNULL(SUM(haben), 0), IFNULL(SUM(soll), 0), COUNT(*)
+        FROM buchungen
+        {where_sql}
+        GROUP BY YEAR(datum), MONTH(datum), IFNULL(konto, ''), IFNULL(kategorie, '')
+    """
+
+
+def refresh_months(cur, months):
+    """
+    Berechnet die Aggregate für die angegebenen Monate neu.
+
+    Args:
+        months: Iterable von (jahr, monat) Tupeln
+    """
+    for jahr, monat in sorted(set(months)):
+        start = date(jahr, monat, 1)
+        end = date(jahr + 1, 1, 1) if monat == 12 else date(jahr, monat + 1, 1)
+        cur.execute(
+            f"DELETE FROM {ROLLUP_TABLE} WHERE jahr = %s AND monat = %s",
+            (jahr, monat),
+        )
+        cur.execute(
+            f"""
+            INSERT INTO {ROLLUP_TABLE} (jahr, monat, konto, kategorie, haben_sum, soll_sum, anzahl)
+            {_aggregate_select("WHERE datum >= %s AND datum < %s")}
+            """,
+            (start, end),
+        )
+    mark_changed(cur)
+
+
+def rebuild(cur):
+    """Baut die Aggregattabelle vollständig aus buchungen neu auf."""
+    cur.execute(f"DELETE FROM {ROLLUP_TABLE}")
+    cur.execute(
+        f"""
+        INSERT INTO {ROLLUP_TABLE} (jahr, monat, konto, kategorie, haben_sum, soll_sum, anzahl)
+        {_aggregate_select()}
+        """
+    )
+    mark_changed(cur)
+
+
+def check_consistency(cur):
+    """
+    Vergleicht die Aggregattabelle mit einer frischen Aggregation über buchungen.
+
+    Returns:
+        Liste von Abweichungen als Dicts mit key, expected und actual
+        (jeweils (haben, soll, anzahl) oder None, falls die Zeile fehlt).
+    """
+    cur.execute(_aggregate_select())
+    expected = {
+        (int(r[0]), int(r[1]), r[2], r[3]): (_to_decimal(r[4]), _to_decimal(r[5]), int(r[6]))
+        for r in cur.fetchall()
+    }
+    cur.execute(
+        f"SELECT jahr, monat, konto, kategorie, haben_sum, soll_sum, anzahl FROM {ROLLUP_TABLE}"
+    )
+    actual = {
+        (int(r[0]), int(r[1]), r[2], r[3]): (_to_decimal(r[4]), _to_decimal(r[5]), int(r[6]))
+        for r in cur.fetchall()
+    }
+
+    # Schlüssel collation-neutral vergleichen (utf8mb4_general_ci ignoriert Groß-/Kleinschreibung)
+    def fold(key):
+        return (key[0], key[1], key[2].casefold(), key[3].casefold())
+
+    expected_folded = {fold(k): (k, v) for k, v in expected.items()}
+    actual_folded = {fold(k): (k, v) for k, v in actual.items()}
+
+    mismatches = []
+    for folded in sorted(set(expected_folded) | set(actual_folded)):
+        exp = expected_folded.get(folded)
+        act = actual_folded.get(folded)
+        if exp and act and exp[1] == act[1]:
+            continue
+        mismatches.append({
+            "key": (exp or act)[0],
+            "expected": exp[1] if exp else None,
+            "actual": act[1] if act else None,
+        })
+    return mismatches
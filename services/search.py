@@ -0,0 +1,138 @@
+"""
+Suche in der Buchungsbeschreibung.
+
+Der Beschreibungsfilter nutzt – sofern vorhanden – den Volltextindex
+ft_buchungen_beschreibung (Migration 006) statt ``beschreibung LIKE '%...%'``.
+
+Suchmodi:
+    "ngram" – MySQL mit ngram-Index: jeder Begriff als Teilstring
+    "word"  – MariaDB mit Wort-Index: nur Begriffe mit abschließendem * über
+              den Index (Wortanfang), alle anderen per LIKE als Teilstring
+    "like"  – kein Volltextindex vorhanden: LIKE-Suche wie bisher
+
+Suchsyntax: mehrere Begriffe werden UND-verknüpft, "in Anführungszeichen"
+gesetzte Begriffe als Phrase gesucht, ein abschließendes * markiert eine
+Präfixsuche (im ngram-Modus ist jeder Begriff ohnehin eine Teilstringsuche).
+Operatoren der Volltextsuche (+ - < > ( ) ~ * @ ") in der Eingabe werden für
+den Index entfernt und wirken nicht.
+"""
+import re
+import threading
+
+from db import get_connection
+
+
+FULLTEXT_INDEX = "ft_buchungen_beschreibung"
+
+# Kürzere Begriffe kann der jeweilige Index nicht finden (ngram_token_size bzw.
+# innodb_ft_min_token_size in der Standardkonfiguration) -> LIKE
+MIN_TOKEN_LENGTH = {"ngram": 2, "word": 3}
+
+_TERM_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+_WORD_PATTERN = re.compile(r"^\w+$")
+# Operatoren von MATCH ... IN BOOLEAN MODE
+_BOOLEAN_OPERATORS = re.compile(r'["+\-<>()~*@]')
+
+_search_mode = None
+_search_mode_lock = threading.Lock()
+
+
+def detect_search_mode(conn):
+    """Ermittelt den Suchmodus anhand des vorhandenen Index und des Datenbankservers."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'buchungen' AND INDEX_NAME = %s
+            """,
+            (FULLTEXT_INDEX,),
+        )
+        if not cur.fetchone()[0]:
+            return "like"
+        cur.execute("SELECT VERSION()")
+        server_version = cur.fetchone()[0] or ""
+        return "word" if "mariadb" in server_version.lower() else "ngram"
+    finally:
+        cur.close()
+
+
+def get_search_mode():
+    """Suchmodus dieses Prozesses (wird beim ersten Aufruf ermittelt)."""
+    global _search_mode
+    if _search_mode is None:
+        with _search_mode_lock:
+            if _search_mode is None:
+                try:
+                    with get_connection() as conn:
+                        _search_mode = detect_search_mode(conn)
+                except Exception:
+                    # Ohne Ermittlung sicher auf LIKE zurückfallen, später erneut versuchen
+                    return "like"
+    return _search_mode
+
+
+def _parse_terms(text):
+    """Begriffe der Sucheingabe als (Begriff, Präfixsuche)."""
+    terms = []
+    for phrase, word in _TERM_PATTERN.findall(text or ""):
+        term = " ".join(phrase.split()) if phrase else word.rstrip("*")
+        if term:
+            terms.append((term, not phrase and word.endswith("*")))
+    return terms
+
+
+def parse_search_terms(text):
+    """
+    Zerlegt die Sucheingabe in Begriffe (Phrasen bleiben zusammen, ein
+    abschließendes * wird entfernt).
+    """
+    return [term for term, _prefix in _parse_terms(text)]
+
+
+def _like_escape(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def compile_search(text, mode="like", column="beschreibung"):
+    """
+    Übersetzt die Sucheingabe in Bedingungen für die WHERE-Klausel.
+
+    Jeder Begriff wird per LIKE als Teilstring geprüft; der Volltextindex
+    dient zur schnellen Vorauswahl der Kandidaten. Im ngram-Modus entspricht
+    die Treffermenge damit exakt der Teilstringsuche. Der Wort-Index (MariaDB)
+    findet nur Wortanfänge und wird daher nur für ausdrückliche
+    Präfixsuchen (Begriff*) verwendet – sonst fiele z.B. "ZAHLUNGREWE" bei
+    der Suche nach "rewe" weg.
+
+    Returns:
+        Tuple: (conditions, params) – Liste von SQL-Bedingungen und deren Parameter
+    """
+    terms = _parse_terms(text)
+    if not terms:
+        return [], []
+
+    fulltext_terms = []
+    conditions = []
+    params = []
+    min_length = MIN_TOKEN_LENGTH.get(mode)
+    for term, prefix in terms:
+        conditions.append(f"{column} LIKE %s")
+        params.append(f"%{_like_escape(term)}%")
+        if min_length is None or (mode == "word" and not prefix):
+            continue
+        # Phrasen werden für den Index in Einzelwörter zerlegt, die exakte
+        # Reihenfolge prüft die LIKE-Bedingung; Operatoren werden entfernt
+        for word in _BOOLEAN_OPERATORS.sub(" ", term).split():
+            if len(word) < min_length:
+                continue
+            if mode == "ngram":
+                # Phrasensuche über ngrams entspricht einer Teilstringsuche
+                fulltext_terms.append(f'+"{word}"')
+            elif _WORD_PATTERN.match(word):
+                fulltext_terms.append(f"+{word}*")
+
+    if fulltext_terms:
+        conditions.insert(0, f"MATCH({column}) AGAINST (%s IN BOOLEAN MODE)")
+        params.insert(0, " ".join(fulltext_terms))
+    return conditions, params
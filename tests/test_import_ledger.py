@@ -0,0 +1,115 @@
+"""Import-Ledger: welche Dateien vermerkt und beim nächsten Import übersprungen werden."""
+import datetime
+
+from ingest.pipeline import run_import
+from ingest.result import ImportOptions
+
+
+HEADER = [
+    "Girokonto;DE12500105170648489890",
+    "",
+    "Buchungsdatum;Betrag (€);Zahlungsempfänger*in;Verwendungszweck;IBAN;Umsatztyp",
+]
+
+
+class FakeCursor:
+    """Beantwortet die Anweisungen des Imports aus dem Zustand von FakeConnection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+        self.lastrowid = 1
+
+    def execute(self, sql, params=()):
+        query = " ".join(sql.split())
+        self.result = []
+        if query.startswith(("SELECT GET_LOCK", "SELECT RELEASE_LOCK")):
+            self.result = [(1,)]
+        elif query.startswith("SELECT filename, imported"):
+            entry = self.conn.ledger.get(params[0])
+            self.result = [(entry, 0, datetime.datetime.now())] if entry else []
+        elif query.startswith("INSERT INTO import_ledger"):
+            self.conn.ledger[params[0]] = params[1]
+        elif query.startswith("SELECT dedupe_hash"):
+            self.result = [(h,) for h in params if h in self.conn.hashes]
+        elif query.startswith("INSERT INTO buchungen ("):
+            self.conn.hashes.add(params[8])
+
+    def executemany(self, sql, rows):
+        for row in rows:
+            self.execute(sql, row)
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.ledger = {}
+        self.hashes = set()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def _write(tmp_path, name, lines):
+    path = tmp_path / name
+    path.write_text("\n".join(HEADER + lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _bookings(count):
+    return [f"{day:02d}.01.2024;-{day},50;REWE;Einkauf {day};DE01;Lastschrift" for day in range(1, count + 1)]
+
+
+def _import(conn, path):
+    return run_import([path], connection=conn, options=ImportOptions(verbose=False, workers=1))
+
+
+def test_file_with_footer_row_is_recorded_and_skipped(tmp_path):
+    path = _write(tmp_path, "umsaetze.csv", _bookings(20) + ["Kontostand am 31.01.2024;1.234,56;;;;"])
+    conn = FakeConnection()
+
+    first = _import(conn, path)
+    assert first.imported == 20
+    assert first.rejected["no_date"] == 1
+    assert first.rejected["date_format"] == 0
+    assert len(conn.ledger) == 1
+
+    second = _import(conn, path)
+    assert second.files[0].already_imported
+    assert second.imported == 0
+
+
+def test_file_with_unreadable_date_is_not_recorded(tmp_path):
+    path = _write(tmp_path, "umsaetze.csv", _bookings(20) + ["31.13.2024;-1,00;REWE;Einkauf;DE01;Lastschrift"])
+    conn = FakeConnection()
+
+    first = _import(conn, path)
+    assert first.rejected["date_format"] == 1
+    assert conn.ledger == {}
+
+    second = _import(conn, path)
+    assert not second.files[0].already_imported
+
+
+def test_late_booking_inside_imported_period_is_imported(tmp_path):
+    conn = FakeConnection()
+    _import(conn, _write(tmp_path, "januar.csv", _bookings(20)))
+
+    late = "15.01.2024;-99,00;Stadtwerke;Nachbuchung;DE02;Lastschrift"
+    result = _import(conn, _write(tmp_path, "januar_neu.csv", _bookings(20) + [late]))
+    assert result.imported == 1
+    assert result.duplicates == 20
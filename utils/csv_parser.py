@@ -1,12 +1,47 @@
 """Robuster CSV-Parser für verschiedene Bankformate."""
 import pandas as pd
+import codecs
 import csv
+import hashlib
+import io
 import re
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import chardet
 
 
+# Encoding, IBAN und Header-Zeile werden aus diesem Dateianfang bestimmt
+SNIFF_BYTES = 64 * 1024
+# Zeilen je Block beim blockweisen Einlesen (iter_chunks)
+DEFAULT_CHUNK_SIZE = 5000
+
+# Nicht dekodierbare Bytes als latin-1 lesen statt die Datei zu verwerfen
+DECODE_ERRORS = "bankcsv_latin1"
+
+
+def _decode_latin1(exc):
+    if isinstance(exc, UnicodeDecodeError):
+        return exc.object[exc.start:exc.end].decode('latin-1'), exc.end
+    raise exc
+
+
+codecs.register_error(DECODE_ERRORS, _decode_latin1)
+
+
+class EngineRestart(ValueError):
+    """
+    Der C-Parser ist erst nach bereits gelieferten Blöcken gescheitert.
+
+    Die Datei muss vollständig mit dem Python-Parser neu gelesen werden; die
+    bisher gelieferten Zeilen sind zu verwerfen.
+    """
+
+
+def header_fingerprint(line: str) -> str:
+    """Fingerabdruck einer Header-Zeile (Schlüssel der Format-Registry)."""
+    return hashlib.sha1(line.replace('\ufeff', '').strip().encode('utf-8')).hexdigest()
+
+
 class BankCSVParser:
     """Parser für verschiedene Bank-CSV-Formate."""
     
@@ -44,14 +79,49 @@ class BankCSVParser:
         "%Y/%m/%d",      # 2024/12/01
         "%d-%m-%Y",      # 01-12-2024
         "%d-%m-%y",      # 01-12-24
+        "%m/%d/%Y",      # 12/01/2024 (US)
+        "%m/%d/%y",      # 12/01/24 (US)
     ]
     
-    def __init__(self, csv_path: str):
+    # Anzahl Werte, anhand derer das Datumsformat einer Spalte bestimmt wird
+    DATE_SAMPLE_SIZE = 500
+    
+    # Werte, die wie ein Datum aussehen; andere Texte in der Datumsspalte
+    # (Fußzeilen wie "Kontostand am …") sind keine Datumsfehler
+    DATE_LIKE = re.compile(r'^\d{1,4}[./-]\d{1,2}[./-]\d{1,4}$')
+    
+    # Anteil nicht passender Datumswerte eines Blocks, ab dem das Datumsformat
+    # neu bestimmt wird (z. B. falsch gespeichertes Format in der Registry)
+    DATE_RELEARN_SHARE = 0.5
+    
+    # Typische Spaltennamen der Header-Zeile
+    HEADER_KEYWORDS = [
+        "buchungsdatum", "datum", "betrag", "empfänger", "verwendungszweck",
+        "date", "amount", "payee", "description", "transaction"
+    ]
+    
+    # Anzahl Zeilen am Dateianfang, in denen die eigene IBAN gesucht wird
+    IBAN_LINES = 20
+    
+    # pandas-Parser in der Reihenfolge der Versuche: der schnelle C-Parser
+    # zuerst, der Python-Parser nur für Dateien, die der C-Parser ablehnt
+    ENGINES = ("c", "python")
+    
+    # Betragsformate, deren Werte ohne Einzelfallregeln umgewandelt werden:
+    # "comma" = 1.234,56 und "dot" = 1,234.56 (jeweils optional mit Minus)
+    AMOUNT_PATTERNS = {
+        "comma": r"-?(?:\d+(?:,\d{1,2})?|\d{1,3}(?:\.\d{3})+,\d+)",
+        "dot": r"-?(?:\d+(?:\.\d+)?|\d{1,3}(?:,\d{3})+\.\d+)",
+    }
+    
+    def __init__(self, csv_path: str, formats: Optional[Dict[str, Dict]] = None):
         """
         Initialisiert den Parser für eine CSV-Datei.
         
         Args:
             csv_path: Pfad zur CSV-Datei
+            formats: bekannte Formate {Fingerabdruck: Format} (siehe format_info);
+                bei einem Treffer entfällt die Erkennung
         """
         self.csv_path = csv_path
         self.encoding = None
@@ -60,16 +130,42 @@ class BankCSVParser:
         self.column_mapping = {}
         self.eigene_iban = None
         self.df = None
-        
-    def detect_encoding(self) -> str:
+        # Spaltennamen der Header-Zeile
+        self.columns = []
+        self.engines = self.ENGINES
+        # Tatsächlich verwendeter Parser und ggf. Grund für den Fallback
+        self.engine = None
+        self.fallback_reason = None
+        self.formats = formats or {}
+        self.fingerprint = None
+        # True, wenn das Format aus der Registry stammt
+        self.known_format = False
+        # Datumsformat der Spalte (bekannt oder beim ersten Block bestimmt)
+        self.date_format = None
+        # Bekanntes Betragsformat (passende Werte werden direkt umgewandelt)
+        self.amount_format = None
+        # Nicht leere Datumswerte, die nicht zum Datumsformat passen
+        self.date_rejected = 0
+        # True, wenn das Datumsformat per Gleichstand gewählt wurde
+        self.date_format_ambiguous = False
+        # True, wenn ein Datumsformat beim Einlesen neu bestimmt wurde
+        self.date_format_relearned = False
+        # Treffer je Betragsformat beim Einlesen (zum Lernen unbekannter Formate)
+        self._amount_hits = {}
+        
+    def detect_encoding(self, raw_data: Optional[bytes] = None) -> str:
         """Erkennt die Encoding der Datei."""
-        with open(self.csv_path, 'rb') as f:
-            raw_data = f.read(10000)  # Erste 10KB lesen
-            result = chardet.detect(raw_data)
-            encoding = result.get('encoding', 'utf-8')
-            # Fallback auf utf-8 wenn unsicher
-            if result.get('confidence', 0) < 0.7:
-                encoding = 'utf-8'
+        if raw_data is None:
+            with open(self.csv_path, 'rb') as f:
+                raw_data = f.read(10000)  # Erste 10KB lesen
+        result = chardet.detect(raw_data[:10000])
+        encoding = result.get('encoding') or 'utf-8'
+        # Fallback auf utf-8 wenn unsicher
+        if result.get('confidence', 0) < 0.7:
+            encoding = 'utf-8'
+        # Reiner ASCII-Anfang: Rest der Datei kann Umlaute enthalten
+        if encoding.lower() == 'ascii':
+            encoding = 'utf-8'
         return encoding
     
     def detect_delimiter(self, sample_lines: List[str]) -> str:
@@ -131,26 +227,23 @@ class BankCSVParser:
         # Erkenne Trennzeichen aus ersten Zeilen
         delimiter = self.detect_delimiter(lines[:10])
         
-        # Suche nach Header-Zeile (enthält typische Spaltennamen)
-        header_keywords = [
-            "buchungsdatum", "datum", "betrag", "empfänger", "verwendungszweck",
-            "date", "amount", "payee", "description", "transaction"
-        ]
-        
         for i, line in enumerate(lines):
-            line_lower = line.lower()
-            # Prüfe ob Zeile typische Header-Keywords enthält
-            keyword_count = sum(1 for keyword in header_keywords if keyword in line_lower)
-            if keyword_count >= 2:  # Mindestens 2 Keywords gefunden
+            if self.is_header_line(line):
                 return i, delimiter
         
         return None, delimiter
     
+    def is_header_line(self, line: str) -> bool:
+        """Prüft, ob eine Zeile typische Spaltennamen enthält (mindestens 2)."""
+        line_lower = line.lower()
+        keyword_count = sum(1 for keyword in self.HEADER_KEYWORDS if keyword in line_lower)
+        return keyword_count >= 2
+    
     def find_iban(self, lines: List[str]) -> Optional[str]:
         """Findet die eigene IBAN in den Metadaten-Zeilen."""
         iban_pattern = re.compile(r'[A-Z]{2}\d{2}[A-Z0-9]{4,30}')
         
-        for line in lines[:20]:  # Erste 20 Zeilen prüfen
+        for line in lines[:self.IBAN_LINES]:  # Erste 20 Zeilen prüfen
             # Suche nach "Girokonto", "IBAN", "Kontonummer" etc.
             if any(keyword in line.lower() for keyword in ["girokonto", "iban", "kontonummer", "account"]):
                 # Extrahiere IBAN
@@ -227,67 +320,69 @@ class BankCSVParser:
         except ValueError:
             return 0.0
     
-    def parse(self) -> Tuple[pd.DataFrame, Optional[str], Dict[str, str]]:
+    def _open_text(self):
+        return open(self.csv_path, 'r', encoding=self.encoding, errors=DECODE_ERRORS, newline='')
+    
+    def sniff(self) -> Tuple[Optional[str], Dict[str, str]]:
         """
-        Parst die CSV-Datei und gibt DataFrame, IBAN und Column-Mapping zurück.
+        Bestimmt Encoding, eigene IBAN, Trennzeichen, Header-Zeile und
+        Spalten-Mapping aus dem Dateianfang, ohne die Buchungen einzulesen.
+        
+        Die Header-Zeile muss innerhalb der ersten SNIFF_BYTES Zeichen beginnen.
+        Ist das Format bekannt (Fingerabdruck der Header-Zeile in formats),
+        werden keine Heuristiken ausgeführt.
         
         Returns:
-            Tuple: (DataFrame, eigene_iban, column_mapping)
+            Tuple: (eigene_iban, column_mapping)
         """
-        # Encoding erkennen
-        self.encoding = self.detect_encoding()
+        with open(self.csv_path, 'rb') as f:
+            prefix = f.read(SNIFF_BYTES)
+        
+        if self.formats and self._apply_known_format(prefix):
+            return self.eigene_iban, self.column_mapping
+        
+        self.encoding = self.detect_encoding(prefix)
+        
+        lines = []
+        header_line = None
+        consumed = 0
+        with self._open_text() as f:
+            index = 0
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if index == 0:
+                    # BOM entfernen
+                    line = line.replace('\ufeff', '')
+                consumed += len(line)
+                if len(lines) < self.IBAN_LINES:
+                    lines.append(line)
+                
+                if header_line is None:
+                    if self.is_header_line(line):
+                        header_line = line
+                        self.header_row = index
+                    elif consumed > SNIFF_BYTES:
+                        break
+                if header_line is not None and len(lines) >= self.IBAN_LINES:
+                    break
+                index += 1
         
-        # Datei einlesen
-        try:
-            with open(self.csv_path, 'r', encoding=self.encoding, errors='ignore') as f:
-                lines = f.readlines()
-        except UnicodeDecodeError:
-            # Fallback auf latin-1
-            with open(self.csv_path, 'r', encoding='latin-1', errors='ignore') as f:
-                lines = f.readlines()
-            self.encoding = 'latin-1'
-        
-        # BOM entfernen
-        if lines:
-            lines[0] = lines[0].replace('\ufeff', '')
+        if header_line is None:
+            raise ValueError("Header-Zeile konnte nicht gefunden werden")
+        self.fingerprint = header_fingerprint(header_line)
         
-        # IBAN finden
+        # Trennzeichen aus den ersten Zeilen, IBAN aus den Metadaten
+        self.delimiter = self.detect_delimiter(lines[:10])
         self.eigene_iban = self.find_iban(lines)
         
-        # Header-Zeile finden
-        self.header_row, self.delimiter = self.find_header_row(lines)
-        
-        if self.header_row is None:
-            raise ValueError("Header-Zeile konnte nicht gefunden werden")
-        
-        # DataFrame laden
-        try:
-            self.df = pd.read_csv(
-                self.csv_path,
-                sep=self.delimiter,
-                skiprows=self.header_row,
-                encoding=self.encoding,
-                quotechar='"',
-                on_bad_lines='skip',
-                engine='python'
-            )
-        except Exception as e:
-            # Fallback: Versuche mit anderen Einstellungen
-            try:
-                self.df = pd.read_csv(
-                    self.csv_path,
-                    sep=self.delimiter,
-                    skiprows=self.header_row,
-                    encoding='latin-1',
-                    quotechar='"',
-                    on_bad_lines='skip',
-                    engine='python'
-                )
-            except Exception:
-                raise ValueError(f"CSV konnte nicht gelesen werden: {e}")
-        
-        # Spalten-Mapping finden
-        self.column_mapping = self.find_column_mapping(self.df)
+        # Spalten-Mapping aus der Header-Zeile (gleiche Spaltennamen wie pandas)
+        columns = pd.read_csv(
+            io.StringIO(header_line), sep=self.delimiter, quotechar='"', nrows=0, engine='python'
+        ).columns
+        self.columns = list(columns)
+        self.column_mapping = self.find_column_mapping(pd.DataFrame(columns=columns))
         
         # Prüfe ob mindestens Datum und Betrag gefunden wurden
         if 'datum' not in self.column_mapping:
@@ -295,6 +390,152 @@ class BankCSVParser:
         if 'betrag' not in self.column_mapping:
             raise ValueError("Spalte 'Betrag' konnte nicht gefunden werden")
         
+        return self.eigene_iban, self.column_mapping
+    
+    def _apply_known_format(self, prefix: bytes) -> bool:
+        """Übernimmt ein bekanntes Format, wenn die Header-Zeile passt."""
+        candidates = {(fmt['encoding'], fmt['header_row']) for fmt in self.formats.values()}
+        for encoding, header_row in candidates:
+            lines = prefix.decode(encoding, errors=DECODE_ERRORS).splitlines(keepends=True)
+            # Die letzte Zeile des Dateianfangs kann abgeschnitten sein
+            if len(lines) <= header_row + 1 and len(prefix) == SNIFF_BYTES:
+                continue
+            if len(lines) <= header_row:
+                continue
+            fingerprint = header_fingerprint(lines[header_row])
+            fmt = self.formats.get(fingerprint)
+            if fmt is None or (fmt['encoding'], fmt['header_row']) != (encoding, header_row):
+                continue
+            
+            self.known_format = True
+            self.fingerprint = fingerprint
+            self.encoding = encoding
+            self.header_row = header_row
+            self.delimiter = fmt['delimiter']
+            self.columns = list(fmt['columns'])
+            self.column_mapping = dict(fmt['column_mapping'])
+            self.date_format = fmt.get('date_format')
+            self.amount_format = fmt.get('amount_format')
+            lines[0] = lines[0].replace('\ufeff', '')
+            self.eigene_iban = self.find_iban(lines)
+            return True
+        return False
+    
+    def _count_hits(self, hits: Dict[str, int], name: Optional[str], count: int):
+        if name is not None and count:
+            hits[name] = hits.get(name, 0) + count
+    
+    def detected_amount_format(self) -> Optional[str]:
+        """Betragsformat, wenn alle Beträge mit Trennzeichen eindeutig einem Format folgen."""
+        if self.amount_format:
+            return self.amount_format
+        found = [name for name, count in self._amount_hits.items() if count and name != "other"]
+        if len(found) == 1 and not self._amount_hits.get("other"):
+            return found[0]
+        return None
+    
+    def date_format_reliable(self) -> bool:
+        """True, wenn das Datumsformat eindeutig bestimmt wurde und alle Werte passten."""
+        return self.date_format is not None and not self.date_format_ambiguous and not self.date_rejected
+    
+    def format_info(self) -> Dict:
+        """
+        Erkanntes Format als Dict (Eintrag der Format-Registry).
+        
+        Das Datumsformat wird nur angegeben, wenn es verlässlich ist
+        (date_format_reliable); replace_date_format zeigt an, dass ein
+        gespeichertes Datumsformat überschrieben werden soll.
+        """
+        return {
+            'fingerprint': self.fingerprint,
+            'encoding': self.encoding,
+            'delimiter': self.delimiter,
+            'header_row': self.header_row,
+            'columns': list(self.columns),
+            'column_mapping': dict(self.column_mapping),
+            'date_format': self.date_format if self.date_format_reliable() else None,
+            'replace_date_format': self.date_format_relearned,
+            'amount_format': self.detected_amount_format(),
+        }
+    
+    def _usecols(self) -> List[int]:
+        """Positionen der gemappten Spalten (nur diese werden eingelesen)."""
+        return sorted({self.columns.index(name) for name in self.column_mapping.values()})
+    
+    def _read_body(self, engine, chunksize=None):
+        return pd.read_csv(
+            self.csv_path,
+            sep=self.delimiter,
+            skiprows=self.header_row,
+            encoding=self.encoding,
+            encoding_errors=DECODE_ERRORS,
+            quotechar='"',
+            on_bad_lines='skip',
+            engine=engine,
+            # Alle Werte als Text: keine Typerkennung, Umwandlung in extract_frame
+            dtype=str,
+            usecols=self._usecols(),
+            chunksize=chunksize,
+        )
+    
+    def _fallback(self, engine, error):
+        self.fallback_reason = f"{engine}: {error}"
+        if engine == self.engines[-1]:
+            raise ValueError(f"CSV konnte nicht gelesen werden: {error}")
+    
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Liest die Buchungen blockweise in einem Durchlauf (Generator).
+        
+        Ruft bei Bedarf sniff() auf; es werden nie mehr als chunk_size Zeilen
+        gleichzeitig im Speicher gehalten. Lehnt der C-Parser die Datei vor dem
+        ersten Block ab, wird der Python-Parser verwendet; der verwendete Parser
+        steht danach in self.engine.
+        
+        Yields:
+            DataFrame mit bis zu chunk_size Zeilen (nur gemappte Spalten, als Text)
+        
+        Raises:
+            EngineRestart: der C-Parser scheitert nach bereits gelieferten
+                Blöcken. Ein Fortsetzen ab der Zeilenzahl ist nicht möglich,
+                weil beide Parser fehlerhafte Zeilen unterschiedlich überspringen.
+        """
+        if self.header_row is None:
+            self.sniff()
+        
+        yielded = False
+        for engine in self.engines:
+            self.engine = engine
+            try:
+                with self._read_body(engine, chunk_size) as reader:
+                    for chunk in reader:
+                        yielded = True
+                        yield chunk
+                return
+            except (pd.errors.ParserError, csv.Error, ValueError) as e:
+                if yielded and engine != self.engines[-1]:
+                    self.fallback_reason = f"{engine}: {e}"
+                    raise EngineRestart(f"Parser {engine} nach dem ersten Block gescheitert: {e}") from e
+                self._fallback(engine, e)
+    
+    def parse(self) -> Tuple[pd.DataFrame, Optional[str], Dict[str, str]]:
+        """
+        Parst die CSV-Datei und gibt DataFrame, IBAN und Column-Mapping zurück.
+        
+        Returns:
+            Tuple: (DataFrame, eigene_iban, column_mapping)
+        """
+        self.sniff()
+        
+        # DataFrame laden (C-Parser, bei Fehlern Python-Parser)
+        for engine in self.engines:
+            self.engine = engine
+            try:
+                self.df = self._read_body(engine)
+                break
+            except (pd.errors.ParserError, csv.Error, ValueError) as e:
+                self._fallback(engine, e)
+        
         return self.df, self.eigene_iban, self.column_mapping
     
     def extract_row_data(self, row: pd.Series) -> Dict:
@@ -358,3 +599,199 @@ class BankCSVParser:
             data['konto'] = self.eigene_iban or ''
         
         return data
+    
+    def _text_column(self, df: pd.DataFrame, key: str, default: str = '') -> pd.Series:
+        """Liefert eine gemappte Spalte als bereinigten Text (fehlende Werte -> default)."""
+        if key not in self.column_mapping:
+            return pd.Series(default, index=df.index, dtype=object)
+        col = df[self.column_mapping[key]]
+        text = col.astype(object).where(col.notna(), None)
+        text = text.map(lambda v: v if v is None or isinstance(v, str) else str(v))
+        return text.str.strip().where(text.notna(), default).astype(object)
+    
+    def infer_date_format(self, values: pd.Series) -> Optional[str]:
+        """
+        Bestimmt das Datumsformat einer Spalte per Mehrheitsentscheid.
+        
+        Jedes Format wird auf eine Stichprobe (bis zu DATE_SAMPLE_SIZE Werte,
+        gleichmäßig über die Spalte verteilt) angewendet; gewählt wird das Format
+        mit den meisten Treffern. Mehrdeutige Werte (01/02/2024 passt zu Tag/Monat
+        und Monat/Tag) zählen für beide, eindeutige (13/02/2024) entscheiden; bei
+        Gleichstand gewinnt das frühere Format der Liste und
+        self.date_format_ambiguous wird gesetzt.
+        
+        Returns:
+            Datumsformat oder None, wenn kein Wert der Stichprobe passt
+        """
+        if values.empty:
+            return None
+        step = max(1, len(values) // self.DATE_SAMPLE_SIZE)
+        sample = values.iloc[::step]
+        votes = {
+            fmt: int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+            for fmt in self.DATE_FORMATS
+        }
+        best = max(self.DATE_FORMATS, key=lambda fmt: votes[fmt])
+        if votes[best] == 0:
+            return None
+        self.date_format_ambiguous = list(votes.values()).count(votes[best]) > 1
+        return best
+    
+    def parse_dates(self, values: pd.Series) -> pd.Series:
+        """
+        Spaltenweises Gegenstück zu parse_date.
+        
+        Das Datumsformat wird einmal je Datei bestimmt (infer_date_format, sofern
+        nicht bereits bekannt) und die Spalte in einem Schritt umgewandelt. Passt
+        mehr als DATE_RELEARN_SHARE eines Blocks nicht, wird das Format neu
+        bestimmt. Werte, die nicht zum Format passen, werden nicht erkannt;
+        solche, die wie ein Datum aussehen (DATE_LIKE), werden in
+        self.date_rejected gezählt, andere Texte (Fußzeilen) nicht.
+        
+        Returns:
+            Series (datetime64) mit NaT für nicht erkannte Werte
+        """
+        text = values.astype(object).where(values.notna(), None)
+        text = text.map(lambda v: v if v is None or isinstance(v, str) else str(v)).str.strip()
+        result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        present = text.notna() & (text != '')
+        if not present.any():
+            return result
+        
+        if self.date_format is None:
+            self.date_format = self.infer_date_format(text[present])
+        if self.date_format is None:
+            self.date_rejected += int(text[present].str.match(self.DATE_LIKE).sum())
+            return result
+        
+        parsed = pd.to_datetime(text[present], format=self.date_format, errors='coerce')
+        rejected = self._date_rejects(text[present], parsed)
+        if rejected > len(parsed) * self.DATE_RELEARN_SHARE:
+            parsed, rejected = self._relearn_date_format(text[present], parsed, rejected)
+        result[parsed.index] = parsed
+        self.date_rejected += rejected
+        return result
+    
+    def _date_rejects(self, text: pd.Series, parsed: pd.Series) -> int:
+        """Anzahl nicht erkannter Werte, die wie ein Datum aussehen."""
+        return int(text[parsed.isna()].str.match(self.DATE_LIKE).sum())
+    
+    def _relearn_date_format(self, text: pd.Series, parsed: pd.Series, rejected: int):
+        """
+        Bestimmt das Datumsformat anhand des Blocks neu und wechselt, wenn das
+        neue Format mehr Werte erkennt.
+        
+        Returns:
+            Tuple: (umgewandelte Werte, Anzahl nicht erkannter Werte)
+        """
+        ambiguous = self.date_format_ambiguous
+        fmt = self.infer_date_format(text)
+        if fmt is not None and fmt != self.date_format:
+            reparsed = pd.to_datetime(text, format=fmt, errors='coerce')
+            if self._date_rejects(text, reparsed) < rejected:
+                self.date_format = fmt
+                self.date_format_relearned = True
+                return reparsed, self._date_rejects(text, reparsed)
+        self.date_format_ambiguous = ambiguous
+        return parsed, rejected
+    
+    def parse_amounts(self, values: pd.Series) -> pd.Series:
+        """
+        Spaltenweises Gegenstück zu parse_amount (gleiche Formatregeln).
+        
+        Ist das Betragsformat bekannt, werden passende Werte direkt umgewandelt
+        und nur die übrigen nach den Einzelfallregeln.
+        
+        Returns:
+            Series (float) mit 0.0 für leere oder nicht lesbare Werte
+        """
+        text = values.astype(object).where(values.notna(), '').map(str).str.strip()
+        
+        if self.amount_format in self.AMOUNT_PATTERNS:
+            direct = text.str.fullmatch(self.AMOUNT_PATTERNS[self.amount_format])
+            if self.amount_format == "comma":
+                normalized = text[direct].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+            else:
+                normalized = text[direct].str.replace(',', '', regex=False)
+            amounts = pd.Series(0.0, index=values.index)
+            amounts[direct] = pd.to_numeric(normalized, errors='coerce').fillna(0.0).astype(float)
+            if not direct.all():
+                amounts[~direct] = self._parse_amounts_by_rules(values[~direct])
+            return amounts
+        
+        # Format lernen: Werte mit Trennzeichen, die genau einem Format folgen
+        separated = text.str.contains(r'[.,]', regex=True)
+        comma = text.str.fullmatch(self.AMOUNT_PATTERNS["comma"]) & separated
+        dot = text.str.fullmatch(self.AMOUNT_PATTERNS["dot"]) & separated
+        self._count_hits(self._amount_hits, "comma", int((comma & ~dot).sum()))
+        self._count_hits(self._amount_hits, "dot", int((dot & ~comma).sum()))
+        self._count_hits(self._amount_hits, "other", int((separated & ~comma & ~dot).sum()))
+        return self._parse_amounts_by_rules(values)
+    
+    def _parse_amounts_by_rules(self, values: pd.Series) -> pd.Series:
+        missing = values.isna()
+        text = values.astype(object).where(~missing, '').map(str)
+        text = text.str.strip().str.replace(r'[€$£]', '', regex=True).str.strip()
+        text = text.str.replace(' ', '', regex=False)
+        
+        is_negative = text.str.startswith('-') | text.str.startswith('(')
+        text = text.str.lstrip('-(').str.rstrip(')')
+        
+        last_comma = text.str.rfind(',')
+        last_dot = text.str.rfind('.')
+        has_comma = last_comma >= 0
+        has_dot = last_dot >= 0
+        
+        # Beide vorhanden: das letzte Zeichen ist das Dezimaltrennzeichen
+        comma_decimal = has_comma & has_dot & (last_comma > last_dot)
+        dot_decimal = has_comma & has_dot & (last_comma < last_dot)
+        # Nur Komma: Dezimaltrennzeichen bei genau einem Komma mit max. 2 Nachkommastellen
+        comma_only = has_comma & ~has_dot
+        single_comma = comma_only & (text.str.count(',') == 1) & (text.str.len() - last_comma - 1 <= 2)
+        
+        normalized = text.copy()
+        normalized[comma_decimal] = text[comma_decimal].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        normalized[dot_decimal | (comma_only & ~single_comma)] = (
+            text[dot_decimal | (comma_only & ~single_comma)].str.replace(',', '', regex=False)
+        )
+        normalized[single_comma] = text[single_comma].str.replace(',', '.', regex=False)
+        
+        amounts = pd.to_numeric(normalized, errors='coerce').fillna(0.0).astype(float)
+        amounts[is_negative] = -amounts[is_negative]
+        amounts[missing | (text == '')] = 0.0
+        return amounts
+    
+    def extract_frame(self, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Spaltenweise Variante von extract_row_data für den gesamten DataFrame.
+        
+        Returns:
+            DataFrame mit den Spalten: datum (datetime64, NaT wenn nicht erkannt),
+            betrag, beschreibung, art, gegen_iban, konto
+        """
+        if df is None:
+            df = self.df
+        
+        if 'datum' in self.column_mapping:
+            datum = self.parse_dates(df[self.column_mapping['datum']])
+        else:
+            datum = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        
+        if 'betrag' in self.column_mapping:
+            betrag = self.parse_amounts(df[self.column_mapping['betrag']])
+        else:
+            betrag = pd.Series(0.0, index=df.index)
+        
+        # Beschreibung (Empfänger + Verwendungszweck)
+        beschreibung = (
+            self._text_column(df, 'empfaenger') + ' ' + self._text_column(df, 'verwendungszweck')
+        ).str.strip()
+        
+        return pd.DataFrame({
+            'datum': datum,
+            'betrag': betrag,
+            'beschreibung': beschreibung.astype(object),
+            'art': self._text_column(df, 'art'),
+            'gegen_iban': self._text_column(df, 'iban'),
+            'konto': self._text_column(df, 'konto', self.eigene_iban or ''),
+        }, index=df.index)
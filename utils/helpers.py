@@ -49,6 +49,7 @@ def parse_filter_params():
         "kategorie2_filter": request.args.get("kategorie2_filter") or "",
         "beschreibung_filter": request.args.get("beschreibung_filter") or "",
         "page": page,
+        "cursor": request.args.get("cursor") or "",
     }
 
 
@@ -0,0 +1,435 @@
+"""
+Parser für strukturierte Kontoauszüge: CAMT.053 (XML) und MT940 (SWIFT).
+
+Beide liefern dieselbe Schnittstelle wie BankCSVParser (sniff, iter_chunks,
+extract_frame, format_info) und laufen daher unverändert durch die
+Import-Pipeline. Spalten müssen nicht erraten werden: Buchungsdatum, Betrag,
+eigene IBAN und Gegenkonto stehen in festen Feldern.
+
+- CAMT.053 wird mit ElementTree.iterparse gelesen; jede Buchung (Ntry) wird
+  nach dem Auswerten aus dem Baum entfernt. Der Speicherbedarf hängt damit
+  nicht von der Länge des Auszugs ab (auch mehrjährige Auszüge).
+- MT940 wird zeilenweise in Felder (:61:, :86:, ...) zerlegt, ohne die Datei
+  vollständig einzulesen.
+
+Die Beschreibung wird wie beim CSV-Import aus Empfänger und
+Verwendungszweck gebildet, damit dieselbe Buchung aus einem CSV- und einem
+CAMT-/MT940-Export als Duplikat erkannt wird.
+"""
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from utils.csv_parser import BankCSVParser, DECODE_ERRORS, DEFAULT_CHUNK_SIZE
+
+
+CAMT_EXTENSIONS = (".xml",)
+MT940_EXTENSIONS = (".sta", ".mt940", ".940")
+STATEMENT_EXTENSIONS = CAMT_EXTENSIONS + MT940_EXTENSIONS
+
+# Felder einer Buchung (Zwischenformat vor extract_frame)
+RECORD_FIELDS = ["datum", "betrag", "empfaenger", "verwendungszweck", "art", "gegen_iban", "konto"]
+
+
+def _iban_from_account(account: str) -> str:
+    """
+    Eigene Kontoangabe aus MT940 (:25:) als IBAN.
+
+    "BLZ/Kontonummer" deutscher Konten wird in die Regel-IBAN umgerechnet
+    (Prüfziffer nach ISO 7064); andere Angaben bleiben unverändert.
+    """
+    account = account.strip().replace(" ", "")
+    match = re.fullmatch(r"(\d{8})/(\d{1,10})(?:[A-Z]{3})?", account)
+    if not match:
+        # IBAN, ggf. mit angehängter Währung (DE12...EUR)
+        return re.sub(r"(?<=\d)[A-Z]{3}$", "", account)
+    bban = match.group(1) + match.group(2).zfill(10)
+    # "DE" = 13 14, Prüfziffer zunächst 00
+    check = 98 - int(bban + "131400") % 97
+    return f"DE{check:02d}{bban}"
+
+
+class StatementParser:
+    """Gemeinsame Grundlage der Auszugsparser (Schnittstelle von BankCSVParser)."""
+
+    # Bezeichnung des Formats (Ausgabe, format_info)
+    STATEMENT_FORMAT = None
+    # Datumsformat der Werte in der Spalte datum (Zwischenformat)
+    DATE_FORMAT = "%Y-%m-%d"
+
+    def __init__(self, path: str, formats: Optional[Dict[str, Dict]] = None):
+        self.csv_path = path
+        self.statement_format = self.STATEMENT_FORMAT
+        self.encoding = None
+        self.delimiter = None
+        self.header_row = None
+        self.column_mapping = {}
+        self.eigene_iban = None
+        # Strukturierte Formate werden nicht in der Format-Registry geführt
+        self.known_format = False
+        self.engine = None
+        self.fallback_reason = None
+        self.date_format = self.DATE_FORMAT
+        self.date_rejected = 0
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Liefert die Buchungen als Dicts mit den Schlüsseln RECORD_FIELDS."""
+        raise NotImplementedError
+
+    def sniff(self) -> Tuple[Optional[str], Dict[str, str]]:
+        raise NotImplementedError
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Liest die Buchungen blockweise in einem Durchlauf (Generator).
+
+        Yields:
+            DataFrame mit bis zu chunk_size Zeilen (Spalten RECORD_FIELDS)
+        """
+        self.engine = self.statement_format.lower()
+        records = []
+        for record in self.iter_records():
+            records.append(record)
+            if len(records) >= chunk_size:
+                yield pd.DataFrame.from_records(records, columns=RECORD_FIELDS)
+                records = []
+        if records:
+            yield pd.DataFrame.from_records(records, columns=RECORD_FIELDS)
+
+    def extract_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Wandelt einen Block in das Format von BankCSVParser.extract_frame.
+
+        Returns:
+            DataFrame mit den Spalten: datum (datetime64, NaT wenn ungültig),
+            betrag, beschreibung, art, gegen_iban, konto
+        """
+        text = df["datum"].fillna("")
+        datum = pd.to_datetime(text, format=self.DATE_FORMAT, errors="coerce")
+        # z.B. 30.02. als Platzhalter mancher Banken
+        self.date_rejected += int((datum.isna() & (text != "")).sum())
+
+        beschreibung = (df["empfaenger"].fillna("") + " " + df["verwendungszweck"].fillna("")).str.strip()
+        return pd.DataFrame({
+            "datum": datum,
+            "betrag": df["betrag"].astype(float),
+            "beschreibung": beschreibung.astype(object),
+            "art": df["art"].fillna("").astype(object),
+            "gegen_iban": df["gegen_iban"].fillna("").astype(object),
+            "konto": df["konto"].fillna(self.eigene_iban or "").astype(object),
+        }, index=df.index)
+
+    def format_info(self) -> Dict:
+        """Format als Dict (ohne Fingerabdruck, wird nicht gespeichert)."""
+        return {
+            "fingerprint": None,
+            "statement_format": self.statement_format,
+            "encoding": self.encoding,
+            "date_format": self.date_format,
+        }
+
+
+# =============================
+# CAMT.053
+# =============================
+# Pfade relativ zu Ntry bzw. Acct (ohne Namespace, siehe _qualify)
+_CAMT_PATHS = {
+    "status": "Sts",
+    "status_code": "Sts/Cd",
+    "amount": "Amt",
+    "direction": "CdtDbtInd",
+    "booking_date": "BookgDt/Dt",
+    "booking_datetime": "BookgDt/DtTm",
+    "value_date": "ValDt/Dt",
+    "details": "NtryDtls/TxDtls",
+    "purpose": ".//Ustrd",
+    "info": "AddtlNtryInf",
+    "code": "BkTxCd/Prtry/Cd",
+    "iban": "Id/IBAN",
+    "other_id": "Id/Othr/Id",
+}
+for _role in ("Cdtr", "Dbtr"):
+    # Gegenseite: Name direkt, ab Version 08 unter Pty, sonst abweichender Empfänger
+    _CAMT_PATHS[_role] = (
+        f"RltdPties/{_role}/Nm",
+        f"RltdPties/{_role}/Pty/Nm",
+        f"RltdPties/Ultmt{_role}/Nm",
+    )
+    _CAMT_PATHS[_role + "Acct"] = f"RltdPties/{_role}Acct/Id/IBAN"
+
+
+def _qualify(path, uri):
+    """Ergänzt den Namespace des Dokuments in jedem Schritt des Pfads."""
+    if isinstance(path, tuple):
+        return tuple(_qualify(part, uri) for part in path)
+    if not uri:
+        return path
+    return "/".join(step if step in ("", ".") else f"{{{uri}}}{step}" for step in path.split("/"))
+
+
+def _namespace(tag: str) -> str:
+    return tag[1:].split("}", 1)[0] if tag.startswith("{") else ""
+
+
+class CamtParser(StatementParser):
+    """Parser für CAMT.053-Kontoauszüge (XML, alle Versionen 001.02 bis 001.10)."""
+
+    STATEMENT_FORMAT = "CAMT.053"
+
+    def _use_namespace(self, document):
+        uri = _namespace(document.tag)
+        if document.tag.rsplit("}", 1)[-1] != "Document" or "camt.053" not in uri:
+            raise ValueError(f"Kein CAMT.053-Auszug ({document.tag})")
+        self._paths = {name: _qualify(path, uri) for name, path in _CAMT_PATHS.items()}
+        self._tags = {name: _qualify(name, uri) for name in ("Stmt", "Acct", "Ntry", "Bal")}
+
+    def _text(self, element, name) -> str:
+        return (element.findtext(self._paths[name]) or "").strip()
+
+    def sniff(self) -> Tuple[Optional[str], Dict[str, str]]:
+        """Liest den Anfang bis zur IBAN des ersten Auszugs."""
+        self.encoding = "xml"
+        try:
+            events = ET.iterparse(self.csv_path, events=("start", "end"))
+            _event, document = next(events)
+            self._use_namespace(document)
+            for event, element in events:
+                if event == "start" and element.tag == self._tags["Ntry"]:
+                    break
+                if event == "end" and element.tag == self._tags["Acct"]:
+                    self.eigene_iban = self._text(element, "iban") or None
+                    break
+        except ET.ParseError as e:
+            raise ValueError(f"XML konnte nicht gelesen werden: {e}")
+        return self.eigene_iban, self.column_mapping
+
+    def iter_records(self) -> Iterator[Dict]:
+        konto = None
+        # Übergeordnete Elemente, aus denen ausgewertete Buchungen bzw.
+        # Auszüge entfernt werden (konstanter Speicherbedarf)
+        container = statement = None
+        in_entry = False
+        try:
+            events = ET.iterparse(self.csv_path, events=("start", "end"))
+            _event, document = next(events)
+            self._use_namespace(document)
+            container_tag = _qualify("BkToCstmrStmt", _namespace(document.tag))
+            stmt_tag, acct_tag, ntry_tag, bal_tag = (
+                self._tags["Stmt"], self._tags["Acct"], self._tags["Ntry"], self._tags["Bal"]
+            )
+            for event, element in events:
+                tag = element.tag
+                if event == "start":
+                    if tag == ntry_tag:
+                        in_entry = True
+                    elif tag == stmt_tag:
+                        statement = element
+                    elif tag == container_tag:
+                        container = element
+                    continue
+
+                if tag == ntry_tag:
+                    in_entry = False
+                    record = self._entry(element, konto)
+                    if record is not None:
+                        yield record
+                    element.clear()
+                    if statement is not None:
+                        statement.remove(element)
+                elif tag == acct_tag and not in_entry:
+                    konto = self._text(element, "iban") or self._text(element, "other_id") or None
+                elif tag == bal_tag and statement is not None:
+                    element.clear()
+                    statement.remove(element)
+                elif tag == stmt_tag and container is not None:
+                    element.clear()
+                    container.remove(element)
+        except (ET.ParseError, StopIteration) as e:
+            raise ValueError(f"XML konnte nicht gelesen werden: {e}")
+
+    def _entry(self, entry, konto) -> Optional[Dict]:
+        # Nur gebuchte Umsätze (Sts bzw. ab Version 08 Sts/Cd)
+        status = self._text(entry, "status") or self._text(entry, "status_code")
+        if status and status != "BOOK":
+            return None
+
+        amount = float(self._text(entry, "amount") or 0)
+        # Gibt auch bei Stornos (RvslInd) die Richtung der Buchung an
+        debit = self._text(entry, "direction") == "DBIT"
+        datum = (
+            self._text(entry, "booking_date")
+            or self._text(entry, "booking_datetime")[:10]
+            or self._text(entry, "value_date")
+        )
+
+        # Gegenseite aus den ersten Transaktionsdetails (bei Sammelbuchungen)
+        name, iban = "", ""
+        details = entry.find(self._paths["details"])
+        if details is not None:
+            role = "Cdtr" if debit else "Dbtr"
+            name = next(
+                (text.strip() for text in (details.findtext(path) for path in self._paths[role]) if text),
+                "",
+            )
+            iban = self._text(details, role + "Acct")
+        purposes = [element.text.strip() for element in entry.iterfind(self._paths["purpose"]) if element.text]
+        return {
+            "datum": datum,
+            "betrag": -amount if debit else amount,
+            "empfaenger": name,
+            "verwendungszweck": " ".join(purposes),
+            "art": self._text(entry, "info") or self._text(entry, "code"),
+            "gegen_iban": iban,
+            "konto": konto,
+        }
+
+
+# =============================
+# MT940
+# =============================
+# :61: Valuta JJMMTT, optional Buchungsdatum MMTT, (R)C/(R)D, optional dritter
+# Buchstabe der Währung, Betrag mit Komma, Buchungsschlüssel (4 Zeichen)
+_MT940_61 = re.compile(r"(\d{6})(\d{4})?(RC|RD|C|D)([A-Z])?(\d+,\d*)([A-Z0-9]{4})")
+_MT940_TAG = re.compile(r":(\d{2}[A-Z]?):")
+# Unterfelder des strukturierten :86: (?00 Buchungstext, ?20-?29/?60-?63 Zweck, ...)
+_MT940_SUBFIELD = re.compile(r"\?(\d{2})")
+# SEPA-Schlüsselwörter im Verwendungszweck
+_SEPA_KEYWORD = re.compile(r"(EREF|KREF|MREF|CRED|DEBT|SVWZ|ABWA|ABWE|IBAN|BIC)\+")
+_PURPOSE_FIELDS = {f"{n}" for n in range(20, 30)} | {"60", "61", "62", "63"}
+
+
+def _booking_date(value_date: str, entry_date: Optional[str]) -> str:
+    """Buchungsdatum (ISO) aus Valuta JJMMTT und Buchungsdatum MMTT (Jahreswechsel)."""
+    year, month, day = 2000 + int(value_date[:2]), value_date[2:4], value_date[4:6]
+    if entry_date:
+        entry_month = int(entry_date[:2])
+        if entry_month == 12 and int(month) == 1:
+            year -= 1
+        elif entry_month == 1 and int(month) == 12:
+            year += 1
+        month, day = entry_date[:2], entry_date[2:]
+    return f"{year:04d}-{month}-{day}"
+
+
+def _parse_86(value: str) -> Dict[str, str]:
+    """Empfänger, Verwendungszweck, Buchungstext und Gegen-IBAN aus :86:."""
+    value = value.replace("\n", "")
+    if not re.match(r"\d{3}\?", value):
+        # Unstrukturiert: alles ist Verwendungszweck
+        return {"empfaenger": "", "verwendungszweck": value.strip(), "art": "", "gegen_iban": ""}
+
+    fields = {}
+    parts = _MT940_SUBFIELD.split(value[3:])
+    for code, text in zip(parts[1::2], parts[2::2]):
+        fields.setdefault(code, []).append(text)
+    purpose = "".join(
+        "".join(fields[code]) for code in sorted(fields) if code in _PURPOSE_FIELDS
+    )
+    # Bei SEPA-Umsätzen steht der eigentliche Verwendungszweck hinter SVWZ+
+    segments = _SEPA_KEYWORD.split(purpose)
+    if len(segments) > 1:
+        keywords = dict(zip(segments[1::2], segments[2::2]))
+        purpose = keywords.get("SVWZ", segments[0])
+    iban = "".join(fields.get("31", []))
+    return {
+        "empfaenger": " ".join(("".join(fields.get("32", [])) + "".join(fields.get("33", []))).split()),
+        "verwendungszweck": " ".join(purpose.split()),
+        "art": "".join(fields.get("00", [])).strip(),
+        "gegen_iban": iban if re.fullmatch(r"[A-Z]{2}\d{2}[A-Z0-9]+", iban) else "",
+    }
+
+
+class MT940Parser(StatementParser):
+    """Parser für MT940-Kontoauszüge (SWIFT, Variante der deutschen Kreditwirtschaft)."""
+
+    STATEMENT_FORMAT = "MT940"
+
+    def _open_text(self):
+        # MT940 ist meist ISO-8859-1; UTF-8 wird ebenfalls gelesen
+        return open(self.csv_path, "r", encoding="utf-8", errors=DECODE_ERRORS)
+
+    def fields(self) -> Iterator[Tuple[str, str]]:
+        """
+        Zerlegt die Datei zeilenweise in Felder (Tag, Inhalt).
+
+        Folgezeilen werden mit Zeilenumbruch angehängt; "-" beendet eine
+        Nachricht (Feld "-"), SWIFT-Blöcke {1:...} werden übersprungen.
+        """
+        tag, lines = None, []
+        with self._open_text() as f:
+            for line in f:
+                line = line.rstrip("\r\n").lstrip("\ufeff")
+                match = _MT940_TAG.match(line)
+                if match or line.strip() in ("-", "-}") or line.startswith("{"):
+                    if tag is not None:
+                        yield tag, "\n".join(lines)
+                    tag, lines = None, []
+                    if match:
+                        tag, lines = match.group(1), [line[match.end():]]
+                    elif line.startswith("-"):
+                        yield "-", ""
+                elif tag is not None:
+                    lines.append(line)
+        if tag is not None:
+            yield tag, "\n".join(lines)
+
+    def sniff(self) -> Tuple[Optional[str], Dict[str, str]]:
+        """Liest den Anfang bis zur Kontoangabe (:25:) der ersten Nachricht."""
+        self.encoding = "utf-8/latin-1"
+        for tag, value in self.fields():
+            if tag == "25":
+                self.eigene_iban = _iban_from_account(value) or None
+                break
+            if tag == "61":
+                break
+        else:
+            raise ValueError("Keine MT940-Felder gefunden")
+        return self.eigene_iban, self.column_mapping
+
+    def iter_records(self) -> Iterator[Dict]:
+        konto = None
+        pending = None
+        for tag, value in self.fields():
+            if tag == "86" and pending is not None:
+                pending.update(_parse_86(value))
+                continue
+            if pending is not None:
+                yield pending
+                pending = None
+            if tag == "25":
+                konto = _iban_from_account(value) or None
+            elif tag == "61":
+                pending = self._statement_line(value, konto)
+        if pending is not None:
+            yield pending
+
+    def _statement_line(self, value, konto) -> Dict:
+        match = _MT940_61.match(value)
+        if not match:
+            raise ValueError(f"Ungültige Umsatzzeile :61:{value.splitlines()[0]}")
+        value_date, entry_date, mark, _currency, amount, _code = match.groups()
+        amount = float(amount.replace(",", "."))
+        # D = Lastschrift, RC = Storno einer Gutschrift
+        debit = mark in ("D", "RC")
+        return {
+            "datum": _booking_date(value_date, entry_date),
+            "betrag": -amount if debit else amount,
+            "empfaenger": "",
+            "verwendungszweck": "",
+            "art": "",
+            "gegen_iban": "",
+            "konto": konto,
+        }
+
+
+def create_parser(path: str, formats: Optional[Dict[str, Dict]] = None):
+    """Parser passend zur Dateiendung (CAMT.053, MT940, sonst CSV)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in CAMT_EXTENSIONS:
+        return CamtParser(path, formats)
+    if ext in MT940_EXTENSIONS:
+        return MT940Parser(path, formats)
+    return BankCSVParser(path, formats=formats)